@@ -1,25 +1,54 @@
+import time
+
+_INIT_STARTED = time.perf_counter()
+
 from common_utils import (
     extract_body,
     format_response,
     get_dynamodb_table,
+    get_http_method,
     get_path_parameters,
     handle_error,
+    idempotent,
+    init_phase,
+    metrics,
+    prime_dynamodb_table,
+    prime_on_init,
+    rate_limit,
+    record_init_phase,
+    register_priming_hook,
     setup_logger,
 )
 
+record_init_phase("imports", _INIT_STARTED)
+
 # Define version number
 VERSION = "1.2.0"
 
 # Initialize logger
-logger = setup_logger()
+with init_phase("setup_logger"):
+    logger = setup_logger()
 
 # Get DynamoDB table
-device_table = get_dynamodb_table("devices")
+with init_phase("get_dynamodb_table"):
+    device_table = get_dynamodb_table("devices")
 
 # Added this comment to test if Terraform detects code changes
 
 
-@handle_error
+@register_priming_hook(timeout=1)
+def prime_device_table():
+    """Open the DynamoDB connection so the next real request skips the handshake."""
+    prime_dynamodb_table(device_table)
+
+
+# Warm connections while init still runs with boosted CPU
+with init_phase("priming"):
+    prime_on_init()
+
+
+@handle_error(prime_on_warmup=True)
+@rate_limit
 def lambda_handler(event, context):
     """
     Handles updates to device status.
@@ -30,7 +59,7 @@ def lambda_handler(event, context):
     logger.info(f"Received event: {event}")
 
     # Extract HTTP method
-    http_method = event.get("httpMethod", "GET")
+    http_method = get_http_method(event) or "GET"
 
     if http_method == "POST":
         # Handle device status update
@@ -40,16 +69,20 @@ def lambda_handler(event, context):
         return get_device_status(event)
 
 
+@idempotent
 def update_device_status(event):
     """Update device status in DynamoDB."""
     # Extract request body
     body = extract_body(event)
 
     # Validate required fields
-    required_fields = ["device_id", "status"]
-    for field in required_fields:
-        if field not in body:
-            return format_response(400, {"error": f"Missing required field: {field}"})
+    with metrics.timer("ValidationTime"):
+        required_fields = ["device_id", "status"]
+        missing_fields = [field for field in required_fields if field not in body]
+    if missing_fields:
+        return format_response(
+            400, {"error": f"Missing required field: {missing_fields[0]}"}
+        )
 
     # Extract device info
     device_id = body["device_id"]
@@ -74,7 +107,8 @@ def update_device_status(event):
 
     # Update DynamoDB
     logger.info(f"Updating device status for device_id: {device_id}")
-    device_table.put_item(Item=update_item)
+    with metrics.timer("PutItemLatency"):
+        device_table.put_item(Item=update_item)
 
     return format_response(
         200,
@@ -97,14 +131,16 @@ def get_device_status(event):
 
     # Query DynamoDB
     logger.info(f"Retrieving status for device_id: {device_id}")
-    response = device_table.get_item(Key={"device_id": device_id})
+    with metrics.timer("GetItemLatency"):
+        response = device_table.get_item(Key={"device_id": device_id})
 
     # Check if item exists
     if "Item" not in response:
         return format_response(404, {"error": f"Device not found: {device_id}"})
 
     # Return device status
-    return format_response(200, response["Item"])
+    with metrics.timer("SerializationTime"):
+        return format_response(200, response["Item"])
 
 
 def get_current_timestamp():
@@ -0,0 +1,427 @@
+import time
+
+_INIT_STARTED = time.perf_counter()
+
+import json
+import os
+import uuid
+from decimal import Decimal, InvalidOperation
+
+from boto3.dynamodb.conditions import Key
+from common_utils import (
+    DEFAULT_RESPONSE_HEADERS,
+    InvalidCursor,
+    Transaction,
+    TransactionCancelled,
+    decode_cursor,
+    encode_cursor,
+    extract_body,
+    format_response,
+    get_dynamodb_table,
+    get_http_method,
+    get_path_parameters,
+    get_query_parameters,
+    get_user_id_from_event,
+    handle_error,
+    init_phase,
+    load_cursor_key,
+    metrics,
+    prime_dynamodb_table,
+    prime_on_init,
+    rate_limit,
+    record_init_phase,
+    register_priming_hook,
+    setup_logger,
+)
+
+record_init_phase("imports", _INIT_STARTED)
+
+# Define version number
+VERSION = "1.0.0"
+
+# Payment states and, for each target state, the states it may be reached from
+PENDING = "pending"
+AUTHORIZED = "authorized"
+CAPTURED = "captured"
+REFUNDED = "refunded"
+FAILED = "failed"
+
+ALLOWED_TRANSITIONS = {
+    AUTHORIZED: (PENDING,),
+    CAPTURED: (AUTHORIZED,),
+    REFUNDED: (CAPTURED,),
+    FAILED: (PENDING, AUTHORIZED),
+}
+
+# Listing: GSI by owner and creation time, page sizes and the summary fields
+# each listed payment carries
+USER_INDEX = "user_id-created_at-index"
+PAGE_SIZE = int(os.environ.get("PAYMENT_PAGE_SIZE", "20"))
+MAX_PAGE_SIZE = int(os.environ.get("PAYMENT_MAX_PAGE_SIZE", "100"))
+SUMMARY_FIELDS = (
+    "payment_id",
+    "status",
+    "amount",
+    "currency",
+    "created_at",
+    "updated_at",
+)
+
+# Initialize logger
+with init_phase("setup_logger"):
+    logger = setup_logger()
+
+# Get DynamoDB tables
+with init_phase("get_dynamodb_table"):
+    payment_table = get_dynamodb_table("payments")
+    ledger_table = get_dynamodb_table("payment_ledger")
+
+# Fail the cold start, not the first listing, if cursors cannot be signed
+with init_phase("load_cursor_key"):
+    load_cursor_key()
+
+
+@register_priming_hook(timeout=1)
+def prime_payment_table():
+    """Open the DynamoDB connection so the next real request skips the handshake."""
+    prime_dynamodb_table(payment_table)
+
+
+# Warm connections while init still runs with boosted CPU
+with init_phase("priming"):
+    prime_on_init()
+
+
+@handle_error(prime_on_warmup=True)
+@rate_limit
+def lambda_handler(event, context):
+    """
+    Handles payment creation, retrieval and status transitions.
+
+    POST creates a pending payment, GET returns one (or lists the caller's
+    payments when no payment_id is given), PUT moves a payment to a new status
+    and DELETE cancels a payment that has not been captured. Every request
+    needs an authenticated caller and only reaches the caller's own payments.
+    """
+    logger.info(f"Received event: {event}")
+
+    user_id = get_user_id_from_event(event)
+    if not user_id:
+        return format_response(401, {"error": "Unauthorized"})
+
+    http_method = get_http_method(event) or "GET"
+
+    if http_method == "POST":
+        return create_payment(event, user_id)
+    if http_method == "PUT":
+        # REST (payload format 1.0) events carry "body": null without a body
+        body = extract_body(event) or {}
+        return transition_payment(
+            get_path_parameters(event).get("payment_id") or body.get("payment_id"),
+            body.get("status"),
+            user_id,
+            expected_version=body.get("version"),
+            reason=body.get("reason"),
+            event=event,
+        )
+    if http_method == "DELETE":
+        body = extract_body(event) or {}
+        return transition_payment(
+            get_path_parameters(event).get("payment_id"),
+            FAILED,
+            user_id,
+            expected_version=body.get("version"),
+            reason=body.get("reason", "cancelled"),
+            event=event,
+        )
+    if not get_path_parameters(event).get("payment_id"):
+        return list_payments(event, user_id)
+    return get_payment(event, user_id)
+
+
+def create_payment(event, user_id):
+    """Create a payment in the pending state, owned by user_id.
+
+    The payment, its first ledger entry and, when IDEMPOTENCY_TABLE is set,
+    the idempotency record are written in one transaction, so a retried
+    create replays the stored response instead of creating another payment.
+    """
+    body = extract_body(event) or {}
+
+    # Ids are assigned here, so a caller cannot pick or probe another's
+    if "payment_id" in body:
+        return format_response(400, {"error": "payment_id is assigned by the server"})
+
+    try:
+        amount = Decimal(str(body.get("amount")))
+    except InvalidOperation:
+        return format_response(400, {"error": "amount must be a number"})
+    if not amount.is_finite() or amount <= 0:
+        return format_response(400, {"error": "amount must be greater than zero"})
+
+    currency = body.get("currency", "USD")
+    if not isinstance(currency, str) or len(currency) != 3:
+        return format_response(400, {"error": "currency must be a 3-letter code"})
+
+    timestamp = get_current_timestamp()
+    payment = {
+        "payment_id": str(uuid.uuid4()),
+        "user_id": user_id,
+        "amount": amount,
+        "currency": currency.upper(),
+        "status": PENDING,
+        "version": 1,
+        "created_at": timestamp,
+        "updated_at": timestamp,
+    }
+
+    response = format_response(201, payment)
+
+    logger.info(f"Creating payment {payment['payment_id']}")
+    transaction = Transaction().put(
+        payment_table,
+        payment,
+        condition="attribute_not_exists(payment_id)",
+        name="payment",
+    )
+    transaction.put(
+        ledger_table,
+        ledger_entry(payment["payment_id"], PENDING, timestamp, version=1),
+        condition="attribute_not_exists(payment_id)",
+        name="ledger",
+    )
+    transaction.put_idempotency_record(event, response)
+    try:
+        with metrics.timer("TransactWriteLatency"):
+            transaction.write()
+    except TransactionCancelled as e:
+        stored = e.items.get("idempotency")
+        if stored and stored.get("status") == "COMPLETED":
+            metrics.counter("IdempotentReplays")
+            return json.loads(stored["response"])
+        if e.reasons.get("payment") == "ConditionalCheckFailed":
+            return format_response(
+                409, {"error": f"Payment already exists: {payment['payment_id']}"}
+            )
+        if "TransactionConflict" in e.reasons.values():
+            return _concurrent_update(payment["payment_id"])
+        raise
+
+    metrics.counter("PaymentTransitions", status=PENDING)
+    return response
+
+
+def transition_payment(
+    payment_id, status, user_id, expected_version=None, reason=None, event=None
+):
+    """Move a payment of user_id to a new status in one DynamoDB transaction.
+
+    The transaction updates the payment, appends its ledger entry and, when
+    an event is given and IDEMPOTENCY_TABLE is set, stores the response as
+    the idempotency record. The update only succeeds if user_id owns the
+    payment, it is in a state the target can be reached from and, when
+    expected_version is given, it still has that version. On failure the
+    current item comes back with the cancellation, so a 404 or 409 needs no
+    extra read.
+    """
+    if not payment_id:
+        return format_response(400, {"error": "Missing payment_id parameter"})
+    if status not in ALLOWED_TRANSITIONS:
+        return format_response(
+            400,
+            {"error": f"status must be one of: {', '.join(ALLOWED_TRANSITIONS)}"},
+        )
+
+    if expected_version is not None and not isinstance(expected_version, int):
+        return format_response(400, {"error": "version must be an integer"})
+
+    timestamp = get_current_timestamp()
+    from_keys = [f":from_{state}" for state in ALLOWED_TRANSITIONS[status]]
+    values = {
+        ":status": status,
+        ":one": 1,
+        ":updated_at": timestamp,
+        ":caller": user_id,
+        **dict(zip(from_keys, ALLOWED_TRANSITIONS[status])),
+    }
+    condition = (
+        "attribute_exists(payment_id) AND user_id = :caller"
+        f" AND #status IN ({', '.join(from_keys)})"
+    )
+    if expected_version is not None:
+        condition += " AND #version = :expected_version"
+        values[":expected_version"] = expected_version
+
+    set_clauses = ["#status = :status", "updated_at = :updated_at"]
+    if reason:
+        set_clauses.append("status_reason = :reason")
+        values[":reason"] = reason
+
+    # Transactions return no attributes, so the response carries what changed
+    version = None if expected_version is None else expected_version + 1
+    result = {"payment_id": payment_id, "status": status, "updated_at": timestamp}
+    if version is not None:
+        result["version"] = version
+    if reason:
+        result["status_reason"] = reason
+    response = format_response(200, result)
+
+    transaction = Transaction().update(
+        payment_table,
+        {"payment_id": payment_id},
+        f"SET {', '.join(set_clauses)} ADD #version :one",
+        condition=condition,
+        names={"#status": "status", "#version": "version"},
+        values=values,
+        name="payment",
+        return_on_failure=True,
+    )
+    transaction.put(
+        ledger_table,
+        ledger_entry(payment_id, status, timestamp, version=version, reason=reason),
+        condition="attribute_not_exists(payment_id)",
+        name="ledger",
+    )
+    if event is not None:
+        transaction.put_idempotency_record(event, response)
+
+    logger.info(f"Moving payment {payment_id} to {status}")
+    try:
+        with metrics.timer("TransactWriteLatency"):
+            transaction.write()
+    except TransactionCancelled as e:
+        stored = e.items.get("idempotency")
+        if stored and stored.get("status") == "COMPLETED":
+            metrics.counter("IdempotentReplays")
+            return json.loads(stored["response"])
+        if e.reasons.get("payment") == "ConditionalCheckFailed":
+            return _transition_conflict(
+                payment_id, status, user_id, expected_version, e.items.get("payment")
+            )
+        if "TransactionConflict" in e.reasons.values():
+            return _concurrent_update(payment_id)
+        raise
+
+    metrics.counter("PaymentTransitions", status=status)
+    return response
+
+
+def ledger_entry(payment_id, status, timestamp, version=None, reason=None):
+    """Build the ledger entry recording that a payment reached status.
+
+    Payments never return to a status, so (payment_id, status) is unique.
+    """
+    entry = {"payment_id": payment_id, "status": status, "created_at": timestamp}
+    if version is not None:
+        entry["version"] = version
+    if reason:
+        entry["reason"] = reason
+    return entry
+
+
+def _concurrent_update(payment_id):
+    """Answer a write that kept losing to concurrent transactions.
+
+    Transaction has already retried it, so the client should retry later.
+    """
+    metrics.counter("PaymentConcurrentUpdates")
+    return format_response(
+        409,
+        {"error": f"Payment {payment_id} is being updated concurrently, retry"},
+        {**DEFAULT_RESPONSE_HEADERS, "Retry-After": "1"},
+    )
+
+
+def _transition_conflict(payment_id, status, user_id, expected_version, current):
+    """Explain a failed transition from the current item, None if missing.
+
+    Another user's payment is reported as missing, so ids cannot be probed.
+    """
+    if current is None or current.get("user_id") != user_id:
+        return format_response(404, {"error": f"Payment not found: {payment_id}"})
+
+    # A retried webhook or client request that already took effect
+    already_applied = current["status"] == status and (
+        expected_version is None or int(current["version"]) == int(expected_version) + 1
+    )
+    if already_applied:
+        return format_response(200, current)
+
+    metrics.counter("PaymentTransitionConflicts", status=status)
+    if current["status"] not in ALLOWED_TRANSITIONS[status]:
+        message = f"Cannot move payment from {current['status']} to {status}"
+    else:
+        message = f"Payment version is {current['version']}, not {expected_version}"
+    return format_response(
+        409,
+        {"error": message, "status": current["status"], "version": current["version"]},
+    )
+
+
+def get_payment(event, user_id):
+    """Retrieve a payment of user_id; other users' payments are not found."""
+    payment_id = get_path_parameters(event).get("payment_id")
+    if not payment_id:
+        return format_response(400, {"error": "Missing payment_id parameter"})
+
+    with metrics.timer("GetItemLatency"):
+        response = payment_table.get_item(Key={"payment_id": payment_id})
+
+    item = response.get("Item")
+    if item is None or item.get("user_id") != user_id:
+        return format_response(404, {"error": f"Payment not found: {payment_id}"})
+    return format_response(200, item)
+
+
+def list_payments(event, user_id):
+    """List the payments of user_id, newest first, one page per request.
+
+    Pages come from a single Query on the user index, so latency does not grow
+    with the number of payments. The next page is requested with the opaque
+    cursor returned in next_cursor.
+    """
+    query = get_query_parameters(event)
+    try:
+        limit = int(query.get("limit", PAGE_SIZE))
+    except ValueError:
+        limit = 0
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return format_response(
+            400, {"error": f"limit must be between 1 and {MAX_PAGE_SIZE}"}
+        )
+
+    try:
+        start_key = decode_cursor(query.get("cursor"), scope=user_id)
+    except InvalidCursor:
+        return format_response(400, {"error": "Invalid cursor"})
+
+    kwargs = {
+        "IndexName": USER_INDEX,
+        "KeyConditionExpression": Key("user_id").eq(user_id),
+        "ScanIndexForward": False,
+        "Limit": limit,
+        "ProjectionExpression": ", ".join(f"#{field}" for field in SUMMARY_FIELDS),
+        "ExpressionAttributeNames": {f"#{field}": field for field in SUMMARY_FIELDS},
+    }
+    if start_key:
+        kwargs["ExclusiveStartKey"] = start_key
+
+    with metrics.timer("QueryLatency"):
+        response = payment_table.query(**kwargs)
+
+    return format_response(
+        200,
+        {
+            "items": response["Items"],
+            "next_cursor": encode_cursor(
+                response.get("LastEvaluatedKey"), scope=user_id
+            ),
+        },
+    )
+
+
+def get_current_timestamp():
+    """Get current timestamp in ISO format."""
+    from datetime import UTC, datetime
+
+    return datetime.now(UTC).isoformat()
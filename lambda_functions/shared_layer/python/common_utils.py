@@ -1,25 +1,353 @@
+import asyncio
+import base64
+import hashlib
+import hmac
 import json
 import logging
+import math
 import os
 import secrets
+import threading
 import time
-from functools import wraps
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import partial, wraps
+
+# Taken before boto3 is imported so its import cost is part of init timings
+_MODULE_IMPORT_STARTED = time.perf_counter()
 
 import boto3
+import botocore
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.endpoint import MAX_POOL_CONNECTIONS
+
+# Per-request read timeouts (used to fit AWS calls to the invocation deadline)
+# are only passed to the HTTP session from this botocore release on
+MIN_BOTOCORE_VERSION = (1, 43, 68)
+
+_BOTOCORE_VERSION = tuple(int(part) for part in botocore.__version__.split(".")[:3])
+if _BOTOCORE_VERSION < MIN_BOTOCORE_VERSION:
+    raise ImportError(
+        "common_utils requires botocore>=%s, found %s"
+        % (".".join(map(str, MIN_BOTOCORE_VERSION)), botocore.__version__)
+    )
 
 # Environment-specific settings
 ENVIRONMENT = os.environ.get("ENVIRONMENT", "dev")
 
+# CloudWatch namespace for metrics published through Embedded Metric Format
+METRICS_NAMESPACE = os.environ.get("METRICS_NAMESPACE", "AWSLambdaDevOps")
+
+# AWS call tracing: fraction of invocations traced, DynamoDB capacity capture
+# and the maximum number of calls kept per invocation
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1"))
+TRACE_CONSUMED_CAPACITY = os.environ.get("TRACE_CONSUMED_CAPACITY", "0") == "1"
+TRACE_MAX_SPANS = int(os.environ.get("TRACE_MAX_SPANS", "50"))
+
+# Invocation deadlines: time reserved to return a response, and the least time
+# an AWS call needs before it is refused instead of started
+DEADLINE_SAFETY_MARGIN_MS = int(os.environ.get("DEADLINE_SAFETY_MARGIN_MS", "300"))
+DEADLINE_MIN_CALL_MS = int(os.environ.get("DEADLINE_MIN_CALL_MS", "100"))
+
+# Idempotency records: lifetime of stored responses and of in-progress locks
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "3600"))
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+# DynamoDB transactions: retries after a conflict with a concurrent
+# transaction, and the base of the jittered backoff between them
+TRANSACTION_RETRIES = int(os.environ.get("TRANSACTION_RETRIES", "3"))
+TRANSACTION_BACKOFF_MS = int(os.environ.get("TRANSACTION_BACKOFF_MS", "25"))
+
+# Total time allowed for priming hooks, keeping init well inside its limit
+PRIMING_BUDGET_SECONDS = float(os.environ.get("PRIMING_BUDGET_SECONDS", "2"))
+
+# Threads running blocking AWS calls for async handlers and fan-out, one per
+# pooled connection of a default botocore client
+AWS_IO_WORKERS = int(os.environ.get("AWS_IO_WORKERS", str(MAX_POOL_CONNECTIONS)))
+
+# SSM parameters loaded ahead of time by preload_ssm_parameters
+_ssm_parameter_cache = {}
+
+
+# AWS call tracing (botocore event hooks)
+class _Trace:
+    """Spans of one invocation, shared with the fan-out threads it starts."""
+
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.spans = []
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+
+class AwsCallTracer:
+    """Record a compact span for every AWS call made through traced clients.
+
+    Hooks are attached by the client factories below. Each span holds the
+    operation, table, attempt count, HTTP status, consumed capacity and wall
+    time; handle_error emits one summary line per invocation and resets.
+    Spans are kept per thread, so invocations running on several threads of
+    one process (local tools, tests) each report only their own calls.
+    """
+
+    def __init__(self, sample_rate=1.0, capture_consumed_capacity=False, max_spans=50):
+        self.sample_rate = sample_rate
+        self.capture_consumed_capacity = capture_consumed_capacity
+        self.max_spans = max_spans
+        self._local = threading.local()
+
+    def _sample(self):
+        if self.sample_rate >= 1:
+            return True
+        return secrets.randbelow(1_000_000) < self.sample_rate * 1_000_000
+
+    def _trace(self):
+        """Return the calling thread's trace, starting a new sample if needed."""
+        trace = getattr(self._local, "trace", None)
+        if trace is None:
+            trace = self._local.trace = _Trace(self._sample())
+        return trace
+
+    def bind(self, func):
+        """Wrap func to record into the calling thread's trace on any thread."""
+        trace = self._trace()
+
+        @wraps(func)
+        def bound(*args, **kwargs):
+            previous = getattr(self._local, "trace", None)
+            self._local.trace = trace
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._local.trace = previous
+
+        return bound
+
+    def attach(self, client):
+        """Register tracing hooks on a boto3 client and return it."""
+        if self.sample_rate <= 0:
+            return client
+
+        events = client.meta.events
+        events.register(
+            "provide-client-params.*.*",
+            self._on_params,
+            unique_id="common_utils.tracer.params",
+        )
+        events.register(
+            "after-call.*.*", self._on_after_call, unique_id="common_utils.tracer.after"
+        )
+        events.register(
+            "after-call-error.*.*",
+            self._on_call_error,
+            unique_id="common_utils.tracer.error",
+        )
+        return client
+
+    def _on_params(self, params, model, context, event_name, **kwargs):
+        if not self._trace().sampled:
+            return None
+
+        context["trace_started"] = time.perf_counter()
+        context["trace_table"] = params.get("TableName")
+
+        # Ask DynamoDB for consumed capacity when the operation supports it
+        if (
+            self.capture_consumed_capacity
+            and event_name.split(".")[1] == "dynamodb"
+            and "ReturnConsumedCapacity" in model.input_shape.members
+            and "ReturnConsumedCapacity" not in params
+        ):
+            return {**params, "ReturnConsumedCapacity": "TOTAL"}
+        return None
+
+    def _add_span(self, event_name, context, **fields):
+        started = context.get("trace_started")
+        if started is None:
+            return
+
+        _, service, operation = event_name.split(".", 2)
+        span = {
+            "op": f"{service}.{operation}",
+            "ms": round((time.perf_counter() - started) * 1000, 3),
+        }
+        if context.get("trace_table"):
+            span["table"] = context["trace_table"]
+        span.update({key: value for key, value in fields.items() if value is not None})
+        trace = self._trace()
+        with trace.lock:
+            if len(trace.spans) >= self.max_spans:
+                trace.dropped += 1
+            else:
+                trace.spans.append(span)
+
+    def _on_after_call(self, http_response, parsed, context, event_name, **kwargs):
+        metadata = parsed.get("ResponseMetadata", {})
+        capacity = parsed.get("ConsumedCapacity")
+        if isinstance(capacity, list):
+            capacity = sum(c.get("CapacityUnits", 0) for c in capacity)
+        elif isinstance(capacity, dict):
+            capacity = capacity.get("CapacityUnits")
+
+        self._add_span(
+            event_name,
+            context,
+            attempts=metadata.get("RetryAttempts", 0) + 1,
+            status=getattr(http_response, "status_code", None),
+            capacity=capacity,
+            error=parsed.get("Error", {}).get("Code"),
+        )
+
+    def _on_call_error(self, exception, context, event_name, **kwargs):
+        self._add_span(event_name, context, error=type(exception).__name__)
+
+    def summary(self):
+        """Return the span summary for the current invocation."""
+        trace = self._trace()
+        with trace.lock:
+            return {
+                "message": "aws_call_summary",
+                "call_count": len(trace.spans) + trace.dropped,
+                "total_ms": round(sum(span["ms"] for span in trace.spans), 3),
+                "dropped": trace.dropped,
+                "calls": list(trace.spans),
+            }
+
+    def flush(self):
+        """Emit the summary if any calls were traced, then start a new sample."""
+        summary = self.summary()
+        self._local.trace = _Trace(self._sample())
+        if summary["call_count"]:
+            emit_structured_log({**summary, "invocation_count": _invocation_count})
+
+
+tracer = AwsCallTracer(
+    sample_rate=TRACE_SAMPLE_RATE,
+    capture_consumed_capacity=TRACE_CONSUMED_CAPACITY,
+    max_spans=TRACE_MAX_SPANS,
+)
+
+
+# Invocation deadlines
+class DeadlineExceeded(Exception):
+    """Raised when an AWS call cannot finish before the invocation deadline."""
+
+
+class Deadline:
+    """Point in time by which an invocation must have produced its response."""
+
+    def __init__(self, remaining_ms, safety_margin_ms=None):
+        if safety_margin_ms is None:
+            safety_margin_ms = DEADLINE_SAFETY_MARGIN_MS
+        self.expires_at = time.monotonic() + (remaining_ms - safety_margin_ms) / 1000
+
+    @classmethod
+    def from_context(cls, context, safety_margin_ms=None):
+        """Build a deadline from a Lambda context, or None if it has no timer."""
+        get_remaining = getattr(context, "get_remaining_time_in_millis", None)
+        if get_remaining is None:
+            return None
+        return cls(get_remaining(), safety_margin_ms)
+
+    def remaining_ms(self):
+        """Milliseconds left before the deadline, never negative."""
+        return max(0.0, (self.expires_at - time.monotonic()) * 1000)
+
+    def check(self, min_ms=None, operation="call"):
+        """Raise DeadlineExceeded if fewer than min_ms milliseconds remain."""
+        if min_ms is None:
+            min_ms = DEADLINE_MIN_CALL_MS
+        remaining = self.remaining_ms()
+        if remaining < min_ms:
+            raise DeadlineExceeded(
+                f"{operation} needs {min_ms} ms but only {remaining:.0f} ms remain"
+            )
+        return remaining
+
+
+# Kept per thread: local tools run several containers on threads of one
+# process, and one invocation must not see or clear another's deadline
+_invocation_state = threading.local()
+
+
+def get_current_deadline():
+    """Return the deadline of the invocation in progress, if any."""
+    return getattr(_invocation_state, "deadline", None)
+
+
+@contextmanager
+def _invocation_deadline(deadline):
+    """Make deadline the current thread's deadline within the block."""
+    previous = get_current_deadline()
+    _invocation_state.deadline = deadline
+    try:
+        yield deadline
+    finally:
+        _invocation_state.deadline = previous
+
+
+def _deadline_suspended():
+    """Let AWS calls run past the invocation deadline.
+
+    For cleanup that must happen even after a DeadlineExceeded, such as
+    releasing a lock; it runs in the time kept back by the safety margin.
+    """
+    return _invocation_deadline(None)
+
+
+def _bind_invocation(func):
+    """Wrap func to run under the calling thread's deadline and trace on any thread."""
+    func = tracer.bind(func)
+    deadline = get_current_deadline()
+    if deadline is None:
+        return func
+
+    @wraps(func)
+    def bound(*args, **kwargs):
+        with _invocation_deadline(deadline):
+            return func(*args, **kwargs)
+
+    return bound
+
+
+def _apply_deadline(request, operation_name, **kwargs):
+    """Refuse or shorten each attempt of an AWS call to fit the deadline."""
+    deadline = get_current_deadline()
+    if deadline is None:
+        return
+
+    remaining = deadline.check(operation=operation_name)
+    context = request.context
+    client_config = context.get("client_config")
+    read_timeout = remaining / 1000
+    if client_config is not None and client_config.read_timeout:
+        read_timeout = min(read_timeout, client_config.read_timeout)
+    # Passed to the HTTP session as this attempt's socket read timeout
+    context["read_timeout"] = read_timeout
+
+
+def _instrument(client):
+    """Attach tracing and deadline hooks to a boto3 client and return it."""
+    tracer.attach(client)
+    client.meta.events.register(
+        "request-created.*.*", _apply_deadline, unique_id="common_utils.deadline"
+    )
+    return client
+
 
 # Standard AWS service clients
 def get_dynamodb_resource(region=None):
     """Return a boto3 DynamoDB resource with the specified region."""
-    return boto3.resource("dynamodb", region_name=region)
+    resource = boto3.resource("dynamodb", region_name=region)
+    _instrument(resource.meta.client)
+    return resource
 
 
 def get_dynamodb_client(region=None):
     """Return a boto3 DynamoDB client with the specified region."""
-    return boto3.client("dynamodb", region_name=region)
+    return _instrument(boto3.client("dynamodb", region_name=region))
 
 
 def get_dynamodb_table(table_name, region=None, env_prefix=None):
@@ -38,28 +366,57 @@ def get_dynamodb_table(table_name, region=None, env_prefix=None):
     return dynamodb.Table(prefixed_table_name)
 
 
+def get_condition_check_item(error):
+    """Return the item sent back with a ConditionalCheckFailedException.
+
+    Writes made with ReturnValuesOnConditionCheckFailure="ALL_OLD" carry the
+    current item in the error, saving a read to explain the failure. Returns
+    None when the item does not exist.
+    """
+    item = error.response.get("Item")
+    if item is None:
+        return None
+    # Error responses are not transformed by the resource layer
+    return deserialize_item(item)
+
+
+def serialize_item(item):
+    """Convert a Python dict to DynamoDB's typed attribute format."""
+    serializer = TypeSerializer()
+    return {key: serializer.serialize(value) for key, value in item.items()}
+
+
+def deserialize_item(item):
+    """Convert a DynamoDB typed attribute map back to Python values."""
+    deserializer = TypeDeserializer()
+    return {key: deserializer.deserialize(value) for key, value in item.items()}
+
+
 def get_iot_client(region=None):
     """Return a boto3 IoT client with the specified region."""
-    return boto3.client("iot", region_name=region)
+    return _instrument(boto3.client("iot", region_name=region))
 
 
 def get_iot_data_client(region=None):
     """Return a boto3 IoT Data client with the specified region."""
-    return boto3.client("iot-data", region_name=region)
+    return _instrument(boto3.client("iot-data", region_name=region))
 
 
 def get_s3_client(region=None):
     """Return a boto3 S3 client with the specified region."""
-    return boto3.client("s3", region_name=region)
+    return _instrument(boto3.client("s3", region_name=region))
 
 
 def get_ssm_client(region=None):
     """Return a boto3 SSM client with the specified region."""
-    return boto3.client("ssm", region_name=region)
+    return _instrument(boto3.client("ssm", region_name=region))
 
 
 def get_ssm_parameter(param_name, with_decryption=True, region=None):
-    """Get a parameter from SSM Parameter Store."""
+    """Get a parameter from SSM Parameter Store, using preloaded values if any."""
+    if param_name in _ssm_parameter_cache:
+        return _ssm_parameter_cache[param_name]
+
     ssm = get_ssm_client(region)
     response = ssm.get_parameter(Name=param_name, WithDecryption=with_decryption)
     return response["Parameter"]["Value"]
@@ -76,7 +433,7 @@ def setup_logger(log_level=None):
         logger.setLevel(logging.INFO)
 
     # Remove existing handlers to avoid duplicates
-    for handler in logger.handlers:
+    for handler in list(logger.handlers):
         logger.removeHandler(handler)
 
     # Create handler with JSON formatting
@@ -92,31 +449,370 @@ def setup_logger(log_level=None):
     return logger
 
 
+# Structured log lines (one JSON object per line, e.g. for CloudWatch Insights)
+def _write_stdout(line):
+    print(line, flush=True)
+
+
+_structured_log_sink = _write_stdout
+
+
+def set_structured_log_sink(sink):
+    """Send structured log lines to sink(line); None restores stdout."""
+    global _structured_log_sink
+    _structured_log_sink = sink or _write_stdout
+
+
+def emit_structured_log(record):
+    """Write a record as a single JSON log line."""
+    _structured_log_sink(json.dumps(record, default=str))
+
+
+# Metrics (CloudWatch Embedded Metric Format)
+class MetricsLogger:
+    """Aggregate metrics during an invocation and flush them as EMF log lines.
+
+    Counters are summed, timers and histograms keep every observed value.
+    Metrics sharing the same dimension values are written as one EMF document,
+    so a handler without per-metric dimensions produces a single log line.
+    """
+
+    # EMF accepts at most 100 values per metric in a single document
+    MAX_VALUES_PER_DOCUMENT = 100
+
+    def __init__(self, namespace=None, default_dimensions=None, sink=None):
+        self.namespace = namespace or METRICS_NAMESPACE
+        self.default_dimensions = dict(default_dimensions or {})
+        self.sink = sink
+        self._metrics = {}
+        # Handlers may record from pool threads while another thread flushes
+        self._lock = threading.Lock()
+
+    def _record(self, name, value, unit, dimensions, aggregate):
+        key = tuple(sorted({**self.default_dimensions, **dimensions}.items()))
+        with self._lock:
+            group = self._metrics.setdefault(key, {})
+            metric = group.setdefault(name, {"unit": unit, "values": []})
+            if aggregate and metric["values"]:
+                metric["values"][0] += value
+            else:
+                metric["values"].append(value)
+
+    def counter(self, name, value=1, **dimensions):
+        """Add value to a counter for this invocation."""
+        self._record(name, value, "Count", dimensions, aggregate=True)
+
+    def histogram(self, name, value, unit="None", **dimensions):
+        """Record one observation of a distribution."""
+        self._record(name, value, unit, dimensions, aggregate=False)
+
+    @contextmanager
+    def timer(self, name, **dimensions):
+        """Time a block and record its duration in milliseconds."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - started_at) * 1000
+            self.histogram(name, round(elapsed, 3), "Milliseconds", **dimensions)
+
+    def _documents(self, pending):
+        timestamp = int(time.time() * 1000)
+        for key, group in pending.items():
+            dimensions = dict(key)
+            longest = max(len(metric["values"]) for metric in group.values())
+            for start in range(0, longest, self.MAX_VALUES_PER_DOCUMENT):
+                chunk = {}
+                end = start + self.MAX_VALUES_PER_DOCUMENT
+                for name, metric in group.items():
+                    values = metric["values"][start:end]
+                    if values:
+                        chunk[name] = (metric["unit"], values)
+
+                document = {
+                    "_aws": {
+                        "Timestamp": timestamp,
+                        "CloudWatchMetrics": [
+                            {
+                                "Namespace": self.namespace,
+                                "Dimensions": [list(dimensions)],
+                                "Metrics": [
+                                    {"Name": name, "Unit": unit}
+                                    for name, (unit, _) in chunk.items()
+                                ],
+                            }
+                        ],
+                    },
+                    **dimensions,
+                }
+                for name, (_, values) in chunk.items():
+                    document[name] = values[0] if len(values) == 1 else values
+                yield document
+
+    def flush(self):
+        """Write all pending metrics and reset for the next invocation."""
+        # Take the pending metrics under the lock, serialise them outside it
+        with self._lock:
+            pending, self._metrics = self._metrics, {}
+        for document in self._documents(pending):
+            if self.sink:
+                self.sink(document)
+            else:
+                emit_structured_log(document)
+
+
+def _default_metric_dimensions():
+    dimensions = {"Environment": ENVIRONMENT}
+    if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        dimensions["FunctionName"] = os.environ["AWS_LAMBDA_FUNCTION_NAME"]
+    return dimensions
+
+
+# Per-container metrics logger, flushed by handle_error after every invocation
+metrics = MetricsLogger(default_dimensions=_default_metric_dimensions())
+
+
 # Response formatting
+DEFAULT_RESPONSE_HEADERS = {
+    "Content-Type": "application/json",
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Credentials": True,
+}
+
+
+def _json_default(value):
+    """Serialize DynamoDB numbers, which the resource API returns as Decimal."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
 def format_response(status_code, body, headers=None):
     """Format a standard API Gateway response."""
     if headers is None:
-        headers = {
-            "Content-Type": "application/json",
-            "Access-Control-Allow-Origin": "*",
-            "Access-Control-Allow-Credentials": True,
-        }
+        headers = dict(DEFAULT_RESPONSE_HEADERS)
+
+    return {
+        "statusCode": status_code,
+        "headers": headers,
+        "body": json.dumps(body, default=_json_default),
+    }
+
+
+# Warm-up handling
+WARMUP_SOURCES = frozenset({"serverless-plugin-warmup", "lambda-warmer"})
+
+_priming_hooks = []
+
+
+def is_warmup_event(event):
+    """Return True for keep-warm pings and scheduled keep-alive events."""
+    if not isinstance(event, dict):
+        return False
+
+    if event.get("warmer") or event.get("warmup"):
+        return True
+
+    source = event.get("source")
+    if source in WARMUP_SOURCES:
+        return True
+
+    # EventBridge schedules hitting an API handler are keep-alive pings
+    return source == "aws.events" and event.get("detail-type") == "Scheduled Event"
+
+
+def register_priming_hook(func=None, *, timeout=None):
+    """Register a callable that warms the container (connections, config).
+
+    Usable as ``@register_priming_hook`` or ``@register_priming_hook(timeout=1)``.
+    ``timeout`` caps this hook in seconds on top of the overall priming budget.
+    """
+    if func is None:
+        return lambda f: register_priming_hook(f, timeout=timeout)
+
+    _priming_hooks.append((func, timeout))
+    return func
+
+
+def _run_with_timeout(func, timeout):
+    """Run func on a daemon thread and wait at most timeout seconds for it."""
+    outcome = {}
+
+    def target():
+        try:
+            func()
+            outcome["status"] = "ok"
+        except Exception as e:
+            outcome["status"] = "error"
+            outcome["error"] = str(e)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    if thread.is_alive():
+        # The thread is abandoned; it cannot hold up the caller any longer
+        return {"status": "timeout"}
+    return outcome
+
+
+def run_priming_hooks(budget=None):
+    """Run registered priming hooks within a total time budget in seconds.
+
+    Hooks never raise: each result is "ok", "error", "timeout" or "skipped"
+    when the budget was spent before the hook could start.
+    """
+    if budget is None:
+        budget = PRIMING_BUDGET_SECONDS
+    deadline = time.monotonic() + budget
+
+    results = {}
+    for hook, timeout in _priming_hooks:
+        name = getattr(hook, "__name__", repr(hook))
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            results[name] = "skipped"
+            continue
+
+        outcome = _run_with_timeout(hook, min(remaining, timeout or remaining))
+        if outcome["status"] != "ok":
+            logging.getLogger().warning(
+                f"Priming hook {name} {outcome['status']}: {outcome.get('error', '')}"
+            )
+        results[name] = outcome["status"]
+    return results
+
+
+def prime_on_init(budget=None):
+    """Run priming hooks during the Lambda init phase, which gets boosted CPU.
+
+    Call this at module level after registering hooks. Outside the Lambda
+    runtime (unit tests, local tools) it does nothing.
+    """
+    if not os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        return {}
+    return run_priming_hooks(budget)
+
+
+def prime_dynamodb_table(table):
+    """Resolve DNS, TLS and credentials for a table with a cheap DescribeTable."""
+    table.meta.client.describe_table(TableName=table.name)
+
+
+def preload_ssm_parameters(param_names, with_decryption=True, region=None):
+    """Fetch SSM parameters in batches and cache them for get_ssm_parameter."""
+    ssm = get_ssm_client(region)
+    names = list(param_names)
+    # GetParameters accepts at most 10 names per call
+    for start in range(0, len(names), 10):
+        end = start + 10
+        response = ssm.get_parameters(
+            Names=names[start:end], WithDecryption=with_decryption
+        )
+        for parameter in response.get("Parameters", []):
+            _ssm_parameter_cache[parameter["Name"]] = parameter["Value"]
+
+
+# Cold-start instrumentation
+_init_phases = {}
+_invocation_count = 0
+_invocation_count_lock = threading.Lock()
+
+
+def record_init_phase(name, started_at):
+    """Record an init phase that began at started_at (a perf_counter value)."""
+    _init_phases[name] = round((time.perf_counter() - started_at) * 1000, 3)
+
+
+@contextmanager
+def init_phase(name):
+    """Time a block of module-level init work as a named phase."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_init_phase(name, started_at)
+
+
+def get_invocation_count():
+    """Return how many invocations this container has handled."""
+    return _invocation_count
+
+
+def _record_invocation(warmup=False):
+    """Count an invocation and emit init timings if it is the cold start."""
+    global _invocation_count
+    with _invocation_count_lock:
+        _invocation_count += 1
+        count = _invocation_count
+    if count != 1:
+        return False
 
-    return {"statusCode": status_code, "headers": headers, "body": json.dumps(body)}
+    time_to_first_invocation = round(
+        (time.perf_counter() - _MODULE_IMPORT_STARTED) * 1000, 3
+    )
+    emit_structured_log(
+        {
+            "message": "cold_start",
+            "environment": ENVIRONMENT,
+            "cold_start": True,
+            "warmup": warmup,
+            "invocation_count": count,
+            "init_type": os.environ.get("AWS_LAMBDA_INITIALIZATION_TYPE", "on-demand"),
+            "function_version": os.environ.get("AWS_LAMBDA_FUNCTION_VERSION"),
+            "init_phases_ms": dict(_init_phases),
+            "time_to_first_invocation_ms": time_to_first_invocation,
+        }
+    )
+    metrics.counter("ColdStart")
+    metrics.histogram("TimeToFirstInvocation", time_to_first_invocation, "Milliseconds")
+    return True
 
 
 # Error handling decorator
-def handle_error(func):
-    """Decorator for handling errors in Lambda functions."""
+def handle_error(func=None, *, prime_on_warmup=False):
+    """Decorator for handling errors in Lambda functions.
+
+    Warm-up pings are answered immediately without invoking the handler. With
+    ``prime_on_warmup=True`` the registered priming hooks run first. Metrics
+    and AWS call spans recorded during the invocation are flushed when it ends.
+
+    AWS calls made through the shared client factories are bounded by the
+    time left in the invocation; calls that cannot finish raise
+    DeadlineExceeded, which is returned as a 503 instead of a Lambda timeout.
+    """
+    if func is None:
+        return lambda f: handle_error(f, prime_on_warmup=prime_on_warmup)
 
     @wraps(func)
     def wrapper(event, context):
-        logger = setup_logger()
+        warmup = is_warmup_event(event)
+        _record_invocation(warmup)
+
         try:
-            return func(event, context)
-        except Exception as e:
-            logger.exception(f"Error in {func.__name__}: {str(e)}")
-            return format_response(500, {"error": str(e)})
+            if warmup:
+                if prime_on_warmup:
+                    return {"warmup": True, "primed": run_priming_hooks()}
+                return {"warmup": True}
+
+            logger = setup_logger()
+            with _invocation_deadline(Deadline.from_context(context)):
+                try:
+                    return func(event, context)
+                except DeadlineExceeded as e:
+                    metrics.counter("DeadlineExceeded")
+                    logger.warning(f"Deadline exceeded in {func.__name__}: {str(e)}")
+                    return format_response(
+                        503,
+                        {"error": "Service temporarily unavailable, please retry"},
+                        {**DEFAULT_RESPONSE_HEADERS, "Retry-After": "1"},
+                    )
+                except Exception as e:
+                    metrics.counter("HandlerErrors")
+                    logger.exception(f"Error in {func.__name__}: {str(e)}")
+                    return format_response(500, {"error": str(e)})
+        finally:
+            metrics.flush()
+            tracer.flush()
 
     return wrapper
 
@@ -154,11 +850,20 @@ def extract_body(event):
 def get_user_id_from_event(event):
     """Extract user ID from an API Gateway event with JWT authorizer."""
     if "requestContext" in event and "authorizer" in event["requestContext"]:
-        claims = event["requestContext"]["authorizer"].get("claims", {})
+        authorizer = event["requestContext"]["authorizer"]
+        # REST APIs put claims on the authorizer, HTTP APIs under "jwt"
+        claims = authorizer.get("claims") or authorizer.get("jwt", {}).get("claims", {})
         return claims.get("sub") or claims.get("cognito:username")
     return None
 
 
+def get_http_method(event):
+    """Return the HTTP method of a payload format 1.0 or 2.0 event."""
+    request_context = event.get("requestContext") or {}
+    method = event.get("httpMethod") or request_context.get("http", {}).get("method")
+    return method.upper() if method else None
+
+
 def get_path_parameters(event):
     """Extract path parameters from an API Gateway event."""
     return event.get("pathParameters", {}) or {}
@@ -167,3 +872,722 @@ def get_path_parameters(event):
 def get_query_parameters(event):
     """Extract query string parameters from an API Gateway event."""
     return event.get("queryStringParameters", {}) or {}
+
+
+def get_header(event, name):
+    """Return a request header value, matching the name case-insensitively."""
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+# Pagination cursors
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor is malformed or was not issued to us."""
+
+
+_cursor_keys = []
+
+
+def _cursor_key():
+    """Return the cursor signing key from CURSOR_SECRET or its SSM parameter."""
+    if not _cursor_keys:
+        secret = os.environ.get("CURSOR_SECRET")
+        parameter = os.environ.get("CURSOR_SECRET_PARAMETER")
+        if not secret and parameter:
+            secret = get_ssm_parameter(parameter)
+        if not secret:
+            # A per-container key would reject every cursor that reaches
+            # another container, so there is no fallback
+            raise RuntimeError(
+                "CURSOR_SECRET or CURSOR_SECRET_PARAMETER must be set to sign cursors"
+            )
+        _cursor_keys.append(secret.encode("utf-8"))
+    return _cursor_keys[0]
+
+
+def load_cursor_key():
+    """Load the cursor signing key during the Lambda init phase.
+
+    A missing or unreadable key then fails the cold start rather than the
+    first listing request. Outside the Lambda runtime (unit tests, local
+    tools) it does nothing and the key is loaded on first use.
+    """
+    if os.environ.get("AWS_LAMBDA_FUNCTION_NAME"):
+        _cursor_key()
+
+
+def _sign_cursor(payload, scope):
+    message = scope.encode("utf-8") + b"\0" + payload
+    return hmac.new(_cursor_key(), message, hashlib.sha256).digest()[:16]
+
+
+def encode_cursor(last_evaluated_key, scope=""):
+    """Wrap a DynamoDB LastEvaluatedKey in an opaque, signed cursor.
+
+    The signature covers scope (such as the caller's user id), so a cursor is
+    only accepted for the scope it was issued to. Returns None when there is
+    no next page.
+    """
+    if not last_evaluated_key:
+        return None
+    payload = json.dumps(
+        serialize_item(last_evaluated_key),
+        sort_keys=True,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    signature = _sign_cursor(payload, scope)
+    return ".".join(
+        base64.urlsafe_b64encode(part).rstrip(b"=").decode("ascii")
+        for part in (payload, signature)
+    )
+
+
+def decode_cursor(cursor, scope=""):
+    """Return the ExclusiveStartKey wrapped by encode_cursor, or None if empty.
+
+    Raises InvalidCursor for cursors that were altered or issued to another
+    scope.
+    """
+    if not cursor:
+        return None
+    try:
+        payload, signature = (
+            base64.urlsafe_b64decode(part + "=" * (-len(part) % 4))
+            for part in cursor.split(".")
+        )
+    except ValueError as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not hmac.compare_digest(signature, _sign_cursor(payload, scope)):
+        raise InvalidCursor("Cursor signature does not match")
+
+    return deserialize_item(json.loads(payload))
+
+
+# Idempotency for write handlers
+class _ResponseCache:
+    """Small in-container LRU of responses with per-entry expiry."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at < time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def put(self, key, response, expires_at):
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+def get_idempotency_key(event, header="Idempotency-Key", key_from_payload=False):
+    """Derive an idempotency key from a header, or None without one.
+
+    With key_from_payload a request without the header is keyed by a hash of
+    its payload instead. Only use that where two identical requests really
+    are the same request: a repeated heartbeat or payment is not. The key is
+    scoped to the method, path and caller so the same value sent to a
+    different route or by another user is not treated as a duplicate.
+    """
+    value = get_header(event, header)
+    if value is None:
+        if not key_from_payload:
+            return None
+        body = extract_body(event)
+        value = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str)
+
+    path = event.get("path") or event.get("rawPath")
+    scope = f"{get_http_method(event)}|{path}|{get_user_id_from_event(event)}|{value}"
+    return hashlib.sha256(scope.encode("utf-8")).hexdigest()
+
+
+def idempotent(
+    func=None,
+    *,
+    table_name=None,
+    header="Idempotency-Key",
+    ttl_seconds=None,
+    lock_seconds=None,
+    cache_size=256,
+    key_from_payload=False,
+):
+    """Decorator returning the stored response for repeated requests.
+
+    Results are stored in a DynamoDB table keyed by ``id`` with an
+    ``expiration`` TTL attribute, fronted by an in-container LRU. A request
+    first takes an in-progress lock with a conditional put, so concurrent
+    duplicates get a 409 instead of running twice. The table comes from
+    ``table_name`` or the IDEMPOTENCY_TABLE environment variable; without
+    either the decorator is a pass-through, as it is for requests without
+    the ``header`` unless ``key_from_payload`` is set.
+    """
+    if func is None:
+        return lambda f: idempotent(
+            f,
+            table_name=table_name,
+            header=header,
+            ttl_seconds=ttl_seconds,
+            lock_seconds=lock_seconds,
+            cache_size=cache_size,
+            key_from_payload=key_from_payload,
+        )
+
+    cache = _ResponseCache(cache_size)
+    tables = {}
+
+    @wraps(func)
+    def wrapper(event, *args, **kwargs):
+        name = table_name or os.environ.get("IDEMPOTENCY_TABLE")
+        key = name and get_idempotency_key(event, header, key_from_payload)
+        if not key:
+            return func(event, *args, **kwargs)
+        if name not in tables:
+            tables[name] = get_dynamodb_table(name)
+        table = tables[name]
+
+        cached = cache.get(key)
+        if cached is not None:
+            metrics.counter("IdempotentReplays")
+            return json.loads(cached)
+
+        now = int(time.time())
+        ttl = ttl_seconds or IDEMPOTENCY_TTL_SECONDS
+        try:
+            table.put_item(
+                Item={
+                    "id": key,
+                    "status": "INPROGRESS",
+                    "expiration": now + ttl,
+                    "lock_expiration": now + (lock_seconds or IDEMPOTENCY_LOCK_SECONDS),
+                },
+                ConditionExpression=(
+                    "attribute_not_exists(id) OR expiration < :now OR "
+                    "(#status = :in_progress AND lock_expiration < :now)"
+                ),
+                ExpressionAttributeNames={"#status": "status"},
+                ExpressionAttributeValues={":now": now, ":in_progress": "INPROGRESS"},
+                ReturnValuesOnConditionCheckFailure="ALL_OLD",
+            )
+        except table.meta.client.exceptions.ConditionalCheckFailedException as e:
+            existing = get_condition_check_item(e)
+            if existing is None:
+                existing = table.get_item(Key={"id": key}, ConsistentRead=True).get(
+                    "Item", {}
+                )
+            if existing.get("status") == "COMPLETED":
+                cache.put(key, existing["response"], int(existing["expiration"]))
+                metrics.counter("IdempotentReplays")
+                return json.loads(existing["response"])
+            return format_response(
+                409,
+                {"error": "A request with the same idempotency key is in progress"},
+                {**DEFAULT_RESPONSE_HEADERS, "Retry-After": "1"},
+            )
+
+        try:
+            response = func(event, *args, **kwargs)
+        except Exception:
+            # Also after a DeadlineExceeded, or the retry would get a 409
+            with _deadline_suspended():
+                table.delete_item(Key={"id": key})
+            raise
+
+        # Server errors are transient: release the lock so a retry runs again
+        if isinstance(response, dict) and response.get("statusCode", 200) >= 500:
+            with _deadline_suspended():
+                table.delete_item(Key={"id": key})
+            return response
+
+        serialized = json.dumps(response, default=str)
+        table.put_item(Item=_completed_idempotency_record(key, serialized, now + ttl))
+        cache.put(key, serialized, now + ttl)
+        return response
+
+    return wrapper
+
+
+def _completed_idempotency_record(key, serialized_response, expiration):
+    return {
+        "id": key,
+        "status": "COMPLETED",
+        "expiration": expiration,
+        "response": serialized_response,
+    }
+
+
+# DynamoDB transactions
+MAX_TRANSACTION_ITEMS = 100
+
+# Idempotency tables used by transactions, kept for the container's lifetime
+_idempotency_tables = {}
+
+
+class TransactionCancelled(Exception):
+    """Raised when DynamoDB cancels a transaction.
+
+    ``reasons`` maps the name of each operation that caused the cancellation
+    to its cancellation code (e.g. ``ConditionalCheckFailed``). ``items``
+    holds, for operations added with ``return_on_failure=True``, the current
+    item DynamoDB sent back (absent when the item does not exist).
+    """
+
+    def __init__(self, reasons, items=None):
+        super().__init__(
+            "Transaction cancelled: "
+            + ", ".join(f"{name}={code}" for name, code in reasons.items())
+        )
+        self.reasons = reasons
+        self.items = items or {}
+
+
+class Transaction:
+    """Build and run one TransactWriteItems call from Python values.
+
+    Each operation takes a boto3 Table, plain Python keys, items and
+    expression values, and an optional name under which a cancellation is
+    reported. Cancellations caused only by conflicts with concurrent
+    transactions are retried with jittered backoff; any other cancellation
+    raises TransactionCancelled without a retry.
+    """
+
+    def __init__(self):
+        self._operations = []
+        self._client = None
+
+    def __len__(self):
+        return len(self._operations)
+
+    def _add(
+        self,
+        kind,
+        table,
+        request,
+        condition=None,
+        names=None,
+        values=None,
+        name=None,
+        return_on_failure=False,
+    ):
+        request["TableName"] = table.name
+        if condition:
+            request["ConditionExpression"] = condition
+        if names:
+            request["ExpressionAttributeNames"] = names
+        if values:
+            request["ExpressionAttributeValues"] = values
+        if return_on_failure:
+            request["ReturnValuesOnConditionCheckFailure"] = "ALL_OLD"
+        # The resource client serializes Python values in requests, so all
+        # tables of a transaction share the first table's client
+        if self._client is None:
+            self._client = table.meta.client
+        name = len(self._operations) if name is None else name
+        self._operations.append((name, {kind: request}))
+        return self
+
+    def put(self, table, item, condition=None, **kwargs):
+        """Add a Put of item, optionally guarded by a condition."""
+        return self._add("Put", table, {"Item": item}, condition, **kwargs)
+
+    def update(self, table, key, update, condition=None, **kwargs):
+        """Add an UpdateItem applying the update expression to key."""
+        request = {"Key": key, "UpdateExpression": update}
+        return self._add("Update", table, request, condition, **kwargs)
+
+    def delete(self, table, key, condition=None, **kwargs):
+        """Add a DeleteItem of key, optionally guarded by a condition."""
+        return self._add("Delete", table, {"Key": key}, condition, **kwargs)
+
+    def condition_check(self, table, key, condition, **kwargs):
+        """Require condition to hold for key without writing it."""
+        return self._add("ConditionCheck", table, {"Key": key}, condition, **kwargs)
+
+    def put_idempotency_record(
+        self,
+        event,
+        response,
+        table_name=None,
+        header="Idempotency-Key",
+        ttl_seconds=None,
+    ):
+        """Store response for event's idempotency key as part of the transaction.
+
+        Uses the record format of the idempotent decorator. The put fails as
+        ``idempotency`` when a live record exists, with that record in
+        ``TransactionCancelled.items``. Does nothing when no idempotency
+        table is configured or the request has no ``header``: the key is
+        never derived from the payload, since two identical payments are
+        still two payments.
+        """
+        name = table_name or os.environ.get("IDEMPOTENCY_TABLE")
+        key = name and get_idempotency_key(event, header)
+        if not key:
+            return self
+        now = int(time.time())
+        record = _completed_idempotency_record(
+            key,
+            json.dumps(response, default=str),
+            now + (ttl_seconds or IDEMPOTENCY_TTL_SECONDS),
+        )
+        if name not in _idempotency_tables:
+            _idempotency_tables[name] = get_dynamodb_table(name)
+        return self.put(
+            _idempotency_tables[name],
+            record,
+            condition="attribute_not_exists(id) OR expiration < :now",
+            values={":now": now},
+            name="idempotency",
+            return_on_failure=True,
+        )
+
+    def _cancellation(self, error):
+        """Map the cancellation reasons of error back to operation names."""
+        reasons, items = {}, {}
+        cancellation_reasons = error.response.get("CancellationReasons", [])
+        for (name, _), reason in zip(self._operations, cancellation_reasons):
+            if reason.get("Code", "None") == "None":
+                continue
+            reasons[name] = reason["Code"]
+            if "Item" in reason:
+                items[name] = deserialize_item(reason["Item"])
+        return TransactionCancelled(reasons, items)
+
+    def write(self, retries=None):
+        """Run the transaction as a single atomic call."""
+        if not self._operations:
+            return
+        if len(self._operations) > MAX_TRANSACTION_ITEMS:
+            raise ValueError(
+                f"A transaction holds at most {MAX_TRANSACTION_ITEMS} operations"
+            )
+
+        retries = TRANSACTION_RETRIES if retries is None else retries
+        request = [operation for _, operation in self._operations]
+        for attempt in range(retries + 1):
+            try:
+                self._client.transact_write_items(TransactItems=request)
+                return
+            except self._client.exceptions.TransactionCanceledException as e:
+                cancelled = self._cancellation(e)
+                conflict_only = cancelled.reasons and all(
+                    code == "TransactionConflict" for code in cancelled.reasons.values()
+                )
+                if not conflict_only or attempt == retries:
+                    raise cancelled from e
+
+            metrics.counter("TransactionConflicts")
+            # Full jitter keeps competing writers from retrying in lockstep
+            backoff_ms = secrets.randbelow(TRANSACTION_BACKOFF_MS * 2**attempt + 1)
+            deadline = get_current_deadline()
+            if deadline and deadline.remaining_ms() < backoff_ms + DEADLINE_MIN_CALL_MS:
+                raise cancelled
+            time.sleep(backoff_ms / 1000)
+
+
+# Rate limiting
+class TokenBucket:
+    """In-container token bucket refilled at rate tokens per second."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def take(self):
+        """Take a token; return 0 if allowed, else seconds until one is free."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """Per-key rate limiter with an optional cross-container DynamoDB check.
+
+    The local token bucket rejects floods without any network call. Requests
+    it lets through are then counted in a DynamoDB table (key ``id``, TTL
+    attribute ``expiration``) with an atomic conditional ADD, allowing at most
+    ``burst`` requests per key in each window of ``burst / rate`` seconds.
+    """
+
+    def __init__(self, rate, burst=None, table_name=None, max_keys=1024):
+        self.rate = rate
+        self.burst = burst or max(1, math.ceil(rate))
+        self.window_seconds = max(1, math.ceil(self.burst / rate))
+        self.table = get_dynamodb_table(table_name) if table_name else None
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+
+    def _local_check(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(key)
+        return bucket.take()
+
+    def _shared_check(self, key):
+        now = time.time()
+        window = int(now // self.window_seconds)
+        window_end = (window + 1) * self.window_seconds
+        try:
+            self.table.update_item(
+                Key={"id": f"{key}#{window}"},
+                UpdateExpression=(
+                    "ADD request_count :one "
+                    "SET expiration = if_not_exists(expiration, :expiration)"
+                ),
+                ConditionExpression=(
+                    "attribute_not_exists(request_count) OR request_count < :limit"
+                ),
+                ExpressionAttributeValues={
+                    ":one": 1,
+                    ":limit": self.burst,
+                    ":expiration": int(window_end) + 60,
+                },
+            )
+        except self.table.meta.client.exceptions.ConditionalCheckFailedException:
+            return window_end - now
+        return 0
+
+    def check(self, key):
+        """Return 0 if the request may proceed, else seconds to wait."""
+        retry_after = self._local_check(key)
+        if retry_after or self.table is None:
+            return retry_after
+        return self._shared_check(key)
+
+
+def get_device_or_caller_id(event):
+    """Rate-limit key: the device id, else the caller, else the source IP."""
+    device_id = get_path_parameters(event).get("device_id")
+    if not device_id:
+        try:
+            body = extract_body(event)
+        except ValueError:
+            body = None
+        if isinstance(body, dict):
+            device_id = body.get("device_id")
+    if device_id:
+        return f"device:{device_id}"
+
+    user_id = get_user_id_from_event(event)
+    if user_id:
+        return f"user:{user_id}"
+
+    request_context = event.get("requestContext") or {}
+    source_ip = request_context.get("identity", {}).get("sourceIp") or (
+        request_context.get("http", {}).get("sourceIp")
+    )
+    return f"ip:{source_ip}" if source_ip else None
+
+
+def rate_limit(func=None, *, key_func=None, rate=None, burst=None, table_name=None):
+    """Decorator answering 429 with Retry-After once a key exceeds its rate.
+
+    Settings default to RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST and
+    RATE_LIMIT_TABLE, read on the first request. Without a rate the decorator
+    is a pass-through; without a table only the local bucket applies.
+    """
+    if func is None:
+        return lambda f: rate_limit(
+            f, key_func=key_func, rate=rate, burst=burst, table_name=table_name
+        )
+
+    limiters = []
+
+    def get_limiter():
+        if not limiters:
+            limit = rate or float(os.environ.get("RATE_LIMIT_PER_SECOND", "0"))
+            limiters.append(
+                RateLimiter(
+                    limit,
+                    burst or int(os.environ.get("RATE_LIMIT_BURST", "0")) or None,
+                    table_name or os.environ.get("RATE_LIMIT_TABLE"),
+                )
+                if limit > 0
+                else None
+            )
+        return limiters[0]
+
+    @wraps(func)
+    def wrapper(event, *args, **kwargs):
+        limiter = get_limiter()
+        key = (key_func or get_device_or_caller_id)(event) if limiter else None
+        if key is not None:
+            retry_after = limiter.check(key)
+            if retry_after:
+                metrics.counter("RateLimited")
+                return format_response(
+                    429,
+                    {"error": "Too many requests"},
+                    {
+                        **DEFAULT_RESPONSE_HEADERS,
+                        "Retry-After": str(max(1, math.ceil(retry_after))),
+                    },
+                )
+        return func(event, *args, **kwargs)
+
+    return wrapper
+
+
+# Async handlers
+_executor = None
+_executor_lock = threading.Lock()
+# One event loop per thread: run_until_complete cannot be re-entered, and a
+# local server or test may invoke handlers from several threads at once
+_event_loops = threading.local()
+
+
+def get_executor():
+    """Return the container-lifetime thread pool for blocking AWS calls."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=AWS_IO_WORKERS, thread_name_prefix="aws-io"
+                )
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call, such as a boto3 operation, on the shared executor."""
+    loop = asyncio.get_running_loop()
+    call = _bind_invocation(partial(func, *args, **kwargs))
+    return await loop.run_in_executor(get_executor(), call)
+
+
+class AsyncClient:
+    """Awaitable view of a boto3 client or DynamoDB Table.
+
+    Method calls run on the shared executor, so independent calls awaited
+    with asyncio.gather overlap instead of running one after another:
+
+        table = AsyncClient(get_dynamodb_table("devices"))
+        status, history = await asyncio.gather(
+            table.get_item(Key=key), history_table.query(...)
+        )
+    """
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            return await run_blocking(attr, *args, **kwargs)
+
+        call.__name__ = name
+        return call
+
+
+def get_event_loop():
+    """Return the calling thread's event loop, created on first use."""
+    loop = getattr(_event_loops, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = _event_loops.loop = asyncio.new_event_loop()
+    return loop
+
+
+def async_handler(func):
+    """Run an ``async def`` handler on the calling thread's event loop.
+
+    The loop is reused by warm invocations on the same thread. Apply it beneath handle_error and
+    the other decorators, which stay synchronous.
+    """
+
+    @wraps(func)
+    def wrapper(event, context):
+        return get_event_loop().run_until_complete(func(event, context))
+
+    return wrapper
+
+
+# Concurrent fan-out
+def fan_out_map(func, items, *, return_exceptions=True, timeout=None):
+    """Call func on every item concurrently on the shared executor.
+
+    Results keep the order of items. A failed item's slot holds its exception,
+    or the first one is raised when return_exceptions is False. Items still
+    running when the invocation deadline (or timeout seconds) passes hold
+    DeadlineExceeded and are cancelled if not yet started.
+    """
+    items = list(items)
+    deadline = get_current_deadline()
+    if deadline is not None:
+        remaining = deadline.remaining_ms() / 1000
+        timeout = remaining if timeout is None else min(timeout, remaining)
+
+    if threading.current_thread().name.startswith("aws-io"):
+        # Already on a pool thread: waiting on the pool could deadlock it
+        futures = [_run_inline(func, item) for item in items]
+    else:
+        executor = get_executor()
+        call = _bind_invocation(func)
+        futures = [executor.submit(call, item) for item in items]
+        wait(futures, timeout=timeout)
+
+    results = []
+    for future in futures:
+        if future.done() and not future.cancelled():
+            error = future.exception()
+            results.append(future.result() if error is None else error)
+        else:
+            future.cancel()
+            name = getattr(func, "__name__", "call")
+            results.append(
+                DeadlineExceeded(f"{name} did not finish before the deadline")
+            )
+
+    if not return_exceptions:
+        for result in results:
+            if isinstance(result, Exception):
+                raise result
+    return results
+
+
+def fan_out_gather(*calls, return_exceptions=True, timeout=None):
+    """Run zero-argument callables concurrently, as fan_out_map does.
+
+    status, history = fan_out_gather(
+        partial(devices.get_item, Key=key),
+        partial(history.query, KeyConditionExpression=condition),
+    )
+    """
+    return fan_out_map(
+        lambda call: call(), calls, return_exceptions=return_exceptions, timeout=timeout
+    )
+
+
+def _run_inline(func, item):
+    """Run func now and return a completed future holding its outcome."""
+    future = Future()
+    try:
+        future.set_result(func(item))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+record_init_phase("import_common_utils", _MODULE_IMPORT_STARTED)
@@ -0,0 +1,432 @@
+#!/usr/bin/env python
+"""
+Shared layer builder.
+Installs the shared layer's pinned requirements for the Lambda runtime,
+strips what is never imported there (tests, stale bytecode, dist-info
+bloat, botocore models of unused services), precompiles the rest for the
+target interpreter and zips it reproducibly next to the function packages.
+Prints a size and import-time report.
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import build_packages
+import lambda_local
+
+LAYER_NAME = "shared_layer"
+REQUIREMENTS_FILE = lambda_local.SHARED_LAYER_PYTHON_DIR / "requirements.txt"
+STAGING_DIR = lambda_local.PROJECT_ROOT / "build" / "layers" / LAYER_NAME
+
+TARGET_PYTHON_VERSION = "3.11"
+TARGET_PLATFORMS = {
+    "x86_64": "manylinux2014_x86_64",
+    "arm64": "manylinux2014_aarch64",
+}
+
+# Where Lambda extracts layers; compiled code objects record paths under it
+LAYER_MOUNT = "/opt/python"
+
+# Directories that only matter when developing or testing a package
+STRIP_DIRS = ("tests", "test")
+
+# dist-info files nothing reads at runtime; METADATA and licenses are kept
+# so importlib.metadata lookups and license notices still work
+DIST_INFO_BLOAT = ("RECORD", "INSTALLER", "REQUESTED", "direct_url.json", "WHEEL")
+
+# botocore/boto3 data kept regardless of what the sources reference
+ALWAYS_KEEP_SERVICES = frozenset({"sts"})
+
+# Matches boto3.client("iot-data") and boto3.resource("dynamodb")
+SERVICE_PATTERN = re.compile(r"""boto3\.(?:client|resource)\(\s*["']([\w-]+)["']""")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Build a slim, precompiled shared layer zip"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=str(build_packages.DEFAULT_OUTPUT_DIR),
+        help="Directory for the zip and the manifest (default: build/packages)",
+    )
+    parser.add_argument(
+        "--architecture",
+        choices=sorted(TARGET_PLATFORMS),
+        default="x86_64",
+        help="Lambda architecture to install wheels for (default: x86_64)",
+    )
+    parser.add_argument(
+        "--python",
+        help=f"Python {TARGET_PYTHON_VERSION} interpreter used to precompile "
+        "and time imports (default: python3.11 on PATH, or this interpreter)",
+    )
+    parser.add_argument(
+        "--keep-service",
+        action="append",
+        default=[],
+        help="Keep this botocore service model even if no source uses it (repeatable)",
+    )
+    parser.add_argument(
+        "--no-install",
+        action="store_true",
+        help="Package only the layer sources, without requirements",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Rebuild even when the cache is current"
+    )
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    return parser.parse_args()
+
+
+def find_target_python(python=None):
+    """Return an interpreter matching the target version, or None."""
+    candidates = [python] if python else [f"python{TARGET_PYTHON_VERSION}"]
+    for candidate in candidates:
+        path = shutil.which(candidate)
+        if path:
+            return path
+    if not python and sys.version.startswith(TARGET_PYTHON_VERSION + "."):
+        return sys.executable
+    return None
+
+
+def unpinned_requirements(requirements_file):
+    """Return requirement lines that do not pin an exact version."""
+    unpinned = []
+    for line in Path(requirements_file).read_text().splitlines():
+        requirement = line.split("#", 1)[0].strip()
+        if requirement and not requirement.startswith("-") and "==" not in requirement:
+            unpinned.append(requirement)
+    return unpinned
+
+
+def used_services(source_dirs):
+    """Return the AWS services the given sources create clients for."""
+    services = set(ALWAYS_KEEP_SERVICES)
+    for source_dir in source_dirs:
+        for path in Path(source_dir).rglob("*.py"):
+            services.update(SERVICE_PATTERN.findall(path.read_text()))
+    return services
+
+
+def install_requirements(requirements_file, target, architecture):
+    """Install requirements as Linux wheels for the target runtime."""
+    subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "--quiet",
+            "--no-compile",
+            "--only-binary=:all:",
+            "--implementation=cp",
+            f"--python-version={TARGET_PYTHON_VERSION}",
+            f"--platform={TARGET_PLATFORMS[architecture]}",
+            f"--target={target}",
+            "-r",
+            str(requirements_file),
+        ],
+        check=True,
+    )
+
+
+def tree_size(path):
+    """Total size in bytes of the files under path."""
+    path = Path(path)
+    if path.is_file():
+        return path.stat().st_size
+    return sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+
+
+def _remove(path, removed, category):
+    removed[category] = removed.get(category, 0) + tree_size(path)
+    if path.is_dir():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+def strip_layer(site_dir, services, python_tag="cpython-311"):
+    """Delete files the runtime never needs and return bytes removed per kind."""
+    site_dir = Path(site_dir)
+    removed = {}
+
+    for path in sorted(site_dir.rglob("*"), reverse=True):
+        if not path.exists():
+            continue
+        if path.is_dir() and path.name in STRIP_DIRS:
+            _remove(path, removed, "tests")
+        elif path.is_dir() and path.name == "__pycache__":
+            stale = [f for f in path.iterdir() if f".{python_tag}." not in f.name]
+            for pyc in stale:
+                _remove(pyc, removed, "stale_bytecode")
+        elif path.parent.name.endswith(".dist-info") and path.name in DIST_INFO_BLOAT:
+            _remove(path, removed, "dist_info")
+
+    bin_dir = site_dir / "bin"
+    if bin_dir.is_dir():
+        _remove(bin_dir, removed, "scripts")
+
+    # Service models of botocore and resource models of boto3, one directory
+    # (or file for boto3) per service
+    for data_dir in (site_dir / "botocore" / "data", site_dir / "boto3" / "data"):
+        if not data_dir.is_dir():
+            continue
+        for entry in data_dir.iterdir():
+            service = entry.name if entry.is_dir() else None
+            if service and service not in services:
+                _remove(entry, removed, "service_models")
+    return removed
+
+
+def precompile(site_dir, python):
+    """Compile every module to unchecked-hash bytecode for python.
+
+    Lambda extracts layers read-only and the deterministic zip resets every
+    mtime, so timestamp-based .pyc files would be rejected and recompiled
+    on each cold start. Unchecked-hash .pyc files are used as they are.
+    """
+    subprocess.run(
+        [
+            python,
+            "-m",
+            "compileall",
+            "-q",
+            "-j",
+            "0",
+            "--invalidation-mode",
+            "unchecked-hash",
+            "-s",
+            str(site_dir),
+            "-p",
+            LAYER_MOUNT,
+            str(site_dir),
+        ],
+        check=True,
+    )
+
+
+def parse_importtime(stderr, module, count=10):
+    """Summarise -X importtime output for one top-level import.
+
+    Returns {"total_us": cumulative time of module, "slowest": [(name, self
+    microseconds), ...]} over the modules it imported, or None if module
+    does not appear at top level.
+    """
+    subtree = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)", line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        if indent:
+            subtree.append((name, int(self_us)))
+        elif name == module:
+            subtree.append((name, int(self_us)))
+            slowest = sorted(subtree, key=lambda item: item[1], reverse=True)
+            return {"total_us": int(cumulative_us), "slowest": slowest[:count]}
+        else:
+            # A finished top-level import (e.g. site) owns the lines so far
+            subtree = []
+    return None
+
+
+def measure_import(python, site_dir, module="common_utils", bytecode=True):
+    """Time importing module from the layer (see parse_importtime).
+
+    With bytecode=False the precompiled files are ignored, as for a layer
+    built without this step.
+    """
+    env = {
+        **os.environ,
+        "PYTHONPATH": str(site_dir),
+        "AWS_DEFAULT_REGION": os.environ.get("AWS_DEFAULT_REGION", "us-east-1"),
+    }
+    with tempfile.TemporaryDirectory() as empty_cache:
+        if not bytecode:
+            env["PYTHONPYCACHEPREFIX"] = empty_cache
+        result = subprocess.run(
+            [python, "-B", "-X", "importtime", "-c", f"import {module}"],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    return parse_importtime(result.stderr, module)
+
+
+def largest_packages(site_dir, count=10):
+    """Return the count largest top-level entries as (name, bytes)."""
+    sizes = [(entry.name, tree_size(entry)) for entry in Path(site_dir).iterdir()]
+    return sorted(sizes, key=lambda item: item[1], reverse=True)[:count]
+
+
+def build_layer(
+    output_dir=build_packages.DEFAULT_OUTPUT_DIR,
+    requirements_file=REQUIREMENTS_FILE,
+    staging_dir=STAGING_DIR,
+    architecture="x86_64",
+    python=None,
+    keep_services=(),
+    install=True,
+    force=False,
+):
+    """Build the layer zip and return (manifest entry, report).
+
+    The zip is reused when the layer sources, requirements and options are
+    unchanged since the last build.
+    """
+    output_dir = Path(output_dir)
+    staging_dir = Path(staging_dir)
+    site_dir = staging_dir / "python"
+    sources = build_packages.collect_files(lambda_local.SHARED_LAYER_PYTHON_DIR)
+    services = used_services([lambda_local.LAMBDA_DIR]) | set(keep_services)
+    python = find_target_python(python)
+
+    options = json.dumps(
+        {
+            "architecture": architecture,
+            "install": install,
+            "precompile": bool(python),
+            "requirements": Path(requirements_file).read_text() if install else "",
+            "services": sorted(services),
+        },
+        sort_keys=True,
+    )
+    digest = build_packages.content_hash(sources, salt=options)
+    manifest = build_packages.load_manifest(output_dir)
+    layers = manifest.setdefault("layers", {})
+    if not force and build_packages.is_current(
+        layers.get(LAYER_NAME), digest, output_dir
+    ):
+        return layers[LAYER_NAME], {"status": "cached"}
+
+    report = {"status": "built", "warnings": []}
+    if python is None:
+        report["warnings"].append(
+            f"No Python {TARGET_PYTHON_VERSION} interpreter found; "
+            "the layer is not precompiled"
+        )
+
+    if staging_dir.exists():
+        shutil.rmtree(staging_dir)
+    site_dir.mkdir(parents=True)
+    if install:
+        unpinned = unpinned_requirements(requirements_file)
+        if unpinned:
+            report["warnings"].append(
+                "Unpinned requirements make the layer differ between builds: "
+                + ", ".join(unpinned)
+            )
+        install_requirements(requirements_file, site_dir, architecture)
+    for name, path in sources:
+        if name != "requirements.txt":
+            destination = site_dir / name
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, destination)
+
+    report["installed_bytes"] = tree_size(site_dir)
+    report["removed_bytes"] = strip_layer(site_dir, services)
+    if python:
+        precompile(site_dir, python)
+    report["unpacked_bytes"] = tree_size(site_dir)
+    report["largest_packages"] = largest_packages(site_dir)
+
+    zip_path = output_dir / f"{LAYER_NAME}.zip"
+    files = build_packages.collect_files(staging_dir, exclude=())
+    build_packages.write_zip(files, zip_path)
+    entry = {
+        "path": zip_path.name,
+        "content_hash": digest,
+        "source_code_hash": build_packages.source_code_hash(zip_path),
+        "size": zip_path.stat().st_size,
+        "files": len(files),
+    }
+    report["zip_bytes"] = entry["size"]
+
+    if python:
+        try:
+            report["import_time"] = measure_import(python, site_dir)
+            report["import_time_without_bytecode"] = measure_import(
+                python, site_dir, bytecode=False
+            )
+        except subprocess.CalledProcessError as e:
+            # Wheels for another architecture cannot be imported here
+            report["warnings"].append(f"Import timing skipped: {e.stderr.strip()}")
+
+    layers[LAYER_NAME] = entry
+    output_dir.mkdir(parents=True, exist_ok=True)
+    build_packages.write_manifest(output_dir, manifest)
+    return entry, report
+
+
+def format_report(entry, report):
+    """Render a build report as text."""
+    if report["status"] == "cached":
+        return (
+            f"{LAYER_NAME} cached ({entry['size']} bytes) {entry['source_code_hash']}"
+        )
+
+    mb = 1024 * 1024
+    lines = [
+        f"{LAYER_NAME} built -> {entry['path']}",
+        f"  installed      {report['installed_bytes'] / mb:8.2f} MB",
+    ]
+    for category, size in sorted(report["removed_bytes"].items()):
+        lines.append(f"  - {category:<12} {size / mb:8.2f} MB")
+    lines += [
+        f"  unpacked       {report['unpacked_bytes'] / mb:8.2f} MB",
+        f"  zip            {report['zip_bytes'] / mb:8.2f} MB",
+        f"  source_code_hash {entry['source_code_hash']}",
+        "  largest packages:",
+    ]
+    lines += [
+        f"    {name:<30} {size / mb:8.2f} MB"
+        for name, size in report["largest_packages"]
+    ]
+    if report.get("import_time"):
+        warm = report["import_time"]["total_us"] / 1000
+        cold = report["import_time_without_bytecode"]["total_us"] / 1000
+        lines.append(
+            f"  import common_utils: {warm:.1f} ms precompiled, "
+            f"{cold:.1f} ms without bytecode"
+        )
+        lines += [
+            f"    {name:<30} {self_us / 1000:8.1f} ms"
+            for name, self_us in report["import_time"]["slowest"]
+        ]
+    lines += [f"  warning: {warning}" for warning in report["warnings"]]
+    return "\n".join(lines)
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    entry, report = build_layer(
+        args.output_dir,
+        architecture=args.architecture,
+        python=args.python,
+        keep_services=args.keep_service,
+        install=not args.no_install,
+        force=args.force,
+    )
+    if args.json:
+        print(json.dumps({"layer": entry, "report": report}, indent=2))
+    else:
+        print(format_report(entry, report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+"""
+Deterministic, incremental Lambda package builder.
+Zips every function with a function.json into build/packages with sorted
+entries, fixed timestamps and normalised permissions, so the same sources
+always give the same bytes and the same source_code_hash. A content-hash
+cache skips functions whose sources have not changed, and stale functions
+are built in parallel across a process pool.
+"""
+
+import argparse
+import base64
+import fnmatch
+import hashlib
+import json
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import lambda_local
+
+DEFAULT_OUTPUT_DIR = lambda_local.PROJECT_ROOT / "build" / "packages"
+MANIFEST_NAME = "manifest.json"
+
+# Bump when the zip layout changes so every cached package is rebuilt
+BUILDER_VERSION = "1"
+
+# Oldest timestamp a zip entry can hold; used for every entry
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+
+# Never packaged: bytecode is compiled on import, dotfiles are local state
+# and import budgets are only read by scripts/import_budget.py
+EXCLUDE_PATTERNS = ("__pycache__", "*.pyc", "*.pyo", ".*", "import_budget.json")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Build reproducible Lambda zips from function.json files"
+    )
+    parser.add_argument(
+        "--function",
+        action="append",
+        dest="functions",
+        help="Build only this function (repeatable, default: all)",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=str(DEFAULT_OUTPUT_DIR),
+        help="Directory for zips and the manifest (default: build/packages)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Parallel build processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Rebuild even when the cache is current"
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the manifest as JSON"
+    )
+    return parser.parse_args()
+
+
+def is_excluded(relative_path, patterns=EXCLUDE_PATTERNS):
+    """Return True if any component of relative_path matches an exclusion."""
+    return any(
+        fnmatch.fnmatch(part, pattern)
+        for part in relative_path.parts
+        for pattern in patterns
+    )
+
+
+def collect_files(source_dir, exclude=EXCLUDE_PATTERNS):
+    """Return the files to package as sorted (archive name, path) pairs."""
+    source_dir = Path(source_dir)
+    files = []
+    for path in source_dir.rglob("*"):
+        relative = path.relative_to(source_dir)
+        if path.is_file() and not is_excluded(relative, exclude):
+            files.append((relative.as_posix(), path))
+    return sorted(files)
+
+
+def file_mode(path):
+    """Return the normalised permissions of a packaged file: 755 or 644."""
+    return 0o755 if os.access(path, os.X_OK) else 0o644
+
+
+def content_hash(files, salt=""):
+    """Hash the names, modes and contents of files, ignoring timestamps.
+
+    salt folds build options that change the output into the hash.
+    """
+    digest = hashlib.sha256(f"builder-{BUILDER_VERSION}\0{salt}\0".encode())
+    for name, path in files:
+        digest.update(f"{name}\0{file_mode(path):o}\0".encode())
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def source_code_hash(zip_path):
+    """Return the base64-encoded SHA-256 of a zip, as Terraform expects it."""
+    digest = hashlib.sha256(Path(zip_path).read_bytes()).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def write_zip(files, zip_path):
+    """Write files to zip_path so that equal inputs give identical bytes."""
+    zip_path = Path(zip_path)
+    zip_path.parent.mkdir(parents=True, exist_ok=True)
+    partial = zip_path.with_name(zip_path.name + ".partial")
+    with zipfile.ZipFile(partial, "w") as archive:
+        for name, path in files:
+            info = zipfile.ZipInfo(name, date_time=ZIP_DATE_TIME)
+            info.create_system = 3  # Unix, so external_attr holds the mode
+            info.external_attr = (0o100000 | file_mode(path)) << 16
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, path.read_bytes(), compresslevel=9)
+    # Never leave a half-written zip where Terraform would pick it up
+    os.replace(partial, zip_path)
+
+
+def build_package(name, source_dir, zip_path, expected_hash=None):
+    """Zip one function and return its manifest entry.
+
+    Runs in a worker process, so it only takes and returns plain values.
+    """
+    files = collect_files(source_dir)
+    digest = content_hash(files)
+    if expected_hash is not None and digest != expected_hash:
+        raise RuntimeError(f"{name} changed while it was being built")
+    write_zip(files, zip_path)
+    return {
+        # Relative to the manifest, which sits next to the zip
+        "path": Path(zip_path).name,
+        "content_hash": digest,
+        "source_code_hash": source_code_hash(zip_path),
+        "size": Path(zip_path).stat().st_size,
+        "files": len(files),
+    }
+
+
+def load_manifest(output_dir):
+    """Return the manifest of the previous build, or an empty one."""
+    try:
+        with open(Path(output_dir) / MANIFEST_NAME) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"functions": {}}
+
+
+def write_manifest(output_dir, manifest):
+    """Write the manifest atomically so readers never see a partial file."""
+    path = Path(output_dir) / MANIFEST_NAME
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+    os.replace(partial, path)
+
+
+def is_current(entry, digest, output_dir):
+    """Return True if a cached entry still matches the sources and its zip."""
+    if not entry or entry.get("content_hash") != digest:
+        return False
+    zip_path = Path(output_dir) / entry["path"]
+    return zip_path.exists() and source_code_hash(zip_path) == entry.get(
+        "source_code_hash"
+    )
+
+
+def build_packages(functions, output_dir=DEFAULT_OUTPUT_DIR, jobs=None, force=False):
+    """Build the given functions and return (manifest, {name: status}).
+
+    status is "cached" for functions whose zip was reused and "built" for the
+    rest. The manifest keeps entries of functions not built in this run.
+    """
+    output_dir = Path(output_dir)
+    manifest = load_manifest(output_dir)
+    entries = manifest.setdefault("functions", {})
+
+    statuses = {}
+    stale = {}
+    for name, function in sorted(functions.items()):
+        digest = content_hash(collect_files(function["dir"]))
+        if not force and is_current(entries.get(name), digest, output_dir):
+            statuses[name] = "cached"
+        else:
+            zip_path = str(output_dir / f"{name}.zip")
+            stale[name] = (name, str(function["dir"]), zip_path, digest)
+
+    if len(stale) > 1 and (jobs or 0) != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = {
+                name: pool.submit(build_package, *args) for name, args in stale.items()
+            }
+            results = {name: future.result() for name, future in futures.items()}
+    else:
+        # Not worth starting worker processes for a single package
+        results = {name: build_package(*args) for name, args in stale.items()}
+
+    for name, entry in results.items():
+        entries[name] = entry
+        statuses[name] = "built"
+
+    if results:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        write_manifest(output_dir, manifest)
+    return manifest, statuses
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    functions = lambda_local.discover_functions()
+    if args.functions:
+        missing = set(args.functions) - set(functions)
+        if missing:
+            print(f"Unknown function(s): {', '.join(sorted(missing))}")
+            return 1
+        functions = {name: functions[name] for name in args.functions}
+
+    manifest, statuses = build_packages(
+        functions, args.output_dir, jobs=args.jobs, force=args.force
+    )
+
+    if args.json:
+        print(json.dumps(manifest, indent=2, sort_keys=True))
+        return 0
+
+    for name, status in statuses.items():
+        entry = manifest["functions"][name]
+        print(
+            f"{name:<24} {status:<7} {entry['size']:>9} bytes  {entry['source_code_hash']}"
+        )
+    built = sum(1 for status in statuses.values() if status == "built")
+    print(f"{built} built, {len(statuses) - built} cached -> {args.output_dir}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
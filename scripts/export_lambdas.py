@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+"""
+Concurrent Lambda source exporter.
+Lists the functions of every region with paginated boto3 calls, then
+downloads and extracts their code on a bounded thread pool. Downloads are
+streamed into a spooled buffer, checked against CodeSha256 and extracted
+from there, so no zip is left next to the sources. Functions whose
+CodeSha256 matches the last export are skipped, and the state file written
+after every function lets an interrupted run resume where it stopped.
+"""
+
+import argparse
+import base64
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import boto3
+import lambda_local
+import requests
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+
+DEFAULT_OUTPUT_DIR = lambda_local.PROJECT_ROOT / "build" / "lambda_sources"
+STATE_NAME = ".export_state.json"
+
+# Downloads up to this size stay in memory, larger ones spill to a temp file
+SPOOL_MAX_SIZE = 16 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+# Handler files kept by --main-only, in order of preference
+MAIN_FILES = ("lambda_function.py", "index.js", "handler.js", "main.go")
+
+
+class ExportError(Exception):
+    """Raised when a function's code cannot be exported."""
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Export the source of deployed Lambda functions"
+    )
+    parser.add_argument(
+        "--region",
+        action="append",
+        dest="regions",
+        help="Export this region (repeatable, default: every enabled region)",
+    )
+    parser.add_argument("--profile", help="AWS profile to use")
+    parser.add_argument(
+        "--output-dir",
+        default=str(DEFAULT_OUTPUT_DIR),
+        help="Directory for <region>/<function> sources "
+        "(default: build/lambda_sources)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=16,
+        help="Functions listed and downloaded at once (default: 16)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Export every function, even when its CodeSha256 is unchanged",
+    )
+    parser.add_argument(
+        "--main-only",
+        action="store_true",
+        help="Keep only the main handler file, renamed to <function>.<ext>",
+    )
+    return parser.parse_args()
+
+
+class ExportState:
+    """The CodeSha256 of every exported function, saved after each export.
+
+    Safe to update from several threads; the file is replaced atomically so
+    an interrupted run never leaves it half-written.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.functions = json.load(f).get("functions", {})
+        except (FileNotFoundError, ValueError):
+            self.functions = {}
+
+    def get(self, key):
+        with self._lock:
+            return self.functions.get(key)
+
+    def record(self, key, code_sha256):
+        with self._lock:
+            self.functions[key] = code_sha256
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            partial = self.path.with_name(self.path.name + ".partial")
+            with open(partial, "w") as f:
+                json.dump({"functions": self.functions}, f, indent=2, sort_keys=True)
+                f.write("\n")
+            os.replace(partial, self.path)
+
+
+def list_regions(session):
+    """Return the regions enabled for the account, sorted."""
+    ec2 = session.client("ec2", region_name=session.region_name or "us-east-1")
+    regions = ec2.describe_regions()["Regions"]
+    return sorted(region["RegionName"] for region in regions)
+
+
+def list_functions(client):
+    """Return the configuration of every function a Lambda client can see."""
+    paginator = client.get_paginator("list_functions")
+    return [function for page in paginator.paginate() for function in page["Functions"]]
+
+
+def list_all_functions(clients, jobs=None):
+    """List every region concurrently and return ({region: functions}, errors)."""
+    functions = {}
+    errors = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(list_functions, client): region
+            for region, client in clients.items()
+        }
+        for future in as_completed(futures):
+            region = futures[future]
+            try:
+                functions[region] = future.result()
+            except (BotoCoreError, ClientError) as e:
+                errors[region] = str(e)
+    return functions, errors
+
+
+def download(url, timeout=DOWNLOAD_TIMEOUT):
+    """Yield the body of url in chunks as it arrives."""
+    with requests.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        yield from response.iter_content(CHUNK_SIZE)
+
+
+def spool(chunks, code_sha256):
+    """Buffer a streamed zip and check it against its base64 CodeSha256.
+
+    Returns a file object positioned at the start; the caller closes it.
+    """
+    buffer = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+        buffer.write(chunk)
+    if base64.b64encode(digest.digest()).decode("ascii") != code_sha256:
+        buffer.close()
+        raise ExportError("downloaded code does not match CodeSha256")
+    buffer.seek(0)
+    return buffer
+
+
+def keep_main_file(directory, function_name):
+    """Reduce directory to its main handler file, renamed after the function.
+
+    Returns the kept file name, or None if no handler file was found.
+    """
+    candidates = sorted(
+        (MAIN_FILES.index(path.name), len(path.parts), path)
+        for path in directory.rglob("*")
+        if path.name in MAIN_FILES and path.is_file()
+    )
+    if not candidates:
+        return None
+    main_file = candidates[0][2]
+    kept = directory / f"{function_name}{main_file.suffix}"
+    main_file.rename(kept)
+    for child in directory.iterdir():
+        if child == kept:
+            continue
+        if child.is_dir():
+            shutil.rmtree(child)
+        else:
+            child.unlink()
+    return kept.name
+
+
+def extract(archive, target_dir, function_name=None):
+    """Extract a zip into target_dir, replacing it only once extraction succeeds.
+
+    With function_name, only the main handler file is kept, as
+    <function_name>.<ext>.
+    """
+    target_dir = Path(target_dir)
+    partial = target_dir.with_name(target_dir.name + ".partial")
+    shutil.rmtree(partial, ignore_errors=True)
+    partial.mkdir(parents=True)
+    try:
+        with zipfile.ZipFile(archive) as zip_file:
+            zip_file.extractall(partial)
+        if function_name and keep_main_file(partial, function_name) is None:
+            raise ExportError("no main handler file found")
+    except BaseException:
+        shutil.rmtree(partial, ignore_errors=True)
+        raise
+    shutil.rmtree(target_dir, ignore_errors=True)
+    os.replace(partial, target_dir)
+
+
+def export_function(
+    client,
+    region,
+    function,
+    output_dir,
+    state,
+    fetch=download,
+    main_only=False,
+    force=False,
+):
+    """Export one function's code and return "exported" or "unchanged"."""
+    name = function["FunctionName"]
+    key = f"{region}/{name}"
+    code_sha256 = function["CodeSha256"]
+    target_dir = Path(output_dir) / region / name
+    if not force and state.get(key) == code_sha256 and target_dir.exists():
+        return "unchanged"
+
+    code = client.get_function(FunctionName=name)["Code"]
+    if "Location" not in code:
+        raise ExportError(f"no zip package ({code.get('RepositoryType', 'unknown')})")
+    archive = spool(fetch(code["Location"]), code_sha256)
+    try:
+        extract(archive, target_dir, function_name=name if main_only else None)
+    finally:
+        archive.close()
+    state.record(key, code_sha256)
+    return "exported"
+
+
+def export_all(
+    clients,
+    output_dir=DEFAULT_OUTPUT_DIR,
+    jobs=None,
+    fetch=download,
+    main_only=False,
+    force=False,
+):
+    """Export the functions of every region and return {region/function: status}.
+
+    status is "exported", "unchanged" or "failed: <reason>"; a region that
+    cannot be listed appears as "<region>/*".
+    """
+    output_dir = Path(output_dir)
+    state = ExportState(output_dir / STATE_NAME)
+    functions, errors = list_all_functions(clients, jobs)
+    results = {f"{region}/*": f"failed: {error}" for region, error in errors.items()}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = {
+            pool.submit(
+                export_function,
+                clients[region],
+                region,
+                function,
+                output_dir,
+                state,
+                fetch,
+                main_only,
+                force,
+            ): f"{region}/{function['FunctionName']}"
+            for region, region_functions in functions.items()
+            for function in region_functions
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except (
+                BotoCoreError,
+                ClientError,
+                ExportError,
+                OSError,
+                requests.RequestException,
+                zipfile.BadZipFile,
+            ) as e:
+                results[key] = f"failed: {e}"
+    return dict(sorted(results.items()))
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    session = boto3.Session(profile_name=args.profile)
+    regions = args.regions or list_regions(session)
+    # Clients are thread-safe once created; sessions are not
+    config = Config(max_pool_connections=args.jobs, retries={"mode": "adaptive"})
+    clients = {
+        region: session.client("lambda", region_name=region, config=config)
+        for region in regions
+    }
+
+    results = export_all(
+        clients,
+        args.output_dir,
+        jobs=args.jobs,
+        main_only=args.main_only,
+        force=args.force,
+    )
+
+    for key, status in results.items():
+        print(f"{key:<60} {status}")
+    counts = {}
+    for status in results.values():
+        counts[status.split(":")[0]] = counts.get(status.split(":")[0], 0) + 1
+    print(
+        f"{counts.get('exported', 0)} exported, {counts.get('unchanged', 0)} unchanged, "
+        f"{counts.get('failed', 0)} failed -> {args.output_dir}"
+    )
+    return 1 if counts.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
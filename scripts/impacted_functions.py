@@ -0,0 +1,326 @@
+#!/usr/bin/env python
+"""
+Impacted-function selection from a git diff.
+Maps changed paths to the functions they affect (through function.json
+directories and the shared layer every function imports), prints the
+minimal test selection and build targets, and can run the selected test
+groups in parallel, one pytest process per group.
+"""
+
+import argparse
+import fnmatch
+import json
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePosixPath
+
+import lambda_local
+
+PROJECT_ROOT = lambda_local.PROJECT_ROOT
+LAMBDA_PREFIX = "lambda_functions/"
+SHARED_LAYER_PREFIX = "lambda_functions/shared_layer/"
+TEST_SUITES = ("unit", "integration")
+
+# Test groups that do not belong to a function
+SHARED_LAYER_GROUP = "shared_layer"
+SCRIPTS_GROUP = "scripts"
+
+# Changes here can affect every test, so they select everything
+GLOBAL_PATTERNS = (
+    "tests/conftest.py",
+    "tests/*/conftest.py",
+    "tests/import_helper.py",
+    "requirements*.txt",
+    "pytest.ini",
+    "setup.cfg",
+    "pyproject.toml",
+    "Jenkinsfile",
+    "scripts/lambda_local.py",
+)
+
+# Tools exercised by tests outside the scripts group, with those tests. Shell
+# scripts not listed here have no tests, so changing one selects everything.
+TOOL_TESTS = {
+    # The integration suite reaches every function through the local gateway
+    "scripts/local_api.py": ("tests/integration/*",),
+    "getAllLambda.sh": ("tests/unit/scripts/test_export_lambdas.py",),
+}
+
+# Changes here affect no test or package
+IGNORED_PATTERNS = ("*.md", "docs/*", ".gitignore", "LICENSE*", "tests/benchmarks/*")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Select the functions, tests and builds a change affects"
+    )
+    parser.add_argument(
+        "--base",
+        default="origin/main",
+        help="Ref to compare against; its merge base with HEAD is used "
+        "(default: origin/main)",
+    )
+    parser.add_argument(
+        "--paths",
+        nargs="*",
+        help="Use these changed paths instead of asking git",
+    )
+    parser.add_argument(
+        "--suite",
+        choices=TEST_SUITES + ("all",),
+        default="all",
+        help="Test suite to select from (default: all)",
+    )
+    parser.add_argument(
+        "--run",
+        action="store_true",
+        help="Run the selected test groups in parallel",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Test groups run at once (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--junit-dir",
+        help="Write one junit_<group>.xml per test group here",
+    )
+    return parser.parse_args()
+
+
+def changed_paths(base="origin/main"):
+    """Return the paths changed since the merge base of base and HEAD.
+
+    Uncommitted and untracked files count as changed, so the selection can
+    be checked locally before committing.
+    """
+
+    def git(*args):
+        result = subprocess.run(
+            ["git", *args], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        )
+        return result.stdout.split()
+
+    merge_base = git("merge-base", base, "HEAD")[0]
+    paths = set(git("diff", "--name-only", merge_base))
+    paths.update(git("ls-files", "--others", "--exclude-standard"))
+    return sorted(paths)
+
+
+def _matches(path, patterns):
+    return any(fnmatch.fnmatch(path, pattern) for pattern in patterns)
+
+
+def function_dirs(functions):
+    """Return {function directory relative to the repo: function name}."""
+    return {
+        PurePosixPath(function["dir"].relative_to(PROJECT_ROOT)).as_posix(): name
+        for name, function in functions.items()
+    }
+
+
+def discover_test_groups(functions, tests_dir=PROJECT_ROOT / "tests"):
+    """Return {group: {suite: [test paths]}} for every test file.
+
+    A test belongs to the function whose name appears in its file name, to
+    every function of its service directory otherwise, and to the shared
+    layer or scripts group when it sits at the top of a suite or in
+    scripts/.
+    """
+    groups = {name: {} for name in (*functions, SHARED_LAYER_GROUP, SCRIPTS_GROUP)}
+    services = {}
+    for name, function in functions.items():
+        services.setdefault(function["dir"].parent.name, []).append(name)
+
+    for path in sorted(tests_dir.rglob("test_*.py")):
+        relative = PurePosixPath(path.relative_to(PROJECT_ROOT))
+        suite = relative.parts[1] if len(relative.parts) > 2 else None
+        if suite not in TEST_SUITES:
+            continue
+        owners = [name for name in functions if name in path.stem]
+        if not owners:
+            folder = relative.parts[2] if len(relative.parts) > 3 else None
+            if folder == SCRIPTS_GROUP:
+                owners = [SCRIPTS_GROUP]
+            else:
+                owners = services.get(folder, [SHARED_LAYER_GROUP])
+        for owner in owners:
+            groups[owner].setdefault(suite, []).append(relative.as_posix())
+    return groups
+
+
+def select(paths, functions, test_groups):
+    """Map changed paths to impacted functions, test groups and builds.
+
+    Returns a dict with the impacted "functions", whether the "layer" and
+    "terraform" changed, whether a "full" run is needed, the "tests" to run
+    per group and suite, and the package "builds" to produce.
+    """
+    dirs = function_dirs(functions)
+    impacted = set()
+    groups = set()
+    extra_tests = set()
+    tool_tests = set()
+    layer = terraform = full = False
+
+    for path in paths:
+        if _matches(path, IGNORED_PATTERNS):
+            continue
+        if _matches(path, GLOBAL_PATTERNS):
+            full = True
+        elif path.startswith(SHARED_LAYER_PREFIX):
+            # Every function imports the shared layer
+            layer = True
+            impacted.update(functions)
+            groups.add(SHARED_LAYER_GROUP)
+        elif path.startswith(LAMBDA_PREFIX):
+            owner = next(
+                (name for d, name in dirs.items() if path.startswith(d + "/")), None
+            )
+            if owner is None:
+                full = True
+            else:
+                impacted.add(owner)
+        elif path.startswith("terraform/"):
+            terraform = True
+        elif path in TOOL_TESTS or _matches(path, ("scripts/*.py",)):
+            if path.endswith(".py"):
+                # Tools import each other, and their tests are quick
+                groups.add(SCRIPTS_GROUP)
+            tool_tests.update(TOOL_TESTS.get(path, ()))
+        elif path.startswith("tests/") and PurePosixPath(path).name.startswith("test_"):
+            extra_tests.add(path)
+        else:
+            # Unknown territory: do not guess what it might break
+            full = True
+
+    if full:
+        impacted.update(functions)
+        groups.update(test_groups)
+        layer = terraform = True
+    groups.update(impacted)
+
+    tests = {}
+    for group in sorted(groups):
+        for suite, files in test_groups.get(group, {}).items():
+            tests.setdefault(group, {}).setdefault(suite, set()).update(files)
+    for group, suites in test_groups.items():
+        for suite, files in suites.items():
+            matched = [test for test in files if _matches(test, tool_tests)]
+            if matched:
+                tests.setdefault(group, {}).setdefault(suite, set()).update(matched)
+    for test in extra_tests:
+        if not (PROJECT_ROOT / test).exists():
+            continue  # A deleted test needs no run
+        owner = next(
+            (
+                group
+                for group, suites in test_groups.items()
+                for files in suites.values()
+                if test in files
+            ),
+            SHARED_LAYER_GROUP,
+        )
+        suite = PurePosixPath(test).parts[1]
+        if suite not in TEST_SUITES:
+            suite = "unit"
+        tests.setdefault(owner, {}).setdefault(suite, set()).add(test)
+
+    builds = sorted(impacted)
+    if layer:
+        builds.append(SHARED_LAYER_GROUP)
+    return {
+        "full": full,
+        "functions": sorted(impacted),
+        "layer": layer,
+        "terraform": terraform,
+        "tests": {
+            group: {suite: sorted(files) for suite, files in sorted(suites.items())}
+            for group, suites in sorted(tests.items())
+        },
+        "builds": builds,
+    }
+
+
+def tests_for_suite(selection, suite="all"):
+    """Return {group: [test paths]} for one suite, or for all of them."""
+    grouped = {}
+    for group, suites in selection["tests"].items():
+        files = [
+            test
+            for name, tests in suites.items()
+            if suite in ("all", name)
+            for test in tests
+        ]
+        if files:
+            grouped[group] = files
+    return grouped
+
+
+def run_group(group, tests, junit_dir=None):
+    """Run one test group in its own pytest process; return (group, code, output)."""
+    command = [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", *tests]
+    if junit_dir:
+        command.append(f"--junitxml={os.path.join(junit_dir, f'junit_{group}.xml')}")
+    result = subprocess.run(
+        command,
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "MOCK_API": os.environ.get("MOCK_API", "1")},
+    )
+    return group, result.returncode, result.stdout + result.stderr
+
+
+def run_groups(grouped, jobs=None, junit_dir=None):
+    """Run test groups in parallel and return {group: exit code}.
+
+    Groups are separate processes, so moto backends, patched modules and
+    process-wide state in the shared layer never leak between them.
+    """
+    if junit_dir:
+        os.makedirs(junit_dir, exist_ok=True)
+    results = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [
+            pool.submit(run_group, group, tests, junit_dir)
+            for group, tests in grouped.items()
+        ]
+        for future in futures:
+            group, code, output = future.result()
+            results[group] = code
+            status = "passed" if code in (0, 5) else "FAILED"
+            print(f"=== {group}: {status}")
+            if code not in (0, 5):
+                print(output)
+    return results
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    functions = lambda_local.discover_functions()
+    paths = args.paths if args.paths is not None else changed_paths(args.base)
+    selection = select(paths, functions, discover_test_groups(functions))
+    selection["changed"] = paths
+
+    if not args.run:
+        print(json.dumps(selection, indent=2))
+        return 0
+
+    grouped = tests_for_suite(selection, args.suite)
+    if not grouped:
+        print("No tests affected by this change")
+        return 0
+    results = run_groups(grouped, jobs=args.jobs, junit_dir=args.junit_dir)
+    # pytest exits with 5 when a group collected no tests, which is not a failure
+    return 0 if all(code in (0, 5) for code in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,385 @@
+#!/usr/bin/env python
+"""
+Import-time budget gate for Lambda handlers.
+Imports each function's handler module in a fresh interpreter under
+`-X importtime`, sums the cumulative import cost per top-level package and
+checks it against the import_budget.json stored next to the function's
+function.json. Every run is appended to a history file for trends.
+
+A package's cost counts every point where it is imported from outside
+itself, so botocore pulled in by boto3 counts for both. Budgets are scaled
+by a CPU calibration loop recorded with them, as the benchmark baselines
+are, so a budget set on a laptop can be checked on a CI agent.
+
+Only packages costing at least --min-ms get a budget of their own; small
+standard library imports vary by several milliseconds between runs, so
+they are covered by the total and the new-package limit instead. Every
+limit also allows --slack-ms on top, which absorbs jitter that a
+percentage of a small budget cannot.
+"""
+
+import argparse
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+import lambda_local
+
+BUDGET_NAME = "import_budget.json"
+DEFAULT_HISTORY = lambda_local.PROJECT_ROOT / "build" / "import_time_history.jsonl"
+
+# Written to stderr just before the handler import, so the interpreter's
+# own startup imports are left out
+MARKER = "--- handler import ---"
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Check handler import times against per-function budgets"
+    )
+    parser.add_argument(
+        "--function",
+        action="append",
+        dest="functions",
+        help="Function name from function.json; repeatable (default: all)",
+    )
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=5,
+        help="Fresh interpreters per function; the fastest counts (default: 5)",
+    )
+    parser.add_argument(
+        "--update-budgets",
+        action="store_true",
+        help="Write budgets from this run instead of checking them",
+    )
+    parser.add_argument(
+        "--headroom",
+        type=float,
+        default=0.5,
+        help="Allowance above the measured time when updating (default: 0.5)",
+    )
+    parser.add_argument(
+        "--min-ms",
+        type=float,
+        default=50.0,
+        help="Smallest package cost given its own budget (default: 50)",
+    )
+    parser.add_argument(
+        "--new-package-ms",
+        type=float,
+        default=50.0,
+        help="Limit for packages without a budget of their own (default: 50)",
+    )
+    parser.add_argument(
+        "--slack-ms",
+        type=float,
+        default=10.0,
+        help="Absolute allowance added to every limit when checking (default: 10)",
+    )
+    parser.add_argument(
+        "--history",
+        default=str(DEFAULT_HISTORY),
+        help=f"JSON lines file each run is appended to (default: {DEFAULT_HISTORY})",
+    )
+    parser.add_argument(
+        "--no-history", action="store_true", help="Do not append to the history"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Offenders to list when the gate fails (default: 10)",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the measurements as JSON"
+    )
+    return parser.parse_args()
+
+
+def calibration_ns():
+    """Time a fixed pure-Python workload to normalise for machine speed."""
+    timer = timeit.Timer("sum(i * i for i in range(10_000))")
+    return min(timer.repeat(repeat=30, number=5)) / 5 * 1e9
+
+
+def parse_importtime(output):
+    """Return the import tree printed by -X importtime after MARKER.
+
+    Nodes are {"name", "self_us", "cumulative_us", "children"}. The output
+    lists an import after everything it imported, indented two spaces per
+    level, so each line adopts the pending lines one level deeper.
+    """
+    if MARKER in output:
+        output = output.split(MARKER, 1)[1]
+    pending = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        node = {
+            "name": name.strip(),
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+            "children": pending.pop(depth + 1, []),
+        }
+        pending.setdefault(depth, []).append(node)
+    return pending.get(0, [])
+
+
+def package_costs(nodes, parent=None, costs=None):
+    """Return {top-level package: cumulative ms} for an import tree."""
+    costs = {} if costs is None else costs
+    for node in nodes:
+        package = node["name"].split(".")[0]
+        if package != parent:
+            costs[package] = costs.get(package, 0) + node["cumulative_us"] / 1000
+        package_costs(node["children"], package, costs)
+    return costs
+
+
+def handler_module(function):
+    """Return the module name of a function's handler, e.g. "index"."""
+    handler = function["config"].get("handler", "index.lambda_handler")
+    return handler.rpartition(".")[0]
+
+
+def import_environment(function):
+    """Return the environment a handler is imported under.
+
+    Mirrors the Lambda runtime's path layout and the function's variables,
+    without AWS_LAMBDA_FUNCTION_NAME so init-time priming makes no calls.
+    """
+    env = dict(os.environ)
+    env.pop("AWS_LAMBDA_FUNCTION_NAME", None)
+    env.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+    env.setdefault("ENVIRONMENT", "test")
+    env.update(function["config"].get("environment_variables", {}))
+    env["PYTHONPATH"] = os.pathsep.join(
+        str(path)
+        for path in (
+            function["dir"],
+            lambda_local.SHARED_LAYER_PYTHON_DIR,
+            lambda_local.SHARED_LAYER_DIR,
+        )
+    )
+    return env
+
+
+def measure_once(function):
+    """Import a handler in a fresh interpreter and return its import tree."""
+    code = (
+        "import sys\n"
+        f"sys.stderr.write({MARKER!r} + '\\n')\n"
+        "sys.stderr.flush()\n"
+        f"import {handler_module(function)}\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=function["dir"],
+        env=import_environment(function),
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(
+            f"Importing {function['name']} failed:\n{result.stderr.strip()}"
+        )
+    return parse_importtime(result.stderr)
+
+
+def measure(function, runs=5):
+    """Return {"total_ms", "packages"} with the fastest of runs imports.
+
+    Each package keeps its own fastest run, since noise on a shared agent
+    only ever adds time.
+    """
+    totals = []
+    packages = {}
+    for _ in range(max(1, runs)):
+        tree = measure_once(function)
+        totals.append(sum(node["cumulative_us"] for node in tree) / 1000)
+        for package, ms in package_costs(tree).items():
+            packages[package] = min(ms, packages.get(package, math.inf))
+    return {
+        "total_ms": round(min(totals), 3),
+        "packages": {
+            package: round(ms, 3)
+            for package, ms in sorted(packages.items(), key=lambda item: -item[1])
+        },
+    }
+
+
+def budget_path(function):
+    """Return where a function's import budget is stored."""
+    return Path(function["dir"]) / BUDGET_NAME
+
+
+def load_budget(function):
+    """Return a function's budget, or None if it has none yet."""
+    try:
+        with open(budget_path(function)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def make_budget(measured, calibration, headroom=0.5, min_ms=50.0):
+    """Return a budget allowing headroom above a measurement.
+
+    Packages cheaper than min_ms get no budget of their own.
+    """
+
+    def allow(ms):
+        return math.ceil(ms * (1 + headroom))
+
+    return {
+        "calibration_ns": round(calibration, 1),
+        "total_ms": allow(measured["total_ms"]),
+        "packages": {
+            package: allow(ms)
+            for package, ms in sorted(measured["packages"].items())
+            if ms >= min_ms
+        },
+    }
+
+
+def check(name, measured, budget, calibration, new_package_ms=50.0, slack_ms=10.0):
+    """Return the budget violations of one function, worst first.
+
+    Each is {"function", "package", "measured_ms", "budget_ms", "over_ms"}.
+    The whole import is reported as the package "(total)". Packages the
+    budget does not list are held to new_package_ms. Every limit is scaled
+    to this machine and then allows slack_ms more.
+    """
+    scale = calibration / budget["calibration_ns"]
+    limits = [("(total)", measured["total_ms"], budget["total_ms"])]
+    for package, ms in measured["packages"].items():
+        limits.append((package, ms, budget["packages"].get(package, new_package_ms)))
+
+    violations = []
+    for package, ms, limit in limits:
+        allowed = limit * scale + slack_ms
+        if ms > allowed:
+            violations.append(
+                {
+                    "function": name,
+                    "package": package,
+                    "measured_ms": round(ms, 1),
+                    "budget_ms": round(allowed, 1),
+                    "over_ms": round(ms - allowed, 1),
+                }
+            )
+    return sorted(violations, key=lambda v: -v["over_ms"])
+
+
+def append_history(path, results, calibration):
+    """Append one run's measurements to the history file."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=lambda_local.PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit or None,
+        "python": sys.version.split()[0],
+        "calibration_ns": round(calibration, 1),
+        "functions": results,
+    }
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        f.write(json.dumps(record, sort_keys=True) + "\n")
+
+
+def print_offenders(violations, missing, results, top=10):
+    """Print the worst violations and the heaviest imports behind them."""
+    for name in missing:
+        print(f"{name}: no {BUDGET_NAME}; record one with --update-budgets")
+    if not violations:
+        return
+    print(f"\nImport budget exceeded ({len(violations)} violations), worst first:")
+    for v in violations[:top]:
+        print(
+            f"  {v['function']:<20} {v['package']:<24} {v['measured_ms']:>8.1f} ms"
+            f"  budget {v['budget_ms']:>7.1f} ms  (+{v['over_ms']:.1f} ms)"
+        )
+    for name in sorted({v["function"] for v in violations}):
+        heaviest = list(results[name]["packages"].items())[:top]
+        print(f"\nHeaviest imports of {name}:")
+        for package, ms in heaviest:
+            print(f"  {package:<24} {ms:>8.1f} ms")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    functions = lambda_local.discover_functions()
+    names = args.functions or sorted(functions)
+    unknown = [name for name in names if name not in functions]
+    if unknown:
+        print(f"Unknown functions: {', '.join(unknown)}")
+        return 1
+
+    started = time.perf_counter()
+    calibration = calibration_ns()
+    results = {}
+    for name in names:
+        results[name] = measure(functions[name], args.runs)
+        print(f"{name}: {results[name]['total_ms']:.1f} ms", file=sys.stderr)
+
+    if not args.no_history:
+        append_history(args.history, results, calibration)
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    if args.update_budgets:
+        for name in names:
+            budget = make_budget(results[name], calibration, args.headroom, args.min_ms)
+            path = budget_path(functions[name])
+            path.write_text(json.dumps(budget, indent=2) + "\n")
+            print(f"Updated {path.relative_to(lambda_local.PROJECT_ROOT)}")
+        return 0
+
+    violations = []
+    missing = []
+    for name in names:
+        budget = load_budget(functions[name])
+        if budget is None:
+            missing.append(name)
+            continue
+        violations += check(
+            name,
+            results[name],
+            budget,
+            calibration,
+            args.new_package_ms,
+            args.slack_ms,
+        )
+    violations.sort(key=lambda v: -v["over_ms"])
+
+    print_offenders(violations, missing, results, args.top)
+    if violations or missing:
+        return 1
+    elapsed = time.perf_counter() - started
+    print(f"All {len(names)} functions within their import budgets ({elapsed:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
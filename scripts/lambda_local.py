@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+"""
+Helpers for running Lambda handlers in-process.
+Discovers functions from their function.json files, loads handlers as
+isolated "containers", builds API Gateway events and creates the DynamoDB
+tables a function declares so it can run against moto.
+"""
+
+import base64
+import importlib.util
+import itertools
+import json
+import sys
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlencode
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+LAMBDA_DIR = PROJECT_ROOT / "lambda_functions"
+SHARED_LAYER_DIR = LAMBDA_DIR / "shared_layer"
+SHARED_LAYER_PYTHON_DIR = SHARED_LAYER_DIR / "python"
+
+_container_ids = itertools.count(1)
+
+
+def setup_python_path():
+    """Make the shared layer importable, as the Lambda runtime does."""
+    for path in (SHARED_LAYER_PYTHON_DIR, SHARED_LAYER_DIR):
+        if str(path) not in sys.path:
+            sys.path.insert(0, str(path))
+
+
+def discover_functions(lambda_dir=LAMBDA_DIR):
+    """Return {name: {"name", "dir", "config"}} for every function.json."""
+    functions = {}
+    for config_file in sorted(Path(lambda_dir).glob("**/function.json")):
+        with open(config_file) as f:
+            config = json.load(f)
+        name = config.get("name", config_file.parent.name)
+        functions[name] = {"name": name, "dir": config_file.parent, "config": config}
+    return functions
+
+
+def get_api_methods(config):
+    """Return the API methods of a function, accepting "method" or "methods"."""
+    api = config.get("api", {})
+    methods = api.get("methods", api.get("method", ["GET"]))
+    if isinstance(methods, str):
+        methods = [methods]
+    return [method.upper() for method in methods]
+
+
+def load_handler(function, container_id=None):
+    """Import a function's handler module as a fresh container.
+
+    Each call executes the module again under a unique name, so module-level
+    state (loggers, table resources, caches) is per container, as in Lambda.
+    The shared layer itself is imported once per process, so priming hooks
+    the module registers run during its own init only and are then dropped;
+    otherwise a warm-up ping to one container would prime every other.
+    """
+    setup_python_path()
+    import common_utils
+
+    handler_string = function["config"].get("handler", "index.lambda_handler")
+    module_file, _, handler_name = handler_string.rpartition(".")
+    module_path = Path(function["dir"]) / f"{module_file.replace('.', '/')}.py"
+
+    container_id = container_id or next(_container_ids)
+    module_name = f"_lambda_{function['name']}_{container_id}"
+    spec = importlib.util.spec_from_file_location(module_name, module_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    # Function code may import sibling modules from its own directory
+    sys.path.insert(0, str(function["dir"]))
+    priming_hooks = list(common_utils._priming_hooks)
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(function["dir"]))
+        common_utils._priming_hooks[:] = priming_hooks
+    return getattr(module, handler_name)
+
+
+class LambdaContext:
+    """Minimal stand-in for the Lambda context object."""
+
+    def __init__(self, function_name, timeout=30, memory_size=128):
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.memory_limit_in_mb = memory_size
+        self.aws_request_id = str(uuid.uuid4())
+        self.invoked_function_arn = (
+            f"arn:aws:lambda:us-east-2:123456789012:function:{function_name}"
+        )
+        self.log_group_name = f"/aws/lambda/{function_name}"
+        self.log_stream_name = "local"
+        self._deadline = time.monotonic() + timeout
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+def context_for(function):
+    """Build a fresh context for one invocation of a function."""
+    config = function["config"]
+    return LambdaContext(
+        function["name"], config.get("timeout", 30), config.get("memory_size", 128)
+    )
+
+
+def match_route(route, path, tail_param="proxy"):
+    """Match a request path against a route such as /devices/{device_id}.
+
+    Returns the path parameters, or None if the path does not match. A route
+    also matches one extra trailing segment, which is exposed under
+    tail_param.
+    """
+    route_parts = [p for p in route.strip("/").split("/") if p]
+    path_parts = [p for p in path.strip("/").split("/") if p]
+    if len(path_parts) not in (len(route_parts), len(route_parts) + 1):
+        return None
+
+    params = {}
+    for route_part, path_part in zip(route_parts, path_parts):
+        if route_part.startswith("{") and route_part.endswith("}"):
+            params[route_part[1:-1].rstrip("+")] = path_part
+        elif route_part != path_part:
+            return None
+    if len(path_parts) > len(route_parts):
+        params[tail_param] = path_parts[-1]
+    return params
+
+
+def build_api_event(
+    method,
+    path,
+    body=None,
+    headers=None,
+    query=None,
+    path_parameters=None,
+    route=None,
+    version="1.0",
+    user_id=None,
+    source_ip="127.0.0.1",
+    stage="local",
+):
+    """Build an API Gateway proxy event (payload format 1.0 or 2.0)."""
+    method = method.upper()
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    is_base64 = False
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body)
+        headers.setdefault("content-type", "application/json")
+    elif isinstance(body, bytes):
+        try:
+            body = body.decode("utf-8")
+        except UnicodeDecodeError:
+            body = base64.b64encode(body).decode("ascii")
+            is_base64 = True
+
+    request_id = str(uuid.uuid4())
+    now = time.time()
+    claims = {"sub": user_id} if user_id else None
+    route = route or path
+
+    if version == "2.0":
+        event = {
+            "version": "2.0",
+            "routeKey": f"{method} {route}",
+            "rawPath": path,
+            "rawQueryString": urlencode(query or {}),
+            "headers": headers,
+            "queryStringParameters": query or None,
+            "pathParameters": path_parameters or None,
+            "requestContext": {
+                "accountId": "123456789012",
+                "apiId": "local",
+                "domainName": "localhost",
+                "http": {
+                    "method": method,
+                    "path": path,
+                    "protocol": "HTTP/1.1",
+                    "sourceIp": source_ip,
+                    "userAgent": headers.get("user-agent", "lambda-local"),
+                },
+                "requestId": request_id,
+                "routeKey": f"{method} {route}",
+                "stage": stage,
+                "time": time.strftime("%d/%b/%Y:%H:%M:%S +0000", time.gmtime(now)),
+                "timeEpoch": int(now * 1000),
+            },
+            "isBase64Encoded": is_base64,
+        }
+        if claims:
+            event["requestContext"]["authorizer"] = {"jwt": {"claims": claims}}
+    else:
+        event = {
+            "version": "1.0",
+            "resource": route,
+            "path": path,
+            "httpMethod": method,
+            "headers": headers,
+            "multiValueHeaders": {k: [v] for k, v in headers.items()},
+            "queryStringParameters": query or None,
+            "multiValueQueryStringParameters": (
+                {k: [v] for k, v in query.items()} if query else None
+            ),
+            "pathParameters": path_parameters or None,
+            "stageVariables": None,
+            "requestContext": {
+                "accountId": "123456789012",
+                "apiId": "local",
+                "httpMethod": method,
+                "identity": {"sourceIp": source_ip},
+                "path": f"/{stage}{path}",
+                "requestId": request_id,
+                "requestTimeEpoch": int(now * 1000),
+                "resourcePath": route,
+                "stage": stage,
+            },
+            "isBase64Encoded": is_base64,
+        }
+        if claims:
+            event["requestContext"]["authorizer"] = {"claims": claims}
+
+    if body is not None:
+        event["body"] = body
+    return event
+
+
+def create_tables(config, dynamodb_client, environment="test", prefix=""):
+    """Create the DynamoDB tables declared in a function.json "tables" block.
+
+    Table names get the environment prefix used by get_dynamodb_table, plus
+    an optional extra prefix. Returns {logical name: physical table name}.
+    """
+    created = {}
+    for name, schema in config.get("tables", {}).items():
+        table_name = f"{prefix}{environment}-{name}"
+        attribute_types = dict(schema.get("attributes", {}))
+        key_schema = [{"AttributeName": schema["hash_key"], "KeyType": "HASH"}]
+        if schema.get("range_key"):
+            key_schema.append(
+                {"AttributeName": schema["range_key"], "KeyType": "RANGE"}
+            )
+
+        indexes = []
+        for index_name, index in schema.get("global_secondary_indexes", {}).items():
+            index_keys = [{"AttributeName": index["hash_key"], "KeyType": "HASH"}]
+            if index.get("range_key"):
+                index_keys.append(
+                    {"AttributeName": index["range_key"], "KeyType": "RANGE"}
+                )
+            projection = {"ProjectionType": index.get("projection", "ALL")}
+            if index.get("non_key_attributes"):
+                projection = {
+                    "ProjectionType": "INCLUDE",
+                    "NonKeyAttributes": index["non_key_attributes"],
+                }
+            indexes.append(
+                {
+                    "IndexName": index_name,
+                    "KeySchema": index_keys,
+                    "Projection": projection,
+                }
+            )
+
+        key_names = {k["AttributeName"] for k in key_schema}
+        for index in indexes:
+            key_names.update(k["AttributeName"] for k in index["KeySchema"])
+
+        kwargs = {
+            "TableName": table_name,
+            "KeySchema": key_schema,
+            "AttributeDefinitions": [
+                {"AttributeName": n, "AttributeType": attribute_types.get(n, "S")}
+                for n in sorted(key_names)
+            ],
+            "BillingMode": "PAY_PER_REQUEST",
+        }
+        if indexes:
+            kwargs["GlobalSecondaryIndexes"] = indexes
+        dynamodb_client.create_table(**kwargs)
+        created[name] = table_name
+    return created
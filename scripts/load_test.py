@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+"""
+In-process load test for Lambda handlers against moto-backed AWS services.
+Loads a handler from its function.json, simulates a pool of warm containers
+and reports latency percentiles, throughput, peak memory and AWS calls per
+request.
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import lambda_local
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Load test a Lambda handler in-process against moto"
+    )
+    parser.add_argument(
+        "--function",
+        default="device_status",
+        help="Function name from function.json (default: device_status)",
+    )
+    parser.add_argument(
+        "--requests",
+        type=int,
+        default=1000,
+        help="Number of measured requests (default: 1000)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=4,
+        help="Concurrent in-flight requests (default: 4)",
+    )
+    parser.add_argument(
+        "--containers",
+        type=int,
+        default=None,
+        help="Warm containers in the pool (default: same as --concurrency)",
+    )
+    parser.add_argument(
+        "--mix",
+        default="GET=70,POST=30",
+        help="Request mix by method for generated events (default: GET=70,POST=30)",
+    )
+    parser.add_argument(
+        "--devices",
+        type=int,
+        default=100,
+        help="Distinct device ids in generated events (default: 100)",
+    )
+    parser.add_argument(
+        "--events",
+        help="JSON lines file of API Gateway events to replay instead of generating",
+    )
+    parser.add_argument(
+        "--no-tracemalloc",
+        action="store_true",
+        help="Skip peak memory tracking (lowers measurement overhead)",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print the report as JSON",
+    )
+    return parser.parse_args()
+
+
+def parse_mix(mix):
+    """Parse "GET=70,POST=30" into a list of (method, weight)."""
+    weights = []
+    for part in mix.split(","):
+        method, _, weight = part.partition("=")
+        weights.append((method.strip().upper(), int(weight or 1)))
+    return weights
+
+
+def device_status_events(count, mix, devices, path="/device_status"):
+    """Generate a deterministic GET/POST mix of device_status events."""
+    schedule = [method for method, weight in parse_mix(mix) for _ in range(weight)]
+    statuses = ["active", "idle", "offline"]
+    for i in range(count):
+        method = schedule[i % len(schedule)]
+        device_id = f"dev-{i % devices:06d}"
+        if method == "POST":
+            yield lambda_local.build_api_event(
+                "POST",
+                path,
+                body={
+                    "device_id": device_id,
+                    "status": statuses[i % len(statuses)],
+                    "battery_level": i % 101,
+                    "firmware_version": "1.2.3",
+                },
+            )
+        else:
+            yield lambda_local.build_api_event(
+                method,
+                f"{path}/{device_id}",
+                path_parameters={"device_id": device_id},
+                route=f"{path}/{{device_id}}",
+            )
+
+
+# Generated workloads by function name; other functions replay --events
+EVENT_GENERATORS = {"device_status": device_status_events}
+
+
+def load_events(args, function):
+    """Return (seed events, measured events) for the run."""
+    if args.events:
+        with open(args.events) as f:
+            events = [json.loads(line) for line in f if line.strip()]
+        return [], [events[i % len(events)] for i in range(args.requests)]
+
+    generator = EVENT_GENERATORS.get(function["name"])
+    if generator is None:
+        raise SystemExit(
+            f"No event generator for {function['name']}; pass --events FILE"
+        )
+    path = function["config"].get("api", {}).get("path", f"/{function['name']}")
+    # Seed every device once so GETs find items
+    seed = list(generator(args.devices, "POST=1", args.devices, path))
+    return seed, list(generator(args.requests, args.mix, args.devices, path))
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[index]
+
+
+class CallCounter:
+    """Collect AWS call counts from the shared layer's per-invocation summaries."""
+
+    def __init__(self):
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, line):
+        record = json.loads(line)
+        if record.get("message") == "aws_call_summary":
+            with self._lock:
+                self.calls += record["call_count"]
+
+
+def run(args):
+    """Run the load test and return the report."""
+    from moto import mock_aws
+
+    function = lambda_local.discover_functions()[args.function]
+    containers = args.containers or args.concurrency
+    seed_events, events = load_events(args, function)
+
+    os.environ.setdefault("ENVIRONMENT", "test")
+    os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+    os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+    os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+    os.environ["TRACE_SAMPLE_RATE"] = "1"
+    # Moto has no cursor secret parameter to read, and this wins over it
+    os.environ.setdefault("CURSOR_SECRET", "load-test")
+    os.environ.update(function["config"].get("environment_variables", {}))
+    # The harness drives load far above production per-device limits
+    os.environ.pop("RATE_LIMIT_PER_SECOND", None)
+
+    lambda_local.setup_python_path()
+    import boto3
+    import common_utils
+
+    with mock_aws():
+        lambda_local.create_tables(
+            function["config"], boto3.client("dynamodb"), os.environ["ENVIRONMENT"]
+        )
+
+        # Handlers log every request at INFO; keep the report readable
+        logging.disable(logging.INFO)
+        counter = CallCounter()
+        common_utils.set_structured_log_sink(counter)
+
+        pool = queue.Queue()
+        for _ in range(containers):
+            pool.put(lambda_local.load_handler(function))
+
+        def invoke(event):
+            handler = pool.get()
+            try:
+                started = time.perf_counter()
+                response = handler(event, lambda_local.context_for(function))
+                elapsed = (time.perf_counter() - started) * 1000
+            finally:
+                pool.put(handler)
+            return elapsed, (response or {}).get("statusCode")
+
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            list(executor.map(invoke, seed_events))
+            counter.calls = 0
+
+            if not args.no_tracemalloc:
+                tracemalloc.start()
+            started = time.perf_counter()
+            results = list(executor.map(invoke, events))
+            wall_time = time.perf_counter() - started
+            peak_memory = 0
+            if not args.no_tracemalloc:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        common_utils.set_structured_log_sink(None)
+        logging.disable(logging.NOTSET)
+
+    latencies = sorted(elapsed for elapsed, _ in results)
+    status_codes = {}
+    for _, status_code in results:
+        status_codes[str(status_code)] = status_codes.get(str(status_code), 0) + 1
+
+    return {
+        "function": function["name"],
+        "requests": len(results),
+        "concurrency": args.concurrency,
+        "containers": containers,
+        "wall_time_s": round(wall_time, 3),
+        "throughput_rps": round(len(results) / wall_time, 1) if wall_time else 0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3) if latencies else 0,
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else 0,
+        },
+        "peak_memory_kib": round(peak_memory / 1024, 1),
+        "aws_calls_per_request": (
+            round(counter.calls / len(results), 3) if results else 0
+        ),
+        "status_codes": status_codes,
+    }
+
+
+def print_report(report):
+    """Print a human-readable report."""
+    latency = report["latency_ms"]
+    print(f"Function:        {report['function']}")
+    print(
+        f"Requests:        {report['requests']} "
+        f"(concurrency {report['concurrency']}, {report['containers']} containers)"
+    )
+    print(f"Wall time:       {report['wall_time_s']} s")
+    print(f"Throughput:      {report['throughput_rps']} req/s")
+    print(
+        f"Latency (ms):    p50 {latency['p50']}  p95 {latency['p95']}  "
+        f"p99 {latency['p99']}  max {latency['max']}"
+    )
+    print(f"Peak memory:     {report['peak_memory_kib']} KiB")
+    print(f"AWS calls/req:   {report['aws_calls_per_request']}")
+    print(f"Status codes:    {report['status_codes']}")
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    report = run(args)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,535 @@
+#!/usr/bin/env python
+"""
+Local API Gateway emulator.
+Serves every function with an "api" block in its function.json over HTTP,
+builds payload format 1.0 or 2.0 events, and invokes the real
+lambda_handler from a pool of warm containers. AWS calls go to moto unless
+--no-mock is given. LambdaAdapter routes `requests` calls into the same
+gateway in-process, without a socket.
+"""
+
+import argparse
+import base64
+import json
+import logging
+import os
+import sys
+import threading
+import traceback
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qsl, urlsplit
+
+import lambda_local
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+logger = logging.getLogger("local_api")
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Serve Lambda handlers over HTTP like API Gateway"
+    )
+    parser.add_argument(
+        "--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=3000, help="Port to listen on (default: 3000)"
+    )
+    parser.add_argument(
+        "--function",
+        action="append",
+        dest="functions",
+        help="Serve only this function (repeatable, default: all with an api block)",
+    )
+    parser.add_argument(
+        "--containers",
+        type=int,
+        default=2,
+        help="Maximum warm containers per function (default: 2)",
+    )
+    parser.add_argument(
+        "--prewarm",
+        action="store_true",
+        help="Start every container up front instead of on first demand",
+    )
+    parser.add_argument(
+        "--payload-version",
+        choices=["1.0", "2.0"],
+        default="2.0",
+        help="API Gateway event format (default: 2.0, as the HTTP API uses)",
+    )
+    parser.add_argument(
+        "--stage",
+        help="Stage name expected as the first path segment (default: none)",
+    )
+    parser.add_argument(
+        "--environment",
+        default="test",
+        help="ENVIRONMENT used for table names (default: test)",
+    )
+    parser.add_argument(
+        "--env",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="Override an environment variable (repeatable)",
+    )
+    parser.add_argument(
+        "--no-mock",
+        action="store_true",
+        help="Call real AWS instead of moto",
+    )
+    parser.add_argument("--quiet", action="store_true", help="Do not log each request")
+    return parser.parse_args()
+
+
+def build_routes(functions):
+    """Return the routes of every function that declares an "api" block."""
+    routes = []
+    for function in functions.values():
+        api = function["config"].get("api")
+        if not api:
+            continue
+        routes.append(
+            {
+                "function": function,
+                "path": api.get("path", f"/{function['name'].replace('_', '-')}"),
+                "methods": lambda_local.get_api_methods(function["config"]),
+                "path_parameter": api.get("path_parameter", "proxy"),
+            }
+        )
+    # Most specific routes first
+    routes.sort(key=lambda route: route["path"].count("/"), reverse=True)
+    return routes
+
+
+def find_route(routes, method, path):
+    """Return (route, path parameters, status) for a request.
+
+    status is 200 when a route matched, 405 when the path matched but not the
+    method, and 404 otherwise.
+    """
+    status = 404
+    for route in routes:
+        params = lambda_local.match_route(route["path"], path, route["path_parameter"])
+        if params is None:
+            continue
+        if method in route["methods"]:
+            return route, params, 200
+        status = 405
+    return None, None, status
+
+
+class ContainerPool:
+    """Warm handler containers for one function, created on demand."""
+
+    def __init__(self, function, size):
+        self.function = function
+        self.size = max(1, size)
+        self.created = 0
+        self._idle = []
+        self._condition = threading.Condition()
+
+    def prewarm(self):
+        """Start every container now."""
+        handlers = [self.acquire() for _ in range(self.size)]
+        for handler in handlers:
+            self.release(handler)
+
+    def acquire(self):
+        """Take an idle container, starting one if the pool has room."""
+        with self._condition:
+            while not self._idle and self.created >= self.size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self.created += 1
+        try:
+            # Cold start outside the lock so other containers keep serving
+            return lambda_local.load_handler(self.function)
+        except Exception:
+            with self._condition:
+                self.created -= 1
+                self._condition.notify()
+            raise
+
+    def release(self, handler):
+        """Return a container to the pool."""
+        with self._condition:
+            self._idle.append(handler)
+            self._condition.notify()
+
+
+def to_http_response(response, version):
+    """Convert a handler result to (status, header pairs, body bytes).
+
+    Mirrors API Gateway: format 2.0 treats a result without statusCode as a
+    200 JSON body, format 1.0 answers 502 for it.
+    """
+    if not (isinstance(response, dict) and "statusCode" in response):
+        if version == "1.0":
+            return _error(502, "Internal server error")
+        body = response if isinstance(response, str) else json.dumps(response)
+        return 200, [("Content-Type", "application/json")], body.encode("utf-8")
+
+    headers = dict(response.get("headers") or {})
+    for name, values in (response.get("multiValueHeaders") or {}).items():
+        headers[name] = ", ".join(str(v) for v in values)
+    header_pairs = [(name, str(value)) for name, value in headers.items()]
+    header_pairs += [("Set-Cookie", cookie) for cookie in response.get("cookies") or []]
+
+    body = response.get("body") or ""
+    if response.get("isBase64Encoded"):
+        body = base64.b64decode(body)
+    elif not isinstance(body, bytes):
+        body = str(body).encode("utf-8")
+    return int(response["statusCode"]), header_pairs, body
+
+
+class LocalApiGateway:
+    """An HTTP server routing requests into Lambda handlers."""
+
+    def __init__(
+        self,
+        functions=None,
+        host="127.0.0.1",
+        port=0,
+        containers=2,
+        payload_version="2.0",
+        stage=None,
+        environment="test",
+        mock=True,
+        env=None,
+        quiet=True,
+    ):
+        self.functions = functions or lambda_local.discover_functions()
+        self.routes = build_routes(self.functions)
+        self.pools = {
+            route["function"]["name"]: ContainerPool(route["function"], containers)
+            for route in self.routes
+        }
+        self.host = host
+        self.port = port
+        self.payload_version = payload_version
+        self.stage = stage
+        self.environment = environment
+        self.mock = mock
+        self.env = env or {}
+        self.quiet = quiet
+        self._server = None
+        self._thread = None
+        self._mock = None
+        self._saved_environ = None
+
+    @property
+    def url(self):
+        """Base URL of the running server, including the stage."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}" + (f"/{self.stage}" if self.stage else "")
+
+    def _setup_environment(self):
+        self._saved_environ = dict(os.environ)
+        os.environ["ENVIRONMENT"] = self.environment
+        os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-2")
+        if self.mock:
+            os.environ["AWS_ACCESS_KEY_ID"] = "testing"
+            os.environ["AWS_SECRET_ACCESS_KEY"] = "testing"
+            # Moto has no cursor secret parameter to read, and this wins over it
+            os.environ.setdefault("CURSOR_SECRET", "local-api")
+        # Functions share one process, so their variables share os.environ
+        for route in self.routes:
+            os.environ.update(
+                route["function"]["config"].get("environment_variables", {})
+            )
+        os.environ.update(self.env)
+
+    def start(self, prewarm=False):
+        """Start serving in a background thread and return the base URL."""
+        self._start_backend(prewarm)
+        self._server = _Server((self.host, self.port), _RequestHandler)
+        self._server.gateway = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    @contextmanager
+    def intercept(self, base_url="http://lambda.local", prewarm=False):
+        """Answer `requests` calls under base_url in-process while active.
+
+        Every session, including the one behind requests.get, gets a
+        LambdaAdapter for base_url; other URLs are untouched. Yields the
+        base URL to call, including the stage.
+        """
+        base_url = base_url.rstrip("/")
+        self._start_backend(prewarm)
+        adapter = LambdaAdapter(self, base_url)
+        get_adapter = requests.Session.get_adapter
+
+        def get_lambda_adapter(session, url):
+            if adapter.handles(url):
+                return adapter
+            return get_adapter(session, url)
+
+        try:
+            with patch.object(requests.Session, "get_adapter", get_lambda_adapter):
+                yield base_url + (f"/{self.stage}" if self.stage else "")
+        finally:
+            self.stop()
+
+    def _start_backend(self, prewarm=False):
+        """Set up the environment, moto and tables; optionally warm containers."""
+        self._setup_environment()
+        if self.mock:
+            import boto3
+            from moto import mock_aws
+
+            self._mock = mock_aws()
+            self._mock.start()
+            dynamodb = boto3.client("dynamodb")
+            for route in self.routes:
+                lambda_local.create_tables(
+                    route["function"]["config"], dynamodb, os.environ["ENVIRONMENT"]
+                )
+
+        if prewarm:
+            for name, pool in self.pools.items():
+                try:
+                    pool.prewarm()
+                except Exception as e:
+                    # Requests to this function answer 502, as after a failed init
+                    logger.warning("Could not prewarm %s: %s", name, e)
+
+    def stop(self):
+        """Stop the server and the AWS mock, and restore the environment."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._mock:
+            self._mock.stop()
+            self._mock = None
+        if self._saved_environ is not None:
+            os.environ.clear()
+            os.environ.update(self._saved_environ)
+            self._saved_environ = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def invoke(self, method, raw_path, headers=None, body=None, source_ip="127.0.0.1"):
+        """Route one request and return (status, header pairs, body bytes)."""
+        url = urlsplit(raw_path)
+        path = url.path
+        if self.stage:
+            prefix = f"/{self.stage}"
+            if path != prefix and not path.startswith(prefix + "/"):
+                return _error(404, "Not Found")
+            path = path.removeprefix(prefix) or "/"
+
+        route, params, status = find_route(self.routes, method.upper(), path)
+        if route is None:
+            return _error(
+                status, "Not Found" if status == 404 else "Method Not Allowed"
+            )
+
+        route_path = route["path"]
+        if route["path_parameter"] in params:
+            route_path = f"{route_path.rstrip('/')}/{{{route['path_parameter']}}}"
+        event = lambda_local.build_api_event(
+            method,
+            path,
+            body=body or None,
+            headers=headers,
+            query=dict(parse_qsl(url.query, keep_blank_values=True)),
+            path_parameters=params,
+            route=route_path,
+            version=self.payload_version,
+            source_ip=source_ip,
+            stage=self.stage or "$default",
+        )
+
+        function = route["function"]
+        pool = self.pools[function["name"]]
+        try:
+            handler = pool.acquire()
+        except Exception:
+            logger.error(
+                "Init failed for %s:\n%s", function["name"], traceback.format_exc()
+            )
+            return _error(502, "Internal Server Error")
+        try:
+            response = handler(event, lambda_local.context_for(function))
+        except Exception:
+            logger.error(
+                "Unhandled error in %s:\n%s", function["name"], traceback.format_exc()
+            )
+            return _error(502, "Internal Server Error")
+        finally:
+            pool.release(handler)
+        return to_http_response(response, self.payload_version)
+
+
+class LambdaAdapter(BaseAdapter):
+    """A requests transport that answers from a LocalApiGateway in-process.
+
+    Requests under base_url are routed by the gateway into the matching
+    lambda_handler with a full API Gateway event; nothing touches the
+    network. Mount it on a session, or use LocalApiGateway.intercept to
+    cover module-level requests calls too.
+    """
+
+    def __init__(self, gateway, base_url):
+        super().__init__()
+        self.gateway = gateway
+        self.base_url = base_url.rstrip("/")
+
+    def handles(self, url):
+        """Return True if url is under this adapter's base URL."""
+        base = self.base_url.lower()
+        url = url.lower()
+        return url == base or url.startswith(base + "/") or url.startswith(base + "?")
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        """Invoke the handler for a prepared request and return its Response."""
+        url = urlsplit(request.url)
+        prefix = len(urlsplit(self.base_url).path)
+        raw_path = url.path[prefix:] or "/"
+        if url.query:
+            raw_path += f"?{url.query}"
+
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        elif body is not None and not isinstance(body, bytes):
+            body = b"".join(
+                chunk.encode("utf-8") if isinstance(chunk, str) else chunk
+                for chunk in body
+            )
+        status, header_pairs, payload = self.gateway.invoke(
+            request.method, raw_path, headers=dict(request.headers), body=body
+        )
+
+        headers = CaseInsensitiveDict()
+        for name, value in header_pairs:
+            headers[name] = f"{headers[name]}, {value}" if name in headers else value
+        headers["Content-Length"] = str(len(payload))
+
+        response = requests.Response()
+        response.status_code = status
+        response.reason = (
+            HTTPStatus(status).phrase if status in HTTPStatus._value2member_map_ else ""
+        )
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response._content = b"" if request.method == "HEAD" else payload
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        """Nothing to release: no connections are opened."""
+
+
+def _error(status, message):
+    """Build an API Gateway style error response."""
+    body = json.dumps({"message": message}).encode("utf-8")
+    return status, [("Content-Type", "application/json")], body
+
+
+class _Server(ThreadingHTTPServer):
+    """Threaded HTTP server with room for a burst of concurrent clients."""
+
+    daemon_threads = True
+    # The default listen backlog of 5 resets connections under load tests
+    request_queue_size = 128
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+    """Pass every request to the gateway."""
+
+    protocol_version = "HTTP/1.1"
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else None
+        status, headers, payload = self.server.gateway.invoke(
+            self.command,
+            self.path,
+            headers=dict(self.headers.items()),
+            body=body,
+            source_ip=self.client_address[0],
+        )
+
+        self.send_response(status)
+        for name, value in headers:
+            if name.lower() != "content-length":
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = do_HEAD = do_OPTIONS = _handle
+
+    def log_message(self, format, *args):
+        if not self.server.gateway.quiet:
+            super().log_message(format, *args)
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    functions = lambda_local.discover_functions()
+    if args.functions:
+        missing = set(args.functions) - set(functions)
+        if missing:
+            print(f"Unknown function(s): {', '.join(sorted(missing))}")
+            return 1
+        functions = {name: functions[name] for name in args.functions}
+
+    gateway = LocalApiGateway(
+        functions,
+        host=args.host,
+        port=args.port,
+        containers=args.containers,
+        payload_version=args.payload_version,
+        stage=args.stage,
+        environment=args.environment,
+        mock=not args.no_mock,
+        env=dict(item.split("=", 1) for item in args.env),
+        quiet=args.quiet,
+    )
+    url = gateway.start(prewarm=args.prewarm)
+
+    for route in gateway.routes:
+        print(
+            f"{','.join(route['methods']):<24} {url}{route['path']}  -> {route['function']['name']}"
+        )
+    print(f"Serving on {url} (payload {args.payload_version}, Ctrl+C to stop)")
+    try:
+        gateway._thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        gateway.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
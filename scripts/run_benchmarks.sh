@@ -0,0 +1,48 @@
+#!/bin/bash
+set -e
+
+# Usage: ./scripts/run_benchmarks.sh [--update-baseline] [pytest args...]
+UPDATE_BASELINE=""
+if [ "$1" == "--update-baseline" ]; then
+    UPDATE_BASELINE="--perf-update-baseline"
+    shift
+fi
+
+# Check if we're running in a CI environment with an activated venv
+if [ -z "$VIRTUAL_ENV" ]; then
+    VENV_DIR=${VENV_NAME:-venv}
+    if [ ! -d "$VENV_DIR" ]; then
+        echo "Virtual environment not found. Creating one at $VENV_DIR..."
+        python -m venv $VENV_DIR
+        . $VENV_DIR/bin/activate
+        pip install --upgrade pip
+        pip install -r requirements-dev.txt
+    else
+        . $VENV_DIR/bin/activate
+    fi
+else
+    echo "Using existing virtual environment: $VIRTUAL_ENV"
+fi
+
+# Create directory for benchmark reports
+mkdir -p coverage_reports
+
+# Set PYTHONPATH to include lambda/shared_layer and current directory
+SHARED_LAYER_PYTHON_PATH="$(pwd)/lambda_functions/shared_layer/python"
+SHARED_LAYER_PATH="$(pwd)/lambda_functions/shared_layer"
+export PYTHONPATH="$SHARED_LAYER_PYTHON_PATH:$SHARED_LAYER_PATH:$(pwd):$PYTHONPATH"
+
+# Benchmarks run against moto, never real AWS
+export AWS_ACCESS_KEY_ID=testing
+export AWS_SECRET_ACCESS_KEY=testing
+export AWS_DEFAULT_REGION=us-east-2
+
+echo "Running benchmarks..."
+pytest tests/benchmarks --benchmark-only $UPDATE_BASELINE \
+    --benchmark-json=coverage_reports/benchmarks.json \
+    --junitxml=coverage_reports/benchmarks_junit.xml "$@"
+
+if [ -n "$UPDATE_BASELINE" ]; then
+    echo "Baseline updated: tests/benchmarks/baseline.json"
+fi
+echo "Benchmark report available at: coverage_reports/benchmarks.json"
@@ -51,14 +51,18 @@ export PYTHONPATH="$SHARED_LAYER_PYTHON_PATH:$SHARED_LAYER_PATH:$(pwd):$PYTHONPA
 # Print debug info
 echo "PYTHONPATH: $PYTHONPATH"
 
+# Spread tests over pytest-xdist workers, each with its own moto server
+# (set PYTEST_WORKERS=0 to run in a single process)
+PYTEST_WORKERS=${PYTEST_WORKERS:-auto}
+
 # Run unit tests
 echo "Running unit tests..."
 if [ -z "$SPECIFIC_TEST" ]; then
     # Run all tests
-    pytest tests/unit -v --cov=lambda_functions --cov-report=term-missing --cov-report=xml:coverage_reports/coverage.xml --junitxml=coverage_reports/junit.xml
+    pytest tests/unit -v -n "$PYTEST_WORKERS" --cov=lambda_functions --cov-report=term-missing --cov-report=xml:coverage_reports/coverage.xml --junitxml=coverage_reports/junit.xml
 else
     # Run specific test file or directory
-    pytest $SPECIFIC_TEST -v --cov=lambda_functions --cov-report=term-missing --cov-report=xml:coverage_reports/coverage.xml --junitxml=coverage_reports/junit.xml
+    pytest $SPECIFIC_TEST -v -n "$PYTEST_WORKERS" --cov=lambda_functions --cov-report=term-missing --cov-report=xml:coverage_reports/coverage.xml --junitxml=coverage_reports/junit.xml
 fi
 
 echo "Unit tests completed!"
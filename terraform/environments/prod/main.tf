@@ -25,6 +25,10 @@ locals {
   
   # Get all function.json files
   function_jsons = fileset(local.lambda_base_path, "**/function.json")
+
+  # Reproducible zips from scripts/build_packages.py, when they have been built
+  package_manifest_file = "${path.root}/../../../build/packages/manifest.json"
+  package_manifest = fileexists(local.package_manifest_file) ? jsondecode(file(local.package_manifest_file)).functions : {}
   
   # Parse function.json files and create a map
   function_configs = {
@@ -35,8 +39,12 @@ locals {
       config_file = "${local.lambda_base_path}/${file}"
       config = jsondecode(file("${local.lambda_base_path}/${file}"))
       config_hash = filemd5("${local.lambda_base_path}/${file}")
-      # Add source code hash for index.py
-      source_code_hash = fileexists("${local.lambda_base_path}/${dirname(file)}/index.py") ? filemd5("${local.lambda_base_path}/${dirname(file)}/index.py") : null
+      # Prebuilt package and its hash, else the hash of index.py
+      package_path = try("${dirname(local.package_manifest_file)}/${local.package_manifest[basename(dirname(file))].path}", null)
+      source_code_hash = try(
+        local.package_manifest[basename(dirname(file))].source_code_hash,
+        fileexists("${local.lambda_base_path}/${dirname(file)}/index.py") ? filemd5("${local.lambda_base_path}/${dirname(file)}/index.py") : null
+      )
     }
   }
   
@@ -48,6 +56,7 @@ locals {
       source_dir = data.source_dir
       config_hash = data.config_hash
       source_code_hash = data.source_code_hash
+      package_path = data.package_path
       
       api_path = try(
         lookup(lookup(data.config, "api", {}), "path", null), 
@@ -70,6 +79,9 @@ locals {
         ["GET"]
       )
       
+      # Optional item route parameter, e.g. /payment_status/{payment_id}
+      api_path_parameter = lookup(lookup(data.config, "api", {}), "path_parameter", null)
+      
       service_name = try(
         lookup(data.config, "service", null),
         split("_", name)[0],
@@ -174,14 +186,26 @@ module "api_gateway" {
   description      = "API Gateway for Lambda functions"
   api_gateway_type = "HTTP"  # Explicitly set to HTTP API Gateway
   
-  routes = {
-    for name, func in local.processed_functions : name => {
-      path          = func.api_path
-      methods       = func.api_methods != null ? func.api_methods : ["GET"]
-      function_name = name
-      authorization = "NONE"
+  routes = merge(
+    {
+      for name, func in local.processed_functions : name => {
+        path          = func.api_path
+        methods       = func.api_methods != null ? func.api_methods : ["GET"]
+        function_name = name
+        authorization = "NONE"
+      }
+    },
+    # Item routes for functions that read a path parameter; creation stays on
+    # the collection path
+    {
+      for name, func in local.processed_functions : "${name}_item" => {
+        path          = "${func.api_path}/{${func.api_path_parameter}}"
+        methods       = [for method in (func.api_methods != null ? func.api_methods : ["GET"]) : method if method != "POST"]
+        function_name = name
+        authorization = "NONE"
+      } if func.api_path_parameter != null
     }
-  }
+  )
   
   access_log_settings = {
     retention_days = 30
@@ -173,7 +173,8 @@ resource "aws_lambda_permission" "http_api_permission" {
   action        = "lambda:InvokeFunction"
   function_name = var.environment == "prod" ? each.value.function_name : "${var.environment}_${each.value.function_name}"
   principal     = "apigateway.amazonaws.com"
-  source_arn    = "${local.http_api_execution_arn}/*/${each.value.method}${each.value.path}"
+  # Path parameters such as {payment_id} match any value in the source ARN
+  source_arn    = "${local.http_api_execution_arn}/*/${each.value.method}${replace(each.value.path, "/\\{[^}]+\\}/", "*")}"
 }
 
 # API Gateway Deployment (REST API only)
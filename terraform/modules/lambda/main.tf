@@ -1,6 +1,7 @@
-# Create zip files for Lambda functions
+# Create zip files for Lambda functions without a prebuilt package
+# (scripts/build_packages.py builds reproducible ones)
 data "archive_file" "lambda_zip" {
-  for_each = var.function_configs
+  for_each = { for k, v in var.function_configs : k => v if v.package_path == null }
   
   type        = "zip"
   source_dir  = each.value.source_dir
@@ -11,7 +12,7 @@ data "archive_file" "lambda_zip" {
 resource "aws_lambda_function" "functions" {
   for_each = var.function_configs
 
-  filename         = data.archive_file.lambda_zip[each.key].output_path
+  filename         = try(data.archive_file.lambda_zip[each.key].output_path, each.value.package_path)
   # Use both the archive hash and the externally provided source_code_hash to detect changes
   source_code_hash = try(
     each.value.source_code_hash != null ? each.value.source_code_hash : data.archive_file.lambda_zip[each.key].output_base64sha256, 
@@ -10,6 +10,7 @@ variable "function_configs" {
     source_dir          = string
     config_hash         = optional(string)
     source_code_hash    = optional(string)
+    package_path        = optional(string)
     api_path           = optional(string)
     api_methods        = optional(list(string))
     service_name       = string
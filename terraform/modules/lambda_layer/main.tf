@@ -1,5 +1,6 @@
-# Create zip file for the Lambda layer
+# Create zip file for the Lambda layer unless a prebuilt one is given
 data "archive_file" "layer_zip" {
+  count       = var.package_path == null ? 1 : 0
   type        = "zip"
   source_dir  = var.source_path
   output_path = "${path.root}/build/${var.layer_name}.zip"
@@ -7,14 +8,14 @@ data "archive_file" "layer_zip" {
 
 # Create Lambda layer
 resource "aws_lambda_layer_version" "layer" {
-  filename            = data.archive_file.layer_zip.output_path
+  filename            = coalesce(var.package_path, one(data.archive_file.layer_zip[*].output_path))
   layer_name         = "${var.environment}_${var.layer_name}"
   description        = var.description
   compatible_runtimes = var.compatible_runtimes
   compatible_architectures = var.compatible_architectures
   skip_destroy       = var.skip_destroy
   
-  source_code_hash = data.archive_file.layer_zip.output_base64sha256
+  source_code_hash = try(filebase64sha256(var.package_path), one(data.archive_file.layer_zip[*].output_base64sha256))
 }
 
 # Add resource tags using AWS resource tags API
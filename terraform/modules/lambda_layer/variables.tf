@@ -19,6 +19,12 @@ variable "source_path" {
   type        = string
 }
 
+variable "package_path" {
+  description = "Prebuilt layer zip (e.g. from scripts/build_layer.py); source_path is zipped when null"
+  type        = string
+  default     = null
+}
+
 variable "description" {
   description = "Description of the Lambda layer"
   type        = string
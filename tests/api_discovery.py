@@ -0,0 +1,217 @@
+"""
+API endpoint discovery for integration tests.
+Resolves an environment's invoke URL from, in order: an API_URL_<ENV>
+override, Terraform outputs saved after deploy, a per-environment disk
+cache, `terraform output`, and finally the API Gateway control plane.
+Most sessions therefore make no AWS calls. URLs found through the slower
+sources are cached for API_URL_CACHE_TTL seconds (default one hour).
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+PROJECT_ROOT = Path(__file__).parent.parent.absolute()
+TERRAFORM_DIR = PROJECT_ROOT / "terraform" / "environments"
+OUTPUTS_DIR = PROJECT_ROOT / "build" / "terraform-outputs"
+CACHE_PATH = PROJECT_ROOT / "build" / "api_urls.json"
+CACHE_TTL = int(os.environ.get("API_URL_CACHE_TTL", "3600"))
+
+# The api_gateway module names APIs "<environment>-<api_name>" (HTTP) and
+# "<environment>_<api_name>" (REST), with one stage named after the environment
+API_NAME = os.environ.get("API_GATEWAY_NAME", "PandaCharging")
+
+# Terraform outputs holding the invoke URL, in order of preference
+URL_OUTPUTS = ("api_gateway_url", "api_gateway_endpoint")
+
+# Used when nothing else resolves, e.g. in mock mode without a deployed stack
+FALLBACK_URLS = {
+    "dev": "https://api-dev.example.com",
+    "staging": "https://api-staging.example.com",
+    "prod": "https://api.example.com",
+}
+
+
+def url_from_outputs(outputs):
+    """Return the invoke URL from `terraform output -json` data, or None."""
+    for name in URL_OUTPUTS:
+        value = outputs.get(name, {}).get("value")
+        if isinstance(value, str) and value:
+            return value.rstrip("/")
+    return None
+
+
+def read_saved_outputs(environment, outputs_dir=OUTPUTS_DIR):
+    """Return the invoke URL from outputs saved after deploy, or None."""
+    try:
+        with open(Path(outputs_dir) / f"{environment}.json") as f:
+            return url_from_outputs(json.load(f))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def run_terraform_output(environment, terraform_dir=TERRAFORM_DIR):
+    """Return the invoke URL from `terraform output`, or None.
+
+    Only tried where Terraform has been initialised, since init itself
+    would be slower than asking API Gateway.
+    """
+    env_dir = Path(terraform_dir) / environment
+    if not (env_dir / ".terraform").is_dir() or not shutil.which("terraform"):
+        return None
+    try:
+        result = subprocess.run(
+            ["terraform", "output", "-json"],
+            cwd=env_dir,
+            capture_output=True,
+            text=True,
+            timeout=60,
+        )
+    except subprocess.TimeoutExpired:
+        return None
+    if result.returncode != 0:
+        return None
+    try:
+        return url_from_outputs(json.loads(result.stdout))
+    except ValueError:
+        return None
+
+
+def read_cache(environment, path=CACHE_PATH, ttl=CACHE_TTL, now=None):
+    """Return the cached URL of environment if younger than ttl seconds."""
+    try:
+        with open(path) as f:
+            entry = json.load(f).get(environment)
+    except (FileNotFoundError, ValueError):
+        return None
+    now = time.time() if now is None else now
+    if not entry or now - entry.get("resolved_at", 0) > ttl:
+        return None
+    return entry.get("url")
+
+
+def write_cache(environment, url, source, path=CACHE_PATH, now=None):
+    """Record the URL of environment, replacing the cache file atomically."""
+    path = Path(path)
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, ValueError):
+        cache = {}
+    cache[environment] = {
+        "url": url,
+        "source": source,
+        "resolved_at": time.time() if now is None else now,
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Parallel test workers may write at once; each write is whole
+    fd, partial = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    with os.fdopen(fd, "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+    os.replace(partial, path)
+
+
+def matches_environment(name, environment, api_name=API_NAME):
+    """Return True if an API name is the one deployed for environment.
+
+    Names are compared whole, so "dev" never matches "devices-api" or
+    "dev2-PandaCharging".
+    """
+    expected = {f"{environment}{sep}{api_name}".lower() for sep in "-_"}
+    return name.lower() in expected
+
+
+def pick_stage(stage_names, environment):
+    """Return the stage serving environment, or None if it is ambiguous."""
+    for candidate in (environment, "$default"):
+        if candidate in stage_names:
+            return candidate
+    if len(stage_names) == 1:
+        return stage_names[0]
+    return None
+
+
+def discover_http_api(client, environment, api_name=API_NAME):
+    """Find the invoke URL of an environment's HTTP API, or None."""
+    for page in client.get_paginator("get_apis").paginate():
+        for api in page["Items"]:
+            if not matches_environment(api["Name"], environment, api_name):
+                continue
+            stages = [
+                stage["StageName"]
+                for stage_page in client.get_paginator("get_stages").paginate(
+                    ApiId=api["ApiId"]
+                )
+                for stage in stage_page["Items"]
+            ]
+            stage = pick_stage(stages, environment)
+            if stage:
+                suffix = "" if stage == "$default" else f"/{stage}"
+                return f"{api['ApiEndpoint']}{suffix}"
+    return None
+
+
+def discover_rest_api(client, environment, api_name=API_NAME):
+    """Find the invoke URL of an environment's REST API, or None."""
+    region = client.meta.region_name
+    for page in client.get_paginator("get_rest_apis").paginate():
+        for api in page["items"]:
+            if not matches_environment(api["name"], environment, api_name):
+                continue
+            stages = [
+                stage["stageName"]
+                for stage in client.get_stages(restApiId=api["id"])["item"]
+            ]
+            stage = pick_stage(stages, environment)
+            if stage:
+                return f"https://{api['id']}.execute-api.{region}.amazonaws.com/{stage}"
+    return None
+
+
+def resolve_api_url(
+    environment,
+    session=None,
+    mock=False,
+    outputs_dir=OUTPUTS_DIR,
+    cache_path=CACHE_PATH,
+):
+    """Return (url, source) for environment's API.
+
+    With mock set, requests are answered by the mock_api fixture whatever
+    the host, so the slow sources are skipped. session is a boto3 Session
+    used for the API Gateway lookup.
+    """
+    override = os.environ.get(f"API_URL_{environment.upper()}")
+    if override:
+        return override, "environment variable"
+
+    url = read_saved_outputs(environment, outputs_dir)
+    if url:
+        return url, "saved Terraform outputs"
+
+    url = read_cache(environment, cache_path)
+    if url:
+        return url, "cache"
+
+    if not mock:
+        url = run_terraform_output(environment)
+        source = "terraform output"
+        if not url and session is not None:
+            source = "API Gateway"
+            try:
+                url = discover_http_api(
+                    session.client("apigatewayv2"), environment
+                ) or discover_rest_api(session.client("apigateway"), environment)
+            except (BotoCoreError, ClientError) as e:
+                print(f"API Gateway lookup failed: {e}")
+        if url:
+            write_cache(environment, url, source, cache_path)
+            return url, source
+
+    return FALLBACK_URLS.get(environment), "fallback"
@@ -0,0 +1,43 @@
+"""
+Helpers for the shared moto server fixtures.
+One in-process moto server runs per test process, so every pytest-xdist
+worker gets its own; tests on the same server stay apart by creating their
+resources under a namespace unique to the worker and test.
+"""
+
+import os
+import uuid
+
+import lambda_local
+
+
+def start_moto_server():
+    """Start an in-process moto server on a free port; return (server, url)."""
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=0, verbose=False)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f"http://{host}:{port}"
+
+
+def new_namespace():
+    """Return a prefix unique to this worker and call.
+
+    Short and lowercase, so it is valid in table, bucket and queue names.
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    return f"{worker}-{uuid.uuid4().hex[:8]}"
+
+
+def create_function_tables(function_name, dynamodb_client, environment):
+    """Create a function's tables from its function.json.
+
+    This is the test schema lambda_local also serves locally, so tests never
+    carry their own copy. Terraform does not create these tables. Returns
+    {logical name: table name}.
+    """
+    function = lambda_local.discover_functions()[function_name]
+    return lambda_local.create_tables(
+        function["config"], dynamodb_client, environment=environment
+    )
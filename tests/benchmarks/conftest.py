@@ -0,0 +1,107 @@
+"""
+Benchmark configuration.
+Benchmarks only run with --benchmark-only (see scripts/run_benchmarks.sh).
+Each benchmark's fastest round is compared with tests/benchmarks/baseline.json,
+scaled by a CPU calibration loop so baselines recorded on one machine can be
+checked on another, and fails when it regresses past the threshold. The
+minimum is used rather than the median because it is far less sensitive to
+noisy neighbours on shared CI agents.
+"""
+
+import json
+import timeit
+from pathlib import Path
+
+import pytest
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+BENCHMARKS_DIR = Path(__file__).parent
+
+
+def pytest_addoption(parser):
+    """Add command-line options for the regression gate."""
+    parser.addoption(
+        "--perf-regression-threshold",
+        type=float,
+        default=0.5,
+        help="Allowed slowdown over the baseline (default: 0.5 = 50%%)",
+    )
+    parser.addoption(
+        "--perf-update-baseline",
+        action="store_true",
+        default=False,
+        help="Record the measured timings as the new baseline",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip benchmarks unless they were asked for explicitly."""
+    if config.getoption("benchmark_only", default=False):
+        return
+
+    skip = pytest.mark.skip(reason="benchmarks run with --benchmark-only")
+    for item in items:
+        if BENCHMARKS_DIR in Path(str(item.fspath)).parents:
+            item.add_marker(skip)
+
+
+def _calibration_ns():
+    """Time a fixed pure-Python workload to normalise for machine speed."""
+    timer = timeit.Timer("sum(i * i for i in range(10_000))")
+    return min(timer.repeat(repeat=30, number=5)) / 5 * 1e9
+
+
+@pytest.fixture(scope="session")
+def perf_baseline(request):
+    """Load the stored baseline and record new timings when updating."""
+    calibration = _calibration_ns()
+    baseline = {"calibration_ns": calibration, "benchmarks": {}}
+    if BASELINE_FILE.exists():
+        baseline = json.loads(BASELINE_FILE.read_text())
+
+    measured = {}
+    yield {
+        "scale": calibration / baseline["calibration_ns"],
+        "benchmarks": baseline["benchmarks"],
+        "measured": measured,
+    }
+
+    if request.config.getoption("--perf-update-baseline") and measured:
+        BASELINE_FILE.write_text(
+            json.dumps(
+                {
+                    "calibration_ns": round(calibration, 1),
+                    "benchmarks": dict(sorted(measured.items())),
+                },
+                indent=2,
+            )
+            + "\n"
+        )
+
+
+@pytest.fixture(autouse=True)
+def regression_gate(request, perf_baseline):
+    """Fail a benchmark whose fastest round regressed past the threshold."""
+    yield
+    benchmark = request.node.funcargs.get("benchmark")
+    if benchmark is None or benchmark.stats is None:
+        return
+
+    name = request.node.name
+    best_ns = benchmark.stats.stats.min * 1e9
+    perf_baseline["measured"][name] = round(best_ns, 1)
+    if request.config.getoption("--perf-update-baseline"):
+        return
+
+    expected_ns = perf_baseline["benchmarks"].get(name)
+    if expected_ns is None:
+        pytest.fail(f"No baseline for {name}; run with --perf-update-baseline")
+
+    threshold = request.config.getoption("--perf-regression-threshold")
+    allowed_ns = expected_ns * perf_baseline["scale"] * (1 + threshold)
+    if best_ns > allowed_ns:
+        pytest.fail(
+            f"{name} regressed: {best_ns:.0f} ns > allowed "
+            f"{allowed_ns:.0f} ns (baseline {expected_ns:.0f} ns, "
+            f"machine scale {perf_baseline['scale']:.2f}, threshold {threshold:.0%})"
+        )
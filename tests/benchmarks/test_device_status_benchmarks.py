@@ -0,0 +1,67 @@
+"""Benchmarks for the full device_status request paths under moto."""
+
+import json
+import logging
+import os
+from unittest.mock import patch
+
+import boto3
+import common_utils
+import lambda_local
+import pytest
+from moto import mock_aws
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.fixture(scope="module")
+def device_status():
+    """A warm device_status container backed by moto."""
+    function = lambda_local.discover_functions()["device_status"]
+    with (
+        patch.dict(
+            os.environ, {"ENVIRONMENT": "test", "AWS_DEFAULT_REGION": "us-east-2"}
+        ),
+        mock_aws(),
+    ):
+        lambda_local.create_tables(function["config"], boto3.client("dynamodb"))
+        handler = lambda_local.load_handler(function)
+
+        # Log I/O is benchmarked by test_setup_logger, not per request
+        logging.disable(logging.INFO)
+        common_utils.set_structured_log_sink(lambda line: None)
+        try:
+            yield function, handler
+        finally:
+            common_utils.set_structured_log_sink(None)
+            logging.disable(logging.NOTSET)
+
+
+def test_device_status_post(benchmark, device_status):
+    """Full POST path: validation, PutItem and response."""
+    function, handler = device_status
+    event = lambda_local.build_api_event(
+        "POST",
+        "/device_status",
+        body={"device_id": "dev-123", "status": "active", "battery_level": 85},
+    )
+
+    response = benchmark(handler, event, lambda_local.context_for(function))
+    assert response["statusCode"] == 200
+
+
+def test_device_status_get(benchmark, device_status):
+    """Full GET path: GetItem and Decimal-aware serialization."""
+    function, handler = device_status
+    handler(
+        lambda_local.build_api_event(
+            "POST", "/device_status", body={"device_id": "dev-123", "status": "idle"}
+        ),
+        lambda_local.context_for(function),
+    )
+    event = lambda_local.build_api_event(
+        "GET", "/device_status/dev-123", path_parameters={"device_id": "dev-123"}
+    )
+
+    response = benchmark(handler, event, lambda_local.context_for(function))
+    assert json.loads(response["body"])["device_id"] == "dev-123"
@@ -0,0 +1,83 @@
+"""Benchmarks for shared-layer hot paths."""
+
+import json
+import logging
+import os
+from decimal import Decimal
+from unittest.mock import patch
+
+import boto3
+import common_utils
+import pytest
+from moto import mock_aws
+
+pytest.importorskip("pytest_benchmark")
+
+DEVICE_ITEM = {
+    "device_id": "dev-123",
+    "status": "active",
+    "last_updated": "2024-01-01T00:00:00+00:00",
+    "battery_level": Decimal("85"),
+    "connection_strength": Decimal("4"),
+    "firmware_version": "1.2.3",
+}
+
+
+@pytest.fixture(autouse=True)
+def quiet_structured_logs():
+    """Keep EMF and trace summary lines out of the captured output."""
+    common_utils.set_structured_log_sink(lambda line: None)
+    yield
+    common_utils.set_structured_log_sink(None)
+
+
+@pytest.fixture
+def aws():
+    """Moto-backed AWS with the test devices table."""
+    with patch.dict(os.environ, {"AWS_DEFAULT_REGION": "us-east-2"}), mock_aws():
+        boto3.client("dynamodb").create_table(
+            TableName="test-devices",
+            KeySchema=[{"AttributeName": "device_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "device_id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        yield
+
+
+def test_format_response(benchmark):
+    """Serialize a DynamoDB device item into an API Gateway response."""
+    response = benchmark(common_utils.format_response, 200, DEVICE_ITEM)
+    assert json.loads(response["body"])["battery_level"] == 85
+
+
+def test_extract_body(benchmark):
+    """Parse a JSON request body."""
+    event = {"body": json.dumps({k: str(v) for k, v in DEVICE_ITEM.items()})}
+    body = benchmark(common_utils.extract_body, event)
+    assert body["device_id"] == "dev-123"
+
+
+def test_get_dynamodb_table(benchmark, aws):
+    """Create a table resource, including the boto3 resource and hooks."""
+    table = benchmark(common_utils.get_dynamodb_table, "devices")
+    assert table.name == "test-devices"
+
+
+def test_setup_logger(benchmark):
+    """Reconfigure the root logger, as handle_error does per invocation."""
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    try:
+        logger = benchmark(common_utils.setup_logger)
+        assert len(logger.handlers) == 1
+    finally:
+        root.handlers[:] = handlers
+        root.setLevel(level)
+
+
+def test_handle_error_wrapping(benchmark):
+    """Per-invocation overhead of handle_error around a trivial handler."""
+    handler = common_utils.handle_error(lambda event, context: {"statusCode": 200})
+    with patch.object(common_utils, "_invocation_count", 1):
+        response = benchmark(handler, {"httpMethod": "GET"}, {})
+    assert response == {"statusCode": 200}
@@ -35,6 +35,9 @@ if LAMBDA_DIR.exists():
 # Also ensure tests directory is in the path
 sys.path.insert(0, str(PROJECT_ROOT / "tests"))
 
+# Make developer tooling under scripts/ importable for its tests
+sys.path.insert(0, str(PROJECT_ROOT / "scripts"))
+
 
 @pytest.fixture(autouse=True)
 def setup_test_environment():
@@ -68,6 +71,67 @@ def mock_dynamodb(mock_boto3):
     return mock_table
 
 
+@pytest.fixture(scope="session")
+def moto_server():
+    """Start one moto server for this process and return its URL.
+
+    Session scope is per process, so under pytest-xdist each worker starts
+    its own server and setup is paid once per worker, not once per test.
+    """
+    from aws_helpers import start_moto_server
+
+    server, url = start_moto_server()
+    yield url
+    server.stop()
+
+
+@pytest.fixture
+def aws_namespace():
+    """Return a prefix unique to this test for naming AWS resources."""
+    from aws_helpers import new_namespace
+
+    return new_namespace()
+
+
+@pytest.fixture
+def moto_endpoint(moto_server, aws_namespace):
+    """Send boto3 calls made during the test to the shared moto server.
+
+    ENVIRONMENT becomes "<namespace>-test", so get_dynamodb_table resolves
+    names to the tables function_tables creates, and tests sharing the server
+    never see each other's data. Yields that environment name.
+    """
+    environment = f"{aws_namespace}-test"
+    with patch.dict(
+        os.environ, {"AWS_ENDPOINT_URL": moto_server, "ENVIRONMENT": environment}
+    ):
+        yield environment
+
+
+@pytest.fixture
+def function_tables(moto_endpoint):
+    """Return a factory creating a function's tables on the moto server.
+
+    function_tables("payment_status") creates the tables of its function.json
+    and returns {logical name: Table}. They are deleted after the test.
+    """
+    import boto3
+    from aws_helpers import create_function_tables
+
+    client = boto3.client("dynamodb")
+    dynamodb = boto3.resource("dynamodb")
+    created = []
+
+    def create(function_name):
+        names = create_function_tables(function_name, client, moto_endpoint)
+        created.extend(names.values())
+        return {name: dynamodb.Table(table) for name, table in names.items()}
+
+    yield create
+    for table in created:
+        client.delete_table(TableName=table)
+
+
 # Add some debugging output that will be visible when running tests
 print(f"Project root: {PROJECT_ROOT}")
 print(f"Python path: {sys.path[:5]}")  # Show first 5 entries in sys.path
@@ -29,125 +29,46 @@ def environment(request):
     return request.config.getoption("--env")
 
 
-@pytest.fixture(scope="session")
-def api_url(environment, aws_credentials):
-    """Get the base API URL for the specified environment."""
-    # First check if we have an environment variable override
-    env_var_url = os.environ.get(f"API_URL_{environment.upper()}")
-    if env_var_url:
-        print(f"Using API URL from environment variable: {env_var_url}")
-        return env_var_url
-
-    # Fallback URLs if API Gateway lookup fails
-    fallback_urls = {
-        "dev": "https://api-dev.example.com",
-        "staging": "https://api-staging.example.com",
-        "prod": "https://api.example.com",
-    }
-
-    try:
-        # First, try HTTP API (API Gateway v2)
-        apigwv2_client = boto3.client(
-            "apigatewayv2",
-            region_name=aws_credentials["region_name"],
-            aws_access_key_id=aws_credentials["aws_access_key_id"],
-            aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-            aws_session_token=aws_credentials.get("aws_session_token"),
-        )
+def _api_mocked(config):
+    """Return True if API calls are answered by the mock_api fixture.
 
-        # List all HTTP APIs
-        try:
-            http_apis = apigwv2_client.get_apis()
-
-            # Find HTTP API for current environment
-            http_api_id = None
-            for api in http_apis.get("Items", []):
-                if environment in api.get("Name", "").lower():
-                    http_api_id = api.get("ApiId")
-                    break
-
-            if http_api_id:
-                # Get stages for the HTTP API
-                http_stages = apigwv2_client.get_stages(ApiId=http_api_id)
-                http_stage_name = None
-
-                # Find the stage matching our environment
-                for stage in http_stages.get("Items", []):
-                    if environment in stage.get("StageName", "").lower():
-                        http_stage_name = stage.get("StageName")
-                        break
-
-                if not http_stage_name:
-                    # If no matching stage, try default
-                    for stage in http_stages.get("Items", []):
-                        if stage.get("StageName") == "default":
-                            http_stage_name = "default"
-                            break
-
-                if not http_stage_name and http_stages.get("Items"):
-                    # Just use the first stage
-                    http_stage_name = http_stages.get("Items")[0].get("StageName")
-
-                if http_stage_name:
-                    # Construct HTTP API URL
-                    api_url = f"https://{http_api_id}.execute-api.{aws_credentials['region_name']}.amazonaws.com/{http_stage_name}"
-                    print(f"Using HTTP API URL from AWS API Gateway v2: {api_url}")
-                    return api_url
-        except Exception as e:
-            print(f"Error checking HTTP APIs: {str(e)}")
-
-        # Fall back to REST API (API Gateway v1) lookup
-        client = boto3.client(
-            "apigateway",
-            region_name=aws_credentials["region_name"],
-            aws_access_key_id=aws_credentials["aws_access_key_id"],
-            aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-            aws_session_token=aws_credentials.get("aws_session_token"),
+    That is the case when:
+    1. MOCK_API environment variable is set to "1" (explicit mocking)
+    2. pytest is run with --mock-api flag
+    3. We're running in CI and ENABLE_REAL_API_CALLS is not set to "1"
+    """
+    return (
+        os.environ.get("MOCK_API", "0") == "1"
+        # Check if we're in a CI environment and real API calls aren't explicitly enabled
+        or (
+            os.environ.get("CI", "0") == "1"
+            and os.environ.get("ENABLE_REAL_API_CALLS", "0") != "1"
         )
+        # Check if --mock-api flag was passed to pytest
+        or config.getoption("--mock-api", default=False)
+    )
 
-        # List all REST APIs
-        apis = client.get_rest_apis()
-
-        # Find the API for the current environment (assumes API name contains environment)
-        api_id = None
-        for api in apis.get("items", []):
-            if environment in api.get("name", "").lower():
-                api_id = api.get("id")
-                break
-
-        if not api_id:
-            print(
-                f"Warning: No API found for environment '{environment}', using fallback URL"
-            )
-            return fallback_urls.get(environment)
-
-        # Get the current stage for this environment
-        stages = client.get_stages(restApiId=api_id)
-        stage_name = None
-
-        # Find the stage matching our environment
-        for stage in stages.get("item", []):
-            if environment in stage.get("stageName", "").lower():
-                stage_name = stage.get("stageName")
-                break
-
-        if not stage_name:
-            # If no matching stage, use the first one
-            stage_name = stages.get("item", [{}])[0].get("stageName")
 
-        if not stage_name:
-            print(f"Warning: No stage found for API '{api_id}', using fallback URL")
-            return fallback_urls.get(environment)
+@pytest.fixture(scope="session")
+def api_url(request, environment, aws_credentials):
+    """Get the base API URL for the specified environment.
 
-        # Construct the API URL
-        api_url = f"https://{api_id}.execute-api.{aws_credentials['region_name']}.amazonaws.com/{stage_name}"  # noqa: E231
-        print(f"Using REST API URL from AWS API Gateway: {api_url}")
-        return api_url
+    See api_discovery for the lookup order; with mocked API calls no AWS or
+    Terraform call is made.
+    """
+    from api_discovery import resolve_api_url
 
-    except Exception as e:
-        print(f"Error retrieving API URL from AWS API Gateway: {str(e)}")
-        print(f"Using fallback URL for {environment}")
-        return fallback_urls.get(environment)
+    session = boto3.Session(
+        region_name=aws_credentials["region_name"],
+        aws_access_key_id=aws_credentials["aws_access_key_id"],
+        aws_secret_access_key=aws_credentials["aws_secret_access_key"],
+        aws_session_token=aws_credentials.get("aws_session_token"),
+    )
+    url, source = resolve_api_url(
+        environment, session, mock=_api_mocked(request.config)
+    )
+    print(f"Using API URL from {source}: {url}")
+    return url
 
 
 @pytest.fixture(scope="session")
@@ -203,142 +124,106 @@ def use_moto():
 
 
 @pytest.fixture(scope="session")
-def dynamodb_resource(aws_credentials, use_moto):
-    """Create a DynamoDB resource client."""
-    if use_moto["dynamodb"]:
-        import moto
-
-        with moto.mock_dynamodb():
-            dynamodb = boto3.resource(
-                "dynamodb",
-                region_name=aws_credentials["region_name"],
-                aws_access_key_id=aws_credentials["aws_access_key_id"],
-                aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-                aws_session_token=aws_credentials.get("aws_session_token"),
-            )
+def aws_resource_names():
+    """Names of the test resources, namespaced for this worker.
 
-            # Create test tables
-            # devices table
-            dynamodb.create_table(
-                TableName="devices",
-                KeySchema=[{"AttributeName": "device_id", "KeyType": "HASH"}],
-                AttributeDefinitions=[
-                    {"AttributeName": "device_id", "AttributeType": "S"}
-                ],
-                BillingMode="PAY_PER_REQUEST",
-            )
+    Mocked resources live on the worker's shared moto server, so parallel
+    workers and reruns never collide on a hard-coded name.
+    """
+    from aws_helpers import new_namespace
+
+    namespace = new_namespace()
+    return {
+        "environment": f"{namespace}-test",
+        "logs_bucket": f"{namespace}-test-logs",
+        "queue": f"{namespace}-test-queue",
+    }
 
-            print("Created mocked DynamoDB tables")
-            yield dynamodb
-    else:
-        # Use real DynamoDB
-        dynamodb = boto3.resource(
-            "dynamodb",
-            region_name=aws_credentials["region_name"],
-            aws_access_key_id=aws_credentials["aws_access_key_id"],
-            aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-            aws_session_token=aws_credentials.get("aws_session_token"),
-        )
-        yield dynamodb
+
+def _aws_kwargs(aws_credentials, endpoint_url=None):
+    """Keyword arguments for boto3 clients and resources."""
+    kwargs = {
+        "region_name": aws_credentials["region_name"],
+        "aws_access_key_id": aws_credentials["aws_access_key_id"],
+        "aws_secret_access_key": aws_credentials["aws_secret_access_key"],
+        "aws_session_token": aws_credentials.get("aws_session_token"),
+    }
+    if endpoint_url:
+        # moto accepts any credentials, so runs without a profile still work
+        kwargs["endpoint_url"] = endpoint_url
+        kwargs["aws_access_key_id"] = kwargs["aws_access_key_id"] or "testing"
+        kwargs["aws_secret_access_key"] = kwargs["aws_secret_access_key"] or "testing"
+    return kwargs
 
 
 @pytest.fixture(scope="session")
-def s3_resource(aws_credentials, use_moto):
-    """Create an S3 resource client."""
-    if use_moto["s3"]:
-        import moto
-
-        with moto.mock_s3():
-            s3 = boto3.resource(
-                "s3",
-                region_name=aws_credentials["region_name"],
-                aws_access_key_id=aws_credentials["aws_access_key_id"],
-                aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-                aws_session_token=aws_credentials.get("aws_session_token"),
-            )
+def dynamodb_resource(request, aws_credentials, use_moto, aws_resource_names):
+    """Create a DynamoDB resource client."""
+    if not use_moto["dynamodb"]:
+        # Use real DynamoDB
+        yield boto3.resource("dynamodb", **_aws_kwargs(aws_credentials))
+        return
+
+    from aws_helpers import create_function_tables
+
+    moto_server = request.getfixturevalue("moto_server")
+    dynamodb = boto3.resource("dynamodb", **_aws_kwargs(aws_credentials, moto_server))
+    # Same schema as the deployed table, from the function's function.json
+    create_function_tables(
+        "device_status",
+        dynamodb.meta.client,
+        aws_resource_names["environment"],
+    )
+    print("Created mocked DynamoDB tables")
+    yield dynamodb
 
-            # Create test buckets
-            # logs bucket
-            s3.create_bucket(
-                Bucket="test-logs",
-                CreateBucketConfiguration={
-                    "LocationConstraint": aws_credentials["region_name"]
-                },
-            )
 
-            print("Created mocked S3 buckets")
-            yield s3
-    else:
+@pytest.fixture(scope="session")
+def s3_resource(request, aws_credentials, use_moto, aws_resource_names):
+    """Create an S3 resource client."""
+    if not use_moto["s3"]:
         # Use real S3
-        s3 = boto3.resource(
-            "s3",
-            region_name=aws_credentials["region_name"],
-            aws_access_key_id=aws_credentials["aws_access_key_id"],
-            aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-            aws_session_token=aws_credentials.get("aws_session_token"),
-        )
-        yield s3
+        yield boto3.resource("s3", **_aws_kwargs(aws_credentials))
+        return
+
+    moto_server = request.getfixturevalue("moto_server")
+    s3 = boto3.resource("s3", **_aws_kwargs(aws_credentials, moto_server))
+    s3.create_bucket(
+        Bucket=aws_resource_names["logs_bucket"],
+        CreateBucketConfiguration={
+            "LocationConstraint": aws_credentials["region_name"]
+        },
+    )
+    print("Created mocked S3 buckets")
+    yield s3
 
 
 @pytest.fixture(scope="session")
-def sqs_resource(aws_credentials, use_moto):
+def sqs_resource(request, aws_credentials, use_moto, aws_resource_names):
     """Create an SQS resource client."""
-    if use_moto["sqs"]:
-        import moto
-
-        with moto.mock_sqs():
-            sqs = boto3.resource(
-                "sqs",
-                region_name=aws_credentials["region_name"],
-                aws_access_key_id=aws_credentials["aws_access_key_id"],
-                aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-                aws_session_token=aws_credentials.get("aws_session_token"),
-            )
-
-            # Create test queues
-            sqs.create_queue(QueueName="test-queue")
-
-            print("Created mocked SQS queues")
-            yield sqs
-    else:
+    if not use_moto["sqs"]:
         # Use real SQS
-        sqs = boto3.resource(
-            "sqs",
-            region_name=aws_credentials["region_name"],
-            aws_access_key_id=aws_credentials["aws_access_key_id"],
-            aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-            aws_session_token=aws_credentials.get("aws_session_token"),
-        )
-        yield sqs
+        yield boto3.resource("sqs", **_aws_kwargs(aws_credentials))
+        return
+
+    moto_server = request.getfixturevalue("moto_server")
+    sqs = boto3.resource("sqs", **_aws_kwargs(aws_credentials, moto_server))
+    sqs.create_queue(QueueName=aws_resource_names["queue"])
+    print("Created mocked SQS queues")
+    yield sqs
 
 
 @pytest.fixture(scope="session")
-def lambda_client(aws_credentials, use_moto):
+def lambda_client(request, aws_credentials, use_moto):
     """Create a Lambda client."""
-    if use_moto["lambda"]:
-        import moto
-
-        with moto.mock_lambda():
-            lambda_client = boto3.client(
-                "lambda",
-                region_name=aws_credentials["region_name"],
-                aws_access_key_id=aws_credentials["aws_access_key_id"],
-                aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-                aws_session_token=aws_credentials.get("aws_session_token"),
-            )
-
-            print("Mocking Lambda client")
-            yield lambda_client
-    else:
+    if not use_moto["lambda"]:
         # Use real Lambda client
-        lambda_client = boto3.client(
-            "lambda",
-            region_name=aws_credentials["region_name"],
-            aws_access_key_id=aws_credentials["aws_access_key_id"],
-            aws_secret_access_key=aws_credentials["aws_secret_access_key"],
-            aws_session_token=aws_credentials.get("aws_session_token"),
-        )
-        yield lambda_client
+        yield boto3.client("lambda", **_aws_kwargs(aws_credentials))
+        return
+
+    moto_server = request.getfixturevalue("moto_server")
+    print("Mocking Lambda client")
+    yield boto3.client("lambda", **_aws_kwargs(aws_credentials, moto_server))
 
 
 @pytest.fixture(scope="session")
@@ -454,16 +339,7 @@ def mock_api(request, api_url):
     3. We're running in CI and ENABLE_REAL_API_CALLS is not set to "1"
     """
     # Check if we should mock API calls
-    should_mock = (
-        os.environ.get("MOCK_API", "0") == "1"
-        # Check if we're in a CI environment and real API calls aren't explicitly enabled
-        or (
-            os.environ.get("CI", "0") == "1"
-            and os.environ.get("ENABLE_REAL_API_CALLS", "0") != "1"
-        )
-        # Check if --mock-api flag was passed to pytest
-        or request.config.getoption("--mock-api", default=False)
-    )
+    should_mock = _api_mocked(request.config)
 
     # Add some debug output
     print(f"API mocking {'enabled' if should_mock else 'disabled'}")
@@ -557,14 +433,39 @@ def mock_api(request, api_url):
         yield None
 
 
+@pytest.fixture(scope="module", params=["http", "in-process"])
+def local_api_url(request):
+    """Serve the real handlers through the local API Gateway emulator.
+
+    AWS calls go to moto, so tests using this URL need no deployed stack.
+    Each test runs twice: over HTTP, and in-process through LambdaAdapter,
+    which hands `requests` calls straight to the handlers without a socket.
+    Module scoped so the moto state does not outlive the tests using it.
+    """
+    from local_api import LocalApiGateway
+
+    gateway = LocalApiGateway(env={"RATE_LIMIT_PER_SECOND": "0"})
+    if request.param == "in-process":
+        with gateway.intercept("http://lambda.local", prewarm=True) as base_url:
+            yield base_url
+        return
+    yield gateway.start(prewarm=True)
+    gateway.stop()
+
+
 @pytest.fixture(scope="session", autouse=True)
-def debug_api_environment(api_url, environment):
+def debug_api_environment(request, api_url, environment):
     """Debug the API environment configuration and print URLs for verification."""
     print("\n====== API ENVIRONMENT DEBUG ======")
     print(f"Environment: {environment}")
     print(f"Base API URL: {api_url}")
     print(f"Device Status endpoint: {api_url}/device-status")
 
+    if _api_mocked(request.config):
+        # Mocked runs never reach the URL, so probing it only costs time
+        print("====================================\n")
+        return api_url
+
     # Try accessing the API to verify it's reachable
     try:
         response = requests.get(f"{api_url}", timeout=5)
@@ -0,0 +1,46 @@
+import uuid
+
+import requests
+
+
+class TestDeviceStatusLocalApi:
+    """End-to-end tests of device_status served by the local API emulator."""
+
+    def test_create_and_get_device_status(self, local_api_url, api_headers):
+        """Test that a created device status can be read back."""
+        # Arrange
+        device_id = f"test-device-{uuid.uuid4()}"
+        device_data = {"device_id": device_id, "status": "online", "battery_level": 85}
+
+        # Act
+        post = requests.post(
+            f"{local_api_url}/device_status", json=device_data, headers=api_headers
+        )
+        get = requests.get(
+            f"{local_api_url}/device_status/{device_id}", headers=api_headers
+        )
+
+        # Assert
+        assert post.status_code == 200
+        assert get.status_code == 200
+        assert get.json()["status"] == "online"
+        assert get.json()["battery_level"] == 85
+
+    def test_missing_field_returns_400(self, local_api_url, api_headers):
+        """Test validation errors pass through with their status code."""
+        response = requests.post(
+            f"{local_api_url}/device_status",
+            json={"status": "online"},
+            headers=api_headers,
+        )
+
+        assert response.status_code == 400
+        assert "device_id" in response.json()["error"]
+
+    def test_unknown_device_returns_404(self, local_api_url, api_headers):
+        """Test that an unknown device returns 404."""
+        response = requests.get(
+            f"{local_api_url}/device_status/does-not-exist", headers=api_headers
+        )
+
+        assert response.status_code == 404
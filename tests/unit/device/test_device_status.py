@@ -203,3 +203,43 @@ def test_update_device_status_with_optional_fields(mock_device_table, mock_logge
     assert item["battery_level"] == 80
     assert item["connection_strength"] == "strong"
     assert item["firmware_version"] == "1.0.0"
+
+
+def test_lambda_handler_warmup_primes_table(mock_device_table, mock_logger):
+    """Test that a warm-up ping primes the table without handling a request."""
+    mock_device_table.name = "test-devices"
+
+    response = lambda_handler({"warmer": True}, {})
+
+    assert response["warmup"] is True
+    mock_device_table.meta.client.describe_table.assert_called_once_with(
+        TableName="test-devices"
+    )
+    mock_device_table.get_item.assert_not_called()
+    mock_logger.info.assert_not_called()
+
+
+def test_repeated_heartbeat_without_key_updates_again(
+    mock_aws_services, mock_device_table, mock_logger
+):
+    """Test that identical heartbeats are not replayed from the payload hash."""
+    import boto3
+
+    boto3.client("dynamodb").create_table(
+        TableName="test-idempotency",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    event = {
+        "httpMethod": "POST",
+        "body": '{"device_id": "dev-123", "status": "active"}',
+    }
+
+    with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": "idempotency"}):
+        first = lambda_handler(event, {})
+        second = lambda_handler(event, {})
+
+    assert (first["statusCode"], second["statusCode"]) == (200, 200)
+    assert mock_device_table.put_item.call_count == 2
+    assert boto3.client("dynamodb").scan(TableName="test-idempotency")["Items"] == []
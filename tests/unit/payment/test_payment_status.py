@@ -0,0 +1,437 @@
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import boto3
+import pytest
+
+# Get the project root directory
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../.."))
+
+# Add necessary paths to sys.path
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "lambda_functions"))
+sys.path.insert(
+    0, os.path.join(PROJECT_ROOT, "lambda_functions", "shared_layer", "python")
+)
+
+# Ensure environment is configured
+from import_helper import configure_aws_environment
+
+configure_aws_environment()
+
+import common_utils
+
+# Keep the handler's priming hook out of the shared list: other tests' warm-up
+# pings would run it against a payments table they never create
+with patch.object(common_utils, "_priming_hooks", list(common_utils._priming_hooks)):
+    from payment.payment_status.index import (
+        lambda_handler,
+        transition_payment,
+    )
+
+
+@pytest.fixture
+def payment_table(function_tables):
+    """Create the tables from function.json and point the handler at them."""
+    tables = function_tables("payment_status")
+    table = tables["payments"]
+    with (
+        patch("payment.payment_status.index.payment_table", table),
+        patch("payment.payment_status.index.ledger_table", tables["payment_ledger"]),
+        patch.dict(os.environ, {"CURSOR_SECRET": "test-secret"}),
+        patch.object(common_utils, "_cursor_keys", []),
+    ):
+        yield table
+
+
+def invoke(
+    method, body=None, payment_id=None, query=None, user_id="user-1", headers=None
+):
+    """Call the handler with an API Gateway event and decode the body."""
+    event = {"httpMethod": method, "headers": headers or {}}
+    if body is not None:
+        event["body"] = json.dumps(body)
+    if payment_id:
+        event["pathParameters"] = {"payment_id": payment_id}
+    if query:
+        event["queryStringParameters"] = query
+    if user_id:
+        event["requestContext"] = {"authorizer": {"claims": {"sub": user_id}}}
+    response = lambda_handler(event, {})
+    return response["statusCode"], json.loads(response["body"])
+
+
+@pytest.fixture
+def pending_payment(payment_table):
+    """Create a pending payment of user-1 through the handler."""
+    status_code, payment = invoke("POST", {"amount": 49.99})
+    assert status_code == 201
+    return payment
+
+
+@pytest.fixture
+def payment_id(pending_payment):
+    """The id the handler assigned to the pending payment."""
+    return pending_payment["payment_id"]
+
+
+def test_create_payment(pending_payment, payment_table):
+    """Test that a new payment starts pending at version 1."""
+    item = payment_table.get_item(Key={"payment_id": pending_payment["payment_id"]})
+    item = item["Item"]
+
+    assert pending_payment["status"] == "pending"
+    assert item["user_id"] == "user-1"
+    assert item["version"] == 1
+    assert str(item["amount"]) == "49.99"
+    assert item["currency"] == "USD"
+
+
+def test_create_payment_validation(payment_table):
+    """Test that invalid payments are rejected before any write."""
+    assert invoke("POST", {"amount": -1})[0] == 400
+    assert invoke("POST", {"amount": "ten"})[0] == 400
+    assert invoke("POST", {"amount": 1, "currency": "DOLLAR"})[0] == 400
+    assert payment_table.scan()["Items"] == []
+
+
+def test_create_payment_rejects_client_chosen_id(payment_table):
+    """Test that payment ids are always assigned by the handler."""
+    status_code, body = invoke("POST", {"payment_id": "pay-1", "amount": 1})
+
+    assert status_code == 400
+    assert body["error"] == "payment_id is assigned by the server"
+
+
+def test_every_request_needs_a_caller(payment_id):
+    """Test that each method returns 401 without an authenticated user."""
+    assert invoke("POST", {"amount": 1}, user_id=None)[0] == 401
+    assert invoke("GET", payment_id=payment_id, user_id=None)[0] == 401
+    assert invoke("GET", user_id=None)[0] == 401
+    assert invoke("PUT", {"status": "authorized"}, payment_id, user_id=None)[0] == 401
+    assert invoke("DELETE", payment_id=payment_id, user_id=None)[0] == 401
+
+
+def test_create_payment_ignores_user_in_body(payment_table):
+    """Test that payments belong to the caller, whatever the body says."""
+    _, payment = invoke("POST", {"user_id": "user-2", "amount": 1})
+
+    assert payment["user_id"] == "user-1"
+
+
+def test_other_users_payments_are_not_found(payment_id, payment_table):
+    """Test that another user can neither read nor change a payment."""
+    assert invoke("GET", payment_id=payment_id, user_id="user-2")[0] == 404
+
+    status_code, body = invoke(
+        "PUT", {"status": "authorized"}, payment_id, user_id="user-2"
+    )
+    assert (status_code, body["error"]) == (404, f"Payment not found: {payment_id}")
+    assert invoke("DELETE", payment_id=payment_id, user_id="user-2")[0] == 404
+
+    item = payment_table.get_item(Key={"payment_id": payment_id})["Item"]
+    assert (item["status"], item["version"]) == ("pending", 1)
+
+
+def test_payment_lifecycle(payment_id):
+    """Test the happy path from pending to refunded."""
+    for version, status in enumerate(["authorized", "captured", "refunded"], 1):
+        status_code, payment = invoke(
+            "PUT", {"status": status, "version": version}, payment_id
+        )
+        assert status_code == 200
+        assert payment["status"] == status
+        assert payment["version"] == version + 1
+
+    status_code, payment = invoke("GET", payment_id=payment_id)
+    assert (status_code, payment["status"]) == (200, "refunded")
+
+
+def test_transition_is_one_transaction(payment_id, payment_table):
+    """Test that a transition is a single TransactWriteItems with no prior read."""
+    client = payment_table.meta.client
+    with (
+        patch.object(client, "get_item") as get_item,
+        patch.object(client, "update_item") as update_item,
+        patch.object(
+            client, "transact_write_items", wraps=client.transact_write_items
+        ) as transact,
+    ):
+        transition_payment(payment_id, "authorized", "user-1", expected_version=1)
+
+    get_item.assert_not_called()
+    update_item.assert_not_called()
+    transact.assert_called_once()
+    payment_update = transact.call_args[1]["TransactItems"][0]["Update"]
+    assert "user_id = :caller" in payment_update["ConditionExpression"]
+    assert "#status IN (:from_pending)" in payment_update["ConditionExpression"]
+
+
+def test_transitions_are_recorded_in_ledger(payment_id):
+    """Test that creation and every transition append a ledger entry."""
+    invoke("PUT", {"status": "authorized", "version": 1}, payment_id)
+    invoke("DELETE", payment_id=payment_id)
+
+    ledger = common_utils.get_dynamodb_table("payment_ledger")
+    entries = ledger.query(
+        KeyConditionExpression="payment_id = :id",
+        ExpressionAttributeValues={":id": payment_id},
+    )["Items"]
+
+    assert {entry["status"]: entry.get("version") for entry in entries} == {
+        "pending": 1,
+        "authorized": 2,
+        "failed": None,
+    }
+    assert next(e for e in entries if e["status"] == "failed")["reason"] == "cancelled"
+
+
+def test_failed_transition_writes_no_ledger_entry(payment_id):
+    """Test that a rejected transition leaves the ledger untouched."""
+    assert invoke("PUT", {"status": "captured"}, payment_id)[0] == 409
+
+    ledger = common_utils.get_dynamodb_table("payment_ledger")
+    item = ledger.get_item(Key={"payment_id": payment_id, "status": "captured"})
+    assert "Item" not in item
+
+
+@pytest.fixture
+def idempotency_table(payment_table, moto_endpoint):
+    """Create the idempotency table and point IDEMPOTENCY_TABLE at it."""
+    boto3.client("dynamodb").create_table(
+        TableName=f"{moto_endpoint}-idempotency",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    with (
+        patch.dict(os.environ, {"IDEMPOTENCY_TABLE": "idempotency"}),
+        patch.object(common_utils, "_idempotency_tables", {}),
+    ):
+        yield common_utils.get_dynamodb_table("idempotency")
+
+
+def test_transition_replays_idempotent_response(payment_id, idempotency_table):
+    """Test that a repeated request is answered from its idempotency record."""
+    headers = {"Idempotency-Key": "authorize-1"}
+    first = invoke("PUT", {"status": "authorized"}, payment_id, headers=headers)
+    second = invoke("PUT", {"status": "authorized"}, payment_id, headers=headers)
+
+    assert first == second
+    assert first[1]["status"] == "authorized"
+
+
+def test_create_replays_idempotent_response(payment_table, idempotency_table):
+    """Test that a retried create returns the first payment, not a new one."""
+    headers = {"Idempotency-Key": "create-1"}
+    first = invoke("POST", {"amount": 49.99}, headers=headers)
+    second = invoke("POST", {"amount": 49.99}, headers=headers)
+
+    assert first == second
+    assert first[0] == 201
+    assert payment_table.scan()["Count"] == 1
+    assert idempotency_table.scan()["Items"][0]["status"] == "COMPLETED"
+
+
+def test_identical_creates_without_key_are_separate_payments(
+    payment_table, idempotency_table
+):
+    """Test that the idempotency key is never derived from the payload."""
+    first = invoke("POST", {"amount": 49.99})
+    second = invoke("POST", {"amount": 49.99})
+
+    assert (first[0], second[0]) == (201, 201)
+    assert first[1]["payment_id"] != second[1]["payment_id"]
+    assert payment_table.scan()["Count"] == 2
+    assert idempotency_table.scan()["Items"] == []
+
+
+def test_transaction_conflict_is_retryable(payment_id):
+    """Test that exhausted conflict retries are not reported as 404 or 409."""
+    cancelled = common_utils.TransactionCancelled(
+        {"payment": "TransactionConflict", "ledger": "TransactionConflict"}
+    )
+
+    with patch.object(common_utils.Transaction, "write", side_effect=cancelled):
+        for method, body in (
+            ("PUT", {"status": "authorized"}),
+            ("POST", {"amount": 5}),
+        ):
+            event = {
+                "httpMethod": method,
+                "body": json.dumps(body),
+                "pathParameters": {"payment_id": payment_id},
+                "requestContext": {"authorizer": {"claims": {"sub": "user-1"}}},
+            }
+            response = lambda_handler(event, {})
+
+            assert response["statusCode"] == 409
+            assert response["headers"]["Retry-After"] == "1"
+            assert "concurrently" in json.loads(response["body"])["error"]
+
+
+def test_null_body_is_treated_as_empty(payment_id):
+    """Test REST events with "body": null on every method that reads a body."""
+
+    def send(method):
+        event = {
+            "httpMethod": method,
+            "body": None,
+            "pathParameters": {"payment_id": payment_id},
+            "requestContext": {"authorizer": {"claims": {"sub": "user-1"}}},
+        }
+        response = lambda_handler(event, {})
+        return response["statusCode"], json.loads(response["body"])
+
+    assert send("POST") == (400, {"error": "amount must be a number"})
+    status_code, body = send("PUT")
+    assert status_code == 400 and body["error"].startswith("status must be one of")
+    status_code, payment = send("DELETE")
+    assert (status_code, payment["status"]) == (200, "failed")
+    assert payment["status_reason"] == "cancelled"
+
+
+def test_disallowed_transition_returns_409(payment_id):
+    """Test that a payment cannot skip authorization."""
+    status_code, body = invoke("PUT", {"status": "captured"}, payment_id)
+
+    assert status_code == 409
+    assert body["error"] == "Cannot move payment from pending to captured"
+    assert (body["status"], body["version"]) == ("pending", 1)
+
+
+def test_stale_version_returns_409(payment_id):
+    """Test that an update based on an old version is rejected."""
+    invoke("PUT", {"status": "authorized", "version": 1}, payment_id)
+
+    status_code, body = invoke("PUT", {"status": "failed", "version": 1}, payment_id)
+
+    assert status_code == 409
+    assert body["version"] == 2
+
+
+def test_repeated_transition_is_accepted(payment_id):
+    """Test that a retried webhook for an applied transition succeeds."""
+    assert invoke("PUT", {"status": "authorized", "version": 1}, payment_id)[0] == 200
+
+    status_code, payment = invoke(
+        "PUT", {"status": "authorized", "version": 1}, payment_id
+    )
+
+    assert status_code == 200
+    assert payment["version"] == 2
+
+
+def test_transition_unknown_payment_returns_404(payment_table):
+    """Test that transitions on missing payments return 404."""
+    status_code, body = invoke("PUT", {"status": "authorized"}, "missing")
+
+    assert status_code == 404
+    assert body["error"] == "Payment not found: missing"
+
+
+def test_transition_validation(payment_id):
+    """Test that unknown statuses and bad versions are rejected."""
+    assert invoke("PUT", {"status": "pending"}, payment_id)[0] == 400
+    assert invoke("PUT", {"status": "authorized", "version": "1"}, payment_id)[0] == 400
+
+
+def test_delete_cancels_payment(payment_id):
+    """Test that DELETE fails a payment that has not been captured."""
+    status_code, payment = invoke("DELETE", payment_id=payment_id)
+
+    assert status_code == 200
+    assert payment["status"] == "failed"
+    assert payment["status_reason"] == "cancelled"
+
+
+def test_get_payment_not_found(payment_table):
+    """Test that an unknown payment returns 404."""
+    assert invoke("GET", payment_id="missing")[0] == 404
+
+
+@pytest.fixture
+def user_payments(payment_table):
+    """Create five payments for user-1 and one for user-2."""
+    for i in range(5):
+        payment_table.put_item(
+            Item={
+                "payment_id": f"pay-{i}",
+                "user_id": "user-1",
+                "amount": i + 1,
+                "currency": "USD",
+                "status": "pending",
+                "version": 1,
+                "created_at": f"2024-01-0{i + 1}T00:00:00+00:00",
+                "updated_at": f"2024-01-0{i + 1}T00:00:00+00:00",
+            }
+        )
+    payment_table.put_item(
+        Item={
+            "payment_id": "other",
+            "user_id": "user-2",
+            "created_at": "2024-01-01T00:00:00+00:00",
+        }
+    )
+
+
+def test_list_payments_pages_with_cursor(user_payments):
+    """Test newest-first pages of the caller's payments only."""
+    status_code, page = invoke("GET", query={"limit": "2"}, user_id="user-1")
+    seen = [item["payment_id"] for item in page["items"]]
+    while page["next_cursor"]:
+        status_code, page = invoke(
+            "GET", query={"limit": "2", "cursor": page["next_cursor"]}, user_id="user-1"
+        )
+        assert status_code == 200
+        seen += [item["payment_id"] for item in page["items"]]
+
+    assert seen == ["pay-4", "pay-3", "pay-2", "pay-1", "pay-0"]
+
+
+def test_list_payments_returns_summary_fields(user_payments):
+    """Test that listed payments carry only the summary projection."""
+    _, page = invoke("GET", query={"limit": "1"}, user_id="user-1")
+
+    assert set(page["items"][0]) == {
+        "payment_id",
+        "status",
+        "amount",
+        "currency",
+        "created_at",
+        "updated_at",
+    }
+
+
+def test_list_payments_is_one_query(user_payments, payment_table):
+    """Test that a page is a single index Query, never a scan."""
+    client = payment_table.meta.client
+    with (
+        patch.object(client, "query", wraps=client.query) as query,
+        patch.object(client, "scan") as scan,
+    ):
+        invoke("GET", query={"limit": "3"}, user_id="user-1")
+
+    query.assert_called_once()
+    assert query.call_args[1]["IndexName"] == "user_id-created_at-index"
+    assert query.call_args[1]["Limit"] == 3
+    scan.assert_not_called()
+
+
+def test_list_payments_rejects_foreign_or_tampered_cursor(user_payments):
+    """Test that a cursor only works for the user it was issued to."""
+    _, page = invoke("GET", query={"limit": "1"}, user_id="user-1")
+    cursor = page["next_cursor"]
+
+    assert invoke("GET", query={"cursor": cursor}, user_id="user-2")[0] == 400
+    assert invoke("GET", query={"cursor": cursor[:-2]}, user_id="user-1")[0] == 400
+
+
+def test_list_payments_validation(user_payments):
+    """Test that listing requires a caller and a sane page size."""
+    assert invoke("GET", user_id=None)[0] == 401
+    assert invoke("GET", query={"limit": "0"}, user_id="user-1")[0] == 400
+    assert invoke("GET", query={"limit": "1000"}, user_id="user-1")[0] == 400
+    assert invoke("GET", query={"limit": "ten"}, user_id="user-1")[0] == 400
@@ -0,0 +1,131 @@
+import sys
+import zipfile
+
+import build_layer
+import pytest
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   encodings
+import time:       300 |        420 | site
+import time:        50 |         50 |       _json
+import time:       400 |        450 |     json.decoder
+import time:       900 |        900 |   boto3
+import time:       200 |       1550 | common_utils
+"""
+
+
+@pytest.fixture
+def site_dir(tmp_path):
+    """Create an installed-looking layer with the usual bloat."""
+    site = tmp_path / "python"
+    files = {
+        "botocore/__init__.py": "",
+        "botocore/data/endpoints.json": "{}",
+        "botocore/data/dynamodb/2012-08-10/service-2.json": "{}",
+        "botocore/data/ec2/2016-11-15/service-2.json": "{}" * 100,
+        "boto3/data/dynamodb/2012-08-10/resources-1.json": "{}",
+        "boto3/data/sqs/2012-11-05/resources-1.json": "{}",
+        "requests/__init__.py": "VALUE = 1\n",
+        "requests/tests/test_api.py": "",
+        "requests/__pycache__/__init__.cpython-39.pyc": "x",
+        "requests-2.31.0.dist-info/METADATA": "Name: requests",
+        "requests-2.31.0.dist-info/RECORD": "requests/__init__.py,,",
+        "bin/normalizer": "#!/bin/sh",
+        "common_utils.py": "import requests\n",
+    }
+    for name, content in files.items():
+        (site / name).parent.mkdir(parents=True, exist_ok=True)
+        (site / name).write_text(content)
+    return site
+
+
+def test_strip_layer_removes_bloat(site_dir):
+    """Test that only files the runtime never needs are deleted."""
+    removed = build_layer.strip_layer(site_dir, {"dynamodb"})
+
+    remaining = {
+        p.relative_to(site_dir).as_posix() for p in site_dir.rglob("*") if p.is_file()
+    }
+    assert remaining == {
+        "botocore/__init__.py",
+        "botocore/data/endpoints.json",
+        "botocore/data/dynamodb/2012-08-10/service-2.json",
+        "boto3/data/dynamodb/2012-08-10/resources-1.json",
+        "requests/__init__.py",
+        "requests-2.31.0.dist-info/METADATA",
+        "common_utils.py",
+    }
+    assert set(removed) == {
+        "tests",
+        "stale_bytecode",
+        "dist_info",
+        "scripts",
+        "service_models",
+    }
+    assert removed["service_models"] == 202
+
+
+def test_precompile_writes_unchecked_hash_bytecode(site_dir):
+    """Test that modules are compiled for the interpreter and layer mount."""
+    build_layer.strip_layer(site_dir, {"dynamodb"})
+    build_layer.precompile(site_dir, sys.executable)
+
+    tag = sys.implementation.cache_tag
+    pyc = site_dir / "requests" / "__pycache__" / f"__init__.{tag}.pyc"
+    # Flags word: bit 0 = hash-based, bit 1 = check source
+    assert int.from_bytes(pyc.read_bytes()[4:8], "little") == 0b01
+    assert b"/opt/python/requests/__init__.py" in pyc.read_bytes()
+
+
+def test_used_services_scans_client_calls(tmp_path):
+    """Test that services come from boto3 client and resource calls."""
+    (tmp_path / "index.py").write_text(
+        'boto3.client("iot-data")\nboto3.resource( "dynamodb")\n'
+    )
+
+    assert build_layer.used_services([tmp_path]) == {"iot-data", "dynamodb", "sts"}
+
+
+def test_unpinned_requirements(tmp_path):
+    """Test that only exact pins count as pinned."""
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text("boto3==1.34.0\nrequests>=2.28  # http\n# comment\n")
+
+    assert build_layer.unpinned_requirements(requirements) == ["requests>=2.28"]
+
+
+def test_parse_importtime():
+    """Test that only the measured import's subtree is summarised."""
+    summary = build_layer.parse_importtime(IMPORTTIME, "common_utils", count=2)
+
+    assert summary == {
+        "total_us": 1550,
+        "slowest": [("boto3", 900), ("json.decoder", 400)],
+    }
+    assert build_layer.parse_importtime(IMPORTTIME, "missing") is None
+
+
+def test_build_layer_without_install_is_cached(tmp_path):
+    """Test the layer zip layout, report and reuse of an unchanged build."""
+    options = {
+        "output_dir": tmp_path / "out",
+        "staging_dir": tmp_path / "staging",
+        "python": sys.executable,
+        "install": False,
+    }
+    entry, report = build_layer.build_layer(**options)
+
+    assert entry["path"] == f"{build_layer.LAYER_NAME}.zip"
+    with zipfile.ZipFile(tmp_path / "out" / entry["path"]) as archive:
+        names = archive.namelist()
+    tag = sys.implementation.cache_tag
+    assert "python/common_utils.py" in names
+    assert f"python/__pycache__/common_utils.{tag}.pyc" in names
+    assert "python/requirements.txt" not in names
+    assert report["status"] == "built"
+    assert report["import_time"]["total_us"] > 0
+
+    cached_entry, cached_report = build_layer.build_layer(**options)
+    assert cached_report == {"status": "cached"}
+    assert cached_entry == entry
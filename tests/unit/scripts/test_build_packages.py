@@ -0,0 +1,124 @@
+import base64
+import hashlib
+import json
+import os
+import zipfile
+from unittest.mock import patch
+
+import build_packages
+import pytest
+
+
+@pytest.fixture
+def functions(tmp_path):
+    """Create two small functions with a function.json each."""
+    functions = {}
+    for name in ("alpha", "beta"):
+        source = tmp_path / "src" / name
+        (source / "__pycache__").mkdir(parents=True)
+        (source / "function.json").write_text(json.dumps({"name": name}))
+        (source / "index.py").write_text(f"NAME = {name!r}\n")
+        (source / "__pycache__" / "index.cpython-311.pyc").write_bytes(b"\0")
+        (source / ".env").write_text("SECRET=1\n")
+        functions[name] = {"name": name, "dir": source, "config": {"name": name}}
+    return functions
+
+
+def test_zips_are_reproducible(functions, tmp_path):
+    """Test that timestamps and build location do not change the bytes."""
+    first, _ = build_packages.build_packages(functions, tmp_path / "one", jobs=1)
+    index = functions["alpha"]["dir"] / "index.py"
+    os.utime(index, (0, 0))
+    second, _ = build_packages.build_packages(functions, tmp_path / "two", jobs=1)
+
+    for name in functions:
+        assert (tmp_path / "one" / f"{name}.zip").read_bytes() == (
+            tmp_path / "two" / f"{name}.zip"
+        ).read_bytes()
+        assert (
+            first["functions"][name]["source_code_hash"]
+            == second["functions"][name]["source_code_hash"]
+        )
+
+
+def test_zip_layout(functions, tmp_path):
+    """Test sorted entries, fixed timestamps, modes and exclusions."""
+    (functions["alpha"]["dir"] / "run.sh").write_text("#!/bin/sh\n")
+    (functions["alpha"]["dir"] / "run.sh").chmod(0o775)
+    manifest, _ = build_packages.build_packages(functions, tmp_path / "out", jobs=1)
+
+    with zipfile.ZipFile(tmp_path / "out" / "alpha.zip") as archive:
+        infos = archive.infolist()
+
+    assert [info.filename for info in infos] == ["function.json", "index.py", "run.sh"]
+    assert {info.date_time for info in infos} == {build_packages.ZIP_DATE_TIME}
+    assert [info.external_attr >> 16 & 0o777 for info in infos] == [
+        0o644,
+        0o644,
+        0o755,
+    ]
+    digest = hashlib.sha256((tmp_path / "out" / "alpha.zip").read_bytes()).digest()
+    assert manifest["functions"]["alpha"]["source_code_hash"] == (
+        base64.b64encode(digest).decode()
+    )
+
+
+def test_unchanged_functions_are_cached(functions, tmp_path):
+    """Test that only functions whose contents changed are rebuilt."""
+    output_dir = tmp_path / "out"
+    _, statuses = build_packages.build_packages(functions, output_dir, jobs=1)
+    assert statuses == {"alpha": "built", "beta": "built"}
+
+    (functions["beta"]["dir"] / "index.py").write_text("NAME = 'changed'\n")
+    with patch.object(
+        build_packages, "build_package", wraps=build_packages.build_package
+    ) as build:
+        manifest, statuses = build_packages.build_packages(
+            functions, output_dir, jobs=1
+        )
+
+    assert statuses == {"alpha": "cached", "beta": "built"}
+    assert build.call_count == 1
+    assert set(manifest["functions"]) == {"alpha", "beta"}
+
+    _, statuses = build_packages.build_packages(
+        functions, output_dir, jobs=1, force=True
+    )
+    assert statuses == {"alpha": "built", "beta": "built"}
+
+
+def test_missing_zip_is_rebuilt(functions, tmp_path):
+    """Test that a cache entry without its zip does not count as current."""
+    output_dir = tmp_path / "out"
+    build_packages.build_packages(functions, output_dir, jobs=1)
+    (output_dir / "alpha.zip").unlink()
+
+    _, statuses = build_packages.build_packages(functions, output_dir, jobs=1)
+
+    assert statuses["alpha"] == "built"
+    assert (output_dir / "alpha.zip").exists()
+
+
+def test_parallel_build_matches_serial(functions, tmp_path):
+    """Test that building in a process pool gives the same packages."""
+    serial, _ = build_packages.build_packages(functions, tmp_path / "serial", jobs=1)
+    parallel, _ = build_packages.build_packages(
+        functions, tmp_path / "parallel", jobs=2
+    )
+
+    for name in functions:
+        assert (
+            serial["functions"][name]["source_code_hash"]
+            == parallel["functions"][name]["source_code_hash"]
+        )
+
+
+def test_manifest_paths_are_relative(functions, tmp_path):
+    """Test that a moved output directory keeps its manifest and cache valid."""
+    manifest, _ = build_packages.build_packages(functions, tmp_path / "out", jobs=1)
+    assert manifest["functions"]["alpha"]["path"] == "alpha.zip"
+
+    (tmp_path / "out").rename(tmp_path / "moved")
+    _, statuses = build_packages.build_packages(functions, tmp_path / "moved", jobs=1)
+
+    assert statuses == {"alpha": "cached", "beta": "cached"}
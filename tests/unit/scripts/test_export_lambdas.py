@@ -0,0 +1,163 @@
+import io
+import json
+import zipfile
+
+import boto3
+import export_lambdas
+import pytest
+from moto import mock_aws
+
+REGIONS = ("us-east-1", "eu-west-1")
+
+
+def make_zip(files):
+    """Return the bytes of a zip holding files."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+class FakeStore:
+    """Serves uploaded zips by code location, in place of the presigned URLs."""
+
+    def __init__(self, clients):
+        self.clients = clients
+        self.zips = {}
+        self.fetched = []
+
+    def deploy(self, region, name, files, create=True):
+        code = make_zip(files)
+        client = self.clients[region]
+        if create:
+            role = boto3.client("iam", region_name=region).get_role(RoleName="exporter")
+            client.create_function(
+                FunctionName=name,
+                Runtime="python3.11",
+                Role=role["Role"]["Arn"],
+                Handler="lambda_function.lambda_handler",
+                Code={"ZipFile": code},
+            )
+        else:
+            client.update_function_code(FunctionName=name, ZipFile=code)
+        location = client.get_function(FunctionName=name)["Code"]["Location"]
+        self.zips[location] = code
+
+    def fetch(self, url):
+        self.fetched.append(url)
+        code = self.zips[url]
+        # Arrive in several chunks, as a streamed download would
+        for start in range(0, len(code), 64):
+            end = start + 64
+            yield code[start:end]
+
+
+@pytest.fixture
+def store():
+    """Deploy functions to two mocked regions."""
+    with mock_aws():
+        boto3.client("iam", region_name="us-east-1").create_role(
+            RoleName="exporter", AssumeRolePolicyDocument="{}"
+        )
+        clients = {
+            region: boto3.client("lambda", region_name=region) for region in REGIONS
+        }
+        store = FakeStore(clients)
+        store.deploy(
+            "us-east-1",
+            "orders",
+            {"lambda_function.py": "ORDERS = 1\n", "vendor/lib.py": ""},
+        )
+        store.deploy("eu-west-1", "devices", {"src/index.js": "exports.x = 1\n"})
+        yield store
+
+
+def export(store, output_dir, **kwargs):
+    return export_lambdas.export_all(
+        store.clients, output_dir, jobs=4, fetch=store.fetch, **kwargs
+    )
+
+
+def test_exports_every_region(store, tmp_path):
+    """Test that functions of all regions are extracted under region/function."""
+    results = export(store, tmp_path)
+
+    assert results == {
+        "eu-west-1/devices": "exported",
+        "us-east-1/orders": "exported",
+    }
+    assert (
+        tmp_path / "us-east-1/orders/lambda_function.py"
+    ).read_text() == "ORDERS = 1\n"
+    assert (tmp_path / "us-east-1/orders/vendor/lib.py").exists()
+    assert (tmp_path / "eu-west-1/devices/src/index.js").exists()
+    assert not list(tmp_path.rglob("*.zip"))
+    assert not list(tmp_path.rglob("*.partial"))
+
+
+def test_unchanged_functions_are_skipped(store, tmp_path):
+    """Test that a second run only downloads functions whose code changed."""
+    export(store, tmp_path)
+    store.fetched.clear()
+    store.deploy(
+        "us-east-1", "orders", {"lambda_function.py": "ORDERS = 2\n"}, create=False
+    )
+
+    results = export(store, tmp_path)
+
+    assert results == {
+        "eu-west-1/devices": "unchanged",
+        "us-east-1/orders": "exported",
+    }
+    assert len(store.fetched) == 1
+    assert (
+        tmp_path / "us-east-1/orders/lambda_function.py"
+    ).read_text() == "ORDERS = 2\n"
+    # Files of the previous export are not mixed into the new one
+    assert not (tmp_path / "us-east-1/orders/vendor").exists()
+
+
+def test_interrupted_run_resumes(store, tmp_path):
+    """Test that a failed function is retried while finished ones are kept."""
+    good_fetch = store.fetch
+
+    def failing_fetch(url):
+        if "devices" in url:
+            raise export_lambdas.requests.ConnectionError("connection reset")
+        return good_fetch(url)
+
+    store.fetch = failing_fetch
+    results = export(store, tmp_path)
+    assert results["eu-west-1/devices"] == "failed: connection reset"
+    state = json.loads((tmp_path / export_lambdas.STATE_NAME).read_text())
+    assert list(state["functions"]) == ["us-east-1/orders"]
+
+    store.fetch = good_fetch
+    assert export(store, tmp_path) == {
+        "eu-west-1/devices": "exported",
+        "us-east-1/orders": "unchanged",
+    }
+
+
+def test_corrupt_download_is_rejected(store, tmp_path):
+    """Test that a download not matching CodeSha256 leaves nothing behind."""
+    store.zips = {url: make_zip({"other.py": ""}) for url in store.zips}
+
+    results = export(store, tmp_path)
+
+    assert set(results.values()) == {
+        "failed: downloaded code does not match CodeSha256"
+    }
+    assert not (tmp_path / "us-east-1").exists()
+    assert not (tmp_path / export_lambdas.STATE_NAME).exists()
+
+
+def test_main_only_keeps_renamed_handler(store, tmp_path):
+    """Test that --main-only keeps just the handler, named after the function."""
+    export(store, tmp_path, main_only=True)
+
+    assert [p.name for p in (tmp_path / "us-east-1/orders").iterdir()] == ["orders.py"]
+    assert [p.name for p in (tmp_path / "eu-west-1/devices").iterdir()] == [
+        "devices.js"
+    ]
@@ -0,0 +1,152 @@
+import impacted_functions
+import lambda_local
+import pytest
+
+
+@pytest.fixture(scope="module")
+def repo():
+    """Discover the repository's functions and test groups once."""
+    functions = lambda_local.discover_functions()
+    return functions, impacted_functions.discover_test_groups(functions)
+
+
+def select(repo, *paths):
+    """Run the selection for the given changed paths."""
+    return impacted_functions.select(list(paths), *repo)
+
+
+def test_discover_test_groups(repo):
+    """Test that tests are grouped by the function or tool they cover."""
+    _, groups = repo
+
+    assert groups["device_status"]["unit"] == [
+        "tests/unit/device/test_device_status.py"
+    ]
+    assert "tests/integration/device/test_device_status_local_api.py" in (
+        groups["device_status"]["integration"]
+    )
+    assert groups["payment_status"] == {
+        "unit": ["tests/unit/payment/test_payment_status.py"]
+    }
+    assert "tests/unit/test_fan_out.py" in groups["shared_layer"]["unit"]
+    assert "tests/unit/scripts/test_build_packages.py" in groups["scripts"]["unit"]
+
+
+def test_function_change_selects_only_that_function(repo):
+    """Test that a handler change selects its own tests and package."""
+    selection = select(repo, "lambda_functions/payment/payment_status/index.py")
+
+    assert selection["functions"] == ["payment_status"]
+    assert selection["tests"] == {
+        "payment_status": {"unit": ["tests/unit/payment/test_payment_status.py"]}
+    }
+    assert selection["builds"] == ["payment_status"]
+    assert not (selection["full"] or selection["layer"] or selection["terraform"])
+
+
+def test_shared_layer_change_selects_every_function(repo):
+    """Test that the shared layer impacts every function and the layer."""
+    selection = select(repo, "lambda_functions/shared_layer/python/common_utils.py")
+
+    assert selection["functions"] == ["device_status", "payment_status"]
+    assert set(selection["tests"]) == {
+        "device_status",
+        "payment_status",
+        "shared_layer",
+    }
+    assert selection["builds"] == ["device_status", "payment_status", "shared_layer"]
+    assert not selection["full"]
+
+
+def test_docs_change_selects_nothing(repo):
+    """Test that documentation changes need no tests or builds."""
+    selection = select(repo, "docs/testing_guide.md", "README.md")
+
+    assert selection["tests"] == {} and selection["builds"] == []
+
+
+def test_changed_test_and_tool_select_themselves(repo):
+    """Test that changed tests run and tools run their own group."""
+    selection = select(repo, "tests/unit/test_fan_out.py", "scripts/build_layer.py")
+
+    assert selection["tests"]["shared_layer"] == {
+        "unit": ["tests/unit/test_fan_out.py"]
+    }
+    assert "tests/unit/scripts/test_build_layer.py" in (
+        selection["tests"]["scripts"]["unit"]
+    )
+    assert selection["functions"] == []
+
+
+def test_tool_change_selects_the_tests_exercising_it(repo):
+    """Test that tools run the tests that use them outside the scripts group."""
+    selection = select(repo, "scripts/local_api.py")
+
+    assert "tests/integration/device/test_device_status_local_api.py" in (
+        selection["tests"]["device_status"]["integration"]
+    )
+    assert "unit" not in selection["tests"]["device_status"]
+    assert "tests/unit/scripts/test_local_api.py" in (
+        selection["tests"]["scripts"]["unit"]
+    )
+    assert not selection["full"]
+
+    selection = select(repo, "getAllLambda.sh")
+
+    assert selection["tests"] == {
+        "scripts": {"unit": ["tests/unit/scripts/test_export_lambdas.py"]}
+    }
+
+
+@pytest.mark.parametrize(
+    "path",
+    [
+        "tests/conftest.py",
+        "requirements-dev.txt",
+        "Jenkinsfile",
+        "setup.py",
+        "scripts/lambda_local.py",
+        "scripts/deploy_lambda.sh",
+    ],
+)
+def test_global_or_unknown_change_selects_everything(repo, path):
+    """Test that changes with unknown reach fall back to a full run."""
+    selection = select(repo, path)
+
+    assert selection["full"]
+    assert selection["functions"] == ["device_status", "payment_status"]
+    assert {"scripts", "shared_layer"} <= set(selection["tests"])
+
+
+def test_terraform_change_needs_no_tests(repo):
+    """Test that infrastructure changes only flag a plan."""
+    selection = select(repo, "terraform/modules/lambda/main.tf")
+
+    assert selection["terraform"] and selection["tests"] == {}
+
+
+def test_tests_for_suite(repo):
+    """Test that a suite filter drops groups without tests in it."""
+    selection = select(repo, "lambda_functions/shared_layer/python/common_utils.py")
+
+    unit = impacted_functions.tests_for_suite(selection, "unit")
+    integration = impacted_functions.tests_for_suite(selection, "integration")
+
+    assert set(unit) == {"device_status", "payment_status", "shared_layer"}
+    assert set(integration) == {"device_status"}
+
+
+def test_run_groups_reports_each_group(tmp_path, capsys):
+    """Test that groups run in separate processes with their own results."""
+    (tmp_path / "test_ok.py").write_text("def test_ok():\n    pass\n")
+    (tmp_path / "test_bad.py").write_text("def test_bad():\n    assert False\n")
+
+    results = impacted_functions.run_groups(
+        {"ok": [str(tmp_path / "test_ok.py")], "bad": [str(tmp_path / "test_bad.py")]},
+        jobs=2,
+        junit_dir=str(tmp_path / "junit"),
+    )
+
+    assert results["ok"] == 0 and results["bad"] == 1
+    assert (tmp_path / "junit" / "junit_ok.xml").exists()
+    assert "=== bad: FAILED" in capsys.readouterr().out
@@ -0,0 +1,130 @@
+import json
+
+import import_budget
+import lambda_local
+import pytest
+
+# -X importtime output: each import follows everything it imported
+IMPORTTIME = f"""\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 | site
+{import_budget.MARKER}
+import time: self [us] | cumulative | imported package
+import time:       500 |        500 |       botocore.compat
+import time:      1000 |       1500 |     botocore
+import time:      2000 |       3500 |   boto3
+import time:       300 |        300 |   json
+import time:      1000 |       4800 | common_utils
+import time:       200 |       5000 | index
+"""
+
+
+@pytest.fixture
+def device_status():
+    """The device_status function from its function.json."""
+    return lambda_local.discover_functions()["device_status"]
+
+
+def test_parse_importtime_builds_tree():
+    """Test that nesting follows indentation and startup imports are skipped."""
+    tree = import_budget.parse_importtime(IMPORTTIME)
+
+    assert [node["name"] for node in tree] == ["common_utils", "index"]
+    common_utils = tree[0]
+    assert [child["name"] for child in common_utils["children"]] == ["boto3", "json"]
+    assert common_utils["children"][0]["children"][0]["name"] == "botocore"
+
+
+def test_package_costs_count_entry_points():
+    """Test that a package counts where it is imported from another one."""
+    costs = import_budget.package_costs(import_budget.parse_importtime(IMPORTTIME))
+
+    assert costs == {
+        "common_utils": 4.8,
+        "boto3": 3.5,
+        "botocore": 1.5,
+        "json": 0.3,
+        "index": 5.0,
+    }
+
+
+def test_check_ranks_violations_and_scales_budget():
+    """Test worst-first violations, unbudgeted packages and CPU scaling."""
+    measured = {
+        "total_ms": 300,
+        "packages": {"boto3": 220, "pandas": 60, "json": 2},
+    }
+    budget = {"calibration_ns": 1000, "total_ms": 200, "packages": {"boto3": 150}}
+
+    violations = import_budget.check("fn", measured, budget, 1000, 20, slack_ms=0)
+
+    assert [(v["package"], v["over_ms"]) for v in violations] == [
+        ("(total)", 100),
+        ("boto3", 70),
+        ("pandas", 40),
+    ]
+    # On a machine twice as slow every budget doubles
+    assert import_budget.check("fn", measured, budget, 2000, 20, slack_ms=0) == [
+        {
+            "function": "fn",
+            "package": "pandas",
+            "measured_ms": 60,
+            "budget_ms": 40,
+            "over_ms": 20,
+        }
+    ]
+
+
+def test_check_allows_absolute_slack():
+    """Test that slack absorbs jitter a percentage of a small limit cannot."""
+    measured = {"total_ms": 215, "packages": {"boto3": 155, "json": 8}}
+    budget = {"calibration_ns": 1000, "total_ms": 200, "packages": {"boto3": 150}}
+
+    assert import_budget.check("fn", measured, budget, 1000, 5, slack_ms=0) != []
+    assert import_budget.check("fn", measured, budget, 1000, 5, slack_ms=15) == []
+
+
+def test_make_budget_adds_headroom():
+    """Test that budgets round up with headroom and skip tiny packages."""
+    measured = {"total_ms": 100.2, "packages": {"boto3": 60, "json": 1.5}}
+
+    budget = import_budget.make_budget(measured, 1234.56, headroom=0.5, min_ms=5)
+
+    assert budget == {
+        "calibration_ns": 1234.6,
+        "total_ms": 151,
+        "packages": {"boto3": 90},
+    }
+
+
+def test_measure_imports_handler_in_fresh_interpreter(device_status):
+    """Test a real measurement of device_status."""
+    measured = import_budget.measure(device_status, runs=1)
+
+    assert measured["total_ms"] > 0
+    assert {"index", "common_utils", "boto3"} <= set(measured["packages"])
+    assert measured["packages"]["common_utils"] <= measured["total_ms"]
+    # The interpreter's own startup imports are not charged to the handler
+    assert "site" not in measured["packages"]
+
+
+def test_committed_budgets_cover_every_function():
+    """Test that every function has a budget the gate can load."""
+    for function in lambda_local.discover_functions().values():
+        budget = import_budget.load_budget(function)
+        assert budget is not None, function["name"]
+        assert budget["total_ms"] >= max(budget["packages"].values())
+
+
+def test_history_appends_one_line_per_run(tmp_path):
+    """Test that each run adds a record to the history file."""
+    history = tmp_path / "history.jsonl"
+    results = {"device_status": {"total_ms": 5.0, "packages": {"index": 5.0}}}
+
+    import_budget.append_history(history, results, 1000)
+    import_budget.append_history(history, results, 1000)
+
+    records = [json.loads(line) for line in history.read_text().splitlines()]
+    assert len(records) == 2
+    assert records[0]["functions"] == results
+    assert records[0]["calibration_ns"] == 1000
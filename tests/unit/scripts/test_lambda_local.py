@@ -0,0 +1,79 @@
+import json
+
+import boto3
+import lambda_local
+
+
+def test_discover_functions():
+    """Test that every function.json is discovered with its directory."""
+    functions = lambda_local.discover_functions()
+
+    assert functions["device_status"]["config"]["handler"] == "index.lambda_handler"
+    assert functions["device_status"]["dir"].name == "device_status"
+    assert lambda_local.get_api_methods(functions["payment_status"]["config"]) == [
+        "GET",
+        "POST",
+        "PUT",
+        "DELETE",
+    ]
+
+
+def test_match_route():
+    """Test route matching with path parameters and a trailing segment."""
+    assert lambda_local.match_route("/device_status", "/device_status") == {}
+    assert lambda_local.match_route("/device_status", "/device_status/dev-1") == {
+        "proxy": "dev-1"
+    }
+    assert lambda_local.match_route("/devices/{device_id}", "/devices/dev-1") == {
+        "device_id": "dev-1"
+    }
+    assert lambda_local.match_route("/device_status", "/payment_status") is None
+
+
+def test_build_api_event_v1_and_v2():
+    """Test that both payload formats carry method, path, body and caller."""
+    v1 = lambda_local.build_api_event(
+        "post", "/device_status", body={"device_id": "dev-1"}, user_id="user-1"
+    )
+    v2 = lambda_local.build_api_event(
+        "GET",
+        "/device_status/dev-1",
+        query={"limit": "5"},
+        path_parameters={"device_id": "dev-1"},
+        version="2.0",
+    )
+
+    assert v1["httpMethod"] == "POST"
+    assert json.loads(v1["body"]) == {"device_id": "dev-1"}
+    assert v1["requestContext"]["authorizer"]["claims"]["sub"] == "user-1"
+    assert v2["requestContext"]["http"]["method"] == "GET"
+    assert v2["rawQueryString"] == "limit=5"
+    assert v2["pathParameters"] == {"device_id": "dev-1"}
+
+
+def test_load_handler_against_moto(mock_aws_services):
+    """Test that a handler loaded as a container serves requests from moto."""
+    function = lambda_local.discover_functions()["device_status"]
+    lambda_local.create_tables(function["config"], boto3.client("dynamodb"))
+    handler = lambda_local.load_handler(function)
+
+    post = lambda_local.build_api_event(
+        "POST", "/device_status", body={"device_id": "dev-1", "status": "active"}
+    )
+    get = lambda_local.build_api_event(
+        "GET", "/device_status/dev-1", path_parameters={"device_id": "dev-1"}
+    )
+
+    assert handler(post, lambda_local.context_for(function))["statusCode"] == 200
+    response = handler(get, lambda_local.context_for(function))
+    assert json.loads(response["body"])["status"] == "active"
+
+
+def test_load_handler_does_not_leak_priming_hooks():
+    """Test that a container's priming hooks stay out of the shared list."""
+    import common_utils
+
+    hooks = list(common_utils._priming_hooks)
+    lambda_local.load_handler(lambda_local.discover_functions()["device_status"])
+
+    assert common_utils._priming_hooks == hooks
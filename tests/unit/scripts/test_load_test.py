@@ -0,0 +1,34 @@
+from argparse import Namespace
+
+import load_test
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = list(range(1, 101))
+
+    assert load_test.percentile(values, 50) == 50
+    assert load_test.percentile(values, 99) == 99
+    assert load_test.percentile([], 50) == 0.0
+
+
+def test_run_reports_latency_and_aws_calls():
+    """Test a small device_status run end to end against moto."""
+    args = Namespace(
+        function="device_status",
+        requests=20,
+        concurrency=2,
+        containers=None,
+        mix="GET=1,POST=1",
+        devices=5,
+        events=None,
+        no_tracemalloc=False,
+    )
+
+    report = load_test.run(args)
+
+    assert report["requests"] == 20
+    assert report["status_codes"] == {"200": 20}
+    assert report["aws_calls_per_request"] == 1
+    assert 0 < report["latency_ms"]["p50"] <= report["latency_ms"]["p99"]
+    assert report["peak_memory_kib"] > 0
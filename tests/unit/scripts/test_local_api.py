@@ -0,0 +1,194 @@
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import lambda_local
+import local_api
+import pytest
+import requests
+
+
+@pytest.fixture
+def device_gateway_factory():
+    """Start local APIs serving device_status against moto."""
+    gateways = []
+
+    def start(**kwargs):
+        functions = lambda_local.discover_functions()
+        gateway = local_api.LocalApiGateway(
+            {"device_status": functions["device_status"]},
+            env={"RATE_LIMIT_PER_SECOND": "0"},
+            **kwargs,
+        )
+        gateways.append(gateway)
+        gateway.start()
+        return gateway
+
+    yield start
+    for gateway in gateways:
+        gateway.stop()
+
+
+@pytest.fixture
+def gateway(device_gateway_factory):
+    """A local API serving device_status against moto."""
+    return device_gateway_factory()
+
+
+def request(url, method="GET", body=None):
+    """Send a request and return (status, parsed body)."""
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(url, data=data, method=method)
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_find_route():
+    """Test routing by path and method, with the trailing path parameter."""
+    routes = local_api.build_routes(lambda_local.discover_functions())
+
+    route, params, status = local_api.find_route(routes, "GET", "/device_status/dev-1")
+    assert (route["function"]["name"], params, status) == (
+        "device_status",
+        {"device_id": "dev-1"},
+        200,
+    )
+    assert local_api.find_route(routes, "DELETE", "/device_status")[2] == 405
+    assert local_api.find_route(routes, "GET", "/unknown")[2] == 404
+
+
+def test_to_http_response():
+    """Test proxy responses and the payload format 2.0 shorthand."""
+    status, headers, body = local_api.to_http_response(
+        {
+            "statusCode": 201,
+            "headers": {"Content-Type": "application/json"},
+            "cookies": ["a=1"],
+            "body": '{"ok": true}',
+        },
+        "2.0",
+    )
+    assert (status, body) == (201, b'{"ok": true}')
+    assert ("Set-Cookie", "a=1") in headers
+
+    status, _, body = local_api.to_http_response({"ok": True}, "2.0")
+    assert (status, body) == (200, b'{"ok": true}')
+    assert local_api.to_http_response({"ok": True}, "1.0")[0] == 502
+
+
+def test_container_pool_reuses_warm_containers():
+    """Test that containers are started on demand and then reused."""
+    pool = local_api.ContainerPool(
+        lambda_local.discover_functions()["device_status"], size=2
+    )
+
+    first = pool.acquire()
+    pool.release(first)
+    assert pool.acquire() is first
+    second = pool.acquire()
+    assert second is not first
+    assert pool.created == 2
+
+
+def test_round_trip_over_http(gateway):
+    """Test a POST then GET served by the real handler over HTTP."""
+    status, body = request(
+        f"{gateway.url}/device_status",
+        "POST",
+        {"device_id": "dev-1", "status": "active", "battery_level": 85},
+    )
+    assert status == 200
+    assert body["device_id"] == "dev-1"
+
+    status, body = request(f"{gateway.url}/device_status/dev-1")
+    assert status == 200
+    assert body["battery_level"] == 85
+
+    assert request(f"{gateway.url}/device_status/missing")[0] == 404
+    assert request(f"{gateway.url}/nowhere")[0] == 404
+    assert request(f"{gateway.url}/device_status", "DELETE")[0] == 405
+
+
+def test_concurrent_requests_share_the_process(device_gateway_factory):
+    """Test that concurrent requests on several containers all succeed."""
+    gateway = device_gateway_factory(containers=4)
+
+    def round_trip(i):
+        device = f"dev-{i % 8}"
+        post = request(
+            f"{gateway.url}/device_status",
+            "POST",
+            {"device_id": device, "status": "active", "battery_level": i},
+        )
+        return post[0], request(f"{gateway.url}/device_status/{device}")[0]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        statuses = list(executor.map(round_trip, range(200)))
+
+    assert statuses == [(200, 200)] * 200
+    assert gateway.pools["device_status"].created <= 4
+
+
+def test_payload_format_1_with_stage():
+    """Test format 1.0 events and a stage prefix."""
+    function = lambda_local.discover_functions()["device_status"]
+    with local_api.LocalApiGateway(
+        {"device_status": function}, payload_version="1.0", stage="dev"
+    ) as gateway:
+        assert gateway.url.endswith("/dev")
+        status, body = request(
+            f"{gateway.url}/device_status", "POST", {"device_id": "d", "status": "on"}
+        )
+        assert status == 200
+        assert request(f"{gateway.url}/device_status/d")[1]["status"] == "on"
+        assert request(gateway.url.rsplit("/", 1)[0] + "/device_status/d")[0] == 404
+
+
+def test_adapter_dispatches_in_process():
+    """Test that requests under the base URL reach the handler without a socket."""
+    function = lambda_local.discover_functions()["device_status"]
+    gateway = local_api.LocalApiGateway(
+        {"device_status": function}, env={"RATE_LIMIT_PER_SECOND": "0"}, stage="dev"
+    )
+    with gateway.intercept("http://api.test/") as base_url:
+        assert base_url == "http://api.test/dev"
+        post = requests.post(
+            f"{base_url}/device_status", json={"device_id": "d", "status": "on"}
+        )
+        get = requests.get(f"{base_url}/device_status/d", params={"verbose": "1"})
+
+        assert post.status_code == 200
+        assert post.headers["content-type"] == "application/json"
+        assert (get.status_code, get.reason, get.json()["status"]) == (200, "OK", "on")
+        assert get.url == "http://api.test/dev/device_status/d?verbose=1"
+        assert requests.delete(f"{base_url}/device_status").status_code == 405
+        assert gateway._server is None
+
+        # Other hosts still go through the normal transport
+        session = requests.Session()
+        assert not isinstance(
+            session.get_adapter("http://api.test.example.com/"), local_api.LambdaAdapter
+        )
+
+    assert not isinstance(
+        requests.Session().get_adapter(base_url), local_api.LambdaAdapter
+    )
+
+
+def test_adapter_can_be_mounted(gateway):
+    """Test mounting the adapter on one session only."""
+    session = requests.Session()
+    session.mount(
+        "http://lambda.local", local_api.LambdaAdapter(gateway, "http://lambda.local")
+    )
+
+    response = session.post(
+        "http://lambda.local/device_status", data='{"device_id": "m", "status": "on"}'
+    )
+
+    assert response.status_code == 200
+    assert session.get("http://lambda.local/device_status/m").json()["device_id"] == "m"
@@ -0,0 +1,125 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+import update_packages
+
+REQUIREMENTS = """# Testing
+pytest>=7.0.0
+moto[server]>=5.1.4  # local AWS
+Requests_OAuthlib>=1.0 ; python_version >= "3.8"
+-r requirements.txt
+# boto3==1.26.0
+"""
+
+
+@pytest.fixture
+def requirements(tmp_path):
+    """Write a requirements file with comments, extras and markers."""
+    path = tmp_path / "requirements-dev.txt"
+    path.write_text(REQUIREMENTS)
+    return path
+
+
+def fake_pip(installs):
+    """Return a subprocess.run replacement that writes a pip install report."""
+    calls = []
+
+    def run(command, check):
+        calls.append(command)
+        report_path = command[command.index("--report") + 1]
+        with open(report_path, "w") as f:
+            json.dump(
+                {
+                    "install": [
+                        {"metadata": {"name": name, "version": version}}
+                        for name, version in installs.items()
+                    ]
+                },
+                f,
+            )
+
+    return run, calls
+
+
+def test_parse_requirement_skips_non_package_lines():
+    """Test that comments, options and URLs are not treated as packages."""
+    for line in ("", "# pytest", "-r base.txt", "--index-url x", "https://x/y.whl"):
+        assert update_packages.parse_requirement(line) is None
+    match = update_packages.parse_requirement("moto[server]>=5.1.4  # local")
+    assert (match["name"], match["extras"]) == ("moto", "[server]")
+
+
+def test_update_content_keeps_extras_markers_and_comments():
+    """Test that only the version specifiers are rewritten."""
+    updated = update_packages.update_content(
+        REQUIREMENTS,
+        {"pytest": "8.3.5", "moto": "5.2.4", "requests-oauthlib": "2.0.0"},
+    )
+
+    assert updated == (
+        "# Testing\n"
+        "pytest>=8.3.5\n"
+        "moto[server]>=5.2.4  # local AWS\n"
+        'Requests_OAuthlib>=2.0.0 ; python_version >= "3.8"\n'
+        "-r requirements.txt\n"
+        "# boto3==1.26.0\n"
+    )
+
+
+def test_update_packages_resolves_once(requirements):
+    """Test that every package goes to a single pip run and the file is rewritten."""
+    run, calls = fake_pip({"pytest": "8.3.5", "werkzeug": "3.1.0"})
+    installed = [
+        {"pytest": "7.4.0", "moto": "5.2.4", "requests-oauthlib": "2.0.0"},
+        {"pytest": "8.3.5", "moto": "5.2.4", "requests-oauthlib": "2.0.0"},
+    ]
+    with (
+        patch.object(update_packages.subprocess, "run", run),
+        patch.object(update_packages, "installed_versions", side_effect=installed),
+    ):
+        changes = update_packages.update_packages([str(requirements)])
+
+    assert len(calls) == 1
+    assert "--dry-run" not in calls[0]
+    assert calls[0][-3:] == ["Requests_OAuthlib", "moto[server]", "pytest"]
+    assert changes == {"pytest": ("7.4.0", "8.3.5")}
+    content = requirements.read_text()
+    assert "pytest>=8.3.5\n" in content
+    assert "moto[server]>=5.2.4  # local AWS\n" in content
+    assert not [
+        name for name in os.listdir(requirements.parent) if name.startswith(".")
+    ]
+
+
+def test_dry_run_reports_without_writing(requirements):
+    """Test that a dry run uses pip's resolver only and leaves the file alone."""
+    run, calls = fake_pip({"moto": "5.3.0"})
+    with (
+        patch.object(update_packages.subprocess, "run", run),
+        patch.object(
+            update_packages,
+            "installed_versions",
+            return_value={"pytest": "8.3.5", "moto": "5.2.4"},
+        ),
+    ):
+        changes = update_packages.update_packages([str(requirements)], dry_run=True)
+
+    assert "--dry-run" in calls[0]
+    assert changes == {"moto": ("5.2.4", "5.3.0")}
+    assert requirements.read_text() == REQUIREMENTS
+
+
+def test_write_atomically_keeps_permissions(tmp_path):
+    """Test that the replaced file keeps its mode and no temp file is left."""
+    path = tmp_path / "requirements.txt"
+    path.write_text("boto3>=1.0\n")
+    path.chmod(0o640)
+
+    update_packages.write_atomically(path, "boto3>=1.38.0\n")
+
+    assert path.read_text() == "boto3>=1.38.0\n"
+    assert path.stat().st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["requirements.txt"]
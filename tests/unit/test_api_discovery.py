@@ -0,0 +1,132 @@
+import json
+from unittest.mock import patch
+
+import api_discovery
+import boto3
+import pytest
+from botocore.stub import Stubber
+
+
+@pytest.fixture
+def paths(tmp_path):
+    """Return lookup paths for saved outputs and the cache, both empty."""
+    outputs_dir = tmp_path / "terraform-outputs"
+    outputs_dir.mkdir()
+    with patch.dict("os.environ", {"API_URL_DEV": ""}):
+        yield {"outputs_dir": outputs_dir, "cache_path": tmp_path / "api_urls.json"}
+
+
+def test_environment_names_match_whole():
+    """Test that "dev" matches only the API deployed for dev."""
+    assert api_discovery.matches_environment("dev-PandaCharging", "dev")
+    assert api_discovery.matches_environment("dev_PandaCharging", "dev")
+    assert not api_discovery.matches_environment("devices-api", "dev")
+    assert not api_discovery.matches_environment("dev2-PandaCharging", "dev")
+
+
+def http_api(name, api_id):
+    """Return a GetApis item."""
+    return {
+        "Name": name,
+        "ApiId": api_id,
+        "ApiEndpoint": f"https://{api_id}.execute-api.us-east-1.amazonaws.com",
+        "ProtocolType": "HTTP",
+        "RouteSelectionExpression": "${request.method} ${request.path}",
+    }
+
+
+def test_http_api_listing_is_paginated():
+    """Test that APIs and stages on later pages are found."""
+    client = boto3.client("apigatewayv2", region_name="us-east-1")
+    with Stubber(client) as stubber:
+        stubber.add_response(
+            "get_apis",
+            {"Items": [http_api("devices-api", "a1")], "NextToken": "t"},
+        )
+        stubber.add_response(
+            "get_apis",
+            {"Items": [http_api("dev-PandaCharging", "b2")]},
+            {"NextToken": "t"},
+        )
+        stubber.add_response(
+            "get_stages",
+            {"Items": [{"StageName": "test"}], "NextToken": "s"},
+            {"ApiId": "b2"},
+        )
+        stubber.add_response(
+            "get_stages",
+            {"Items": [{"StageName": "dev"}]},
+            {"ApiId": "b2", "NextToken": "s"},
+        )
+
+        url = api_discovery.discover_http_api(client, "dev")
+
+    assert url == "https://b2.execute-api.us-east-1.amazonaws.com/dev"
+
+
+def test_rest_api_discovery(mock_aws_services):
+    """Test the REST API fallback against moto."""
+    client = boto3.client("apigateway", region_name="us-east-2")
+    for name in ("devices-api", "dev_PandaCharging"):
+        api_id = client.create_rest_api(name=name)["id"]
+    root_id = client.get_resources(restApiId=api_id)["items"][0]["id"]
+    client.put_method(
+        restApiId=api_id, resourceId=root_id, httpMethod="GET", authorizationType="NONE"
+    )
+    client.put_integration(
+        restApiId=api_id, resourceId=root_id, httpMethod="GET", type="MOCK"
+    )
+    client.create_deployment(restApiId=api_id, stageName="dev")
+
+    url = api_discovery.discover_rest_api(client, "dev")
+
+    assert url == f"https://{api_id}.execute-api.us-east-2.amazonaws.com/dev"
+
+
+def test_saved_outputs_come_first(paths):
+    """Test that saved Terraform outputs win over the cache and AWS."""
+    (paths["outputs_dir"] / "dev.json").write_text(
+        json.dumps({"api_gateway_url": {"value": "https://tf.example.com/dev/"}})
+    )
+    api_discovery.write_cache(
+        "dev", "https://cached.example.com", "API Gateway", paths["cache_path"]
+    )
+
+    assert api_discovery.resolve_api_url("dev", **paths) == (
+        "https://tf.example.com/dev",
+        "saved Terraform outputs",
+    )
+
+
+def test_discovered_url_is_cached_until_ttl(paths):
+    """Test that a lookup is cached and only repeated once it expires."""
+    with (
+        patch.object(api_discovery, "run_terraform_output", return_value=None),
+        patch.object(
+            api_discovery, "discover_http_api", return_value="https://x.example.com"
+        ) as discover,
+    ):
+        first = api_discovery.resolve_api_url("dev", boto3.Session(), **paths)
+        second = api_discovery.resolve_api_url("dev", boto3.Session(), **paths)
+
+    assert first == ("https://x.example.com", "API Gateway")
+    assert second == ("https://x.example.com", "cache")
+    assert discover.call_count == 1
+
+    cache_path = paths["cache_path"]
+    resolved_at = json.loads(cache_path.read_text())["dev"]["resolved_at"]
+    expired = resolved_at + api_discovery.CACHE_TTL + 1
+    assert api_discovery.read_cache("dev", cache_path, now=expired) is None
+
+
+def test_mock_mode_makes_no_lookups(paths):
+    """Test that mocked runs use the fallback without Terraform or AWS."""
+    with (
+        patch.object(api_discovery, "run_terraform_output") as terraform,
+        patch.object(api_discovery, "discover_http_api") as discover,
+    ):
+        url = api_discovery.resolve_api_url("dev", boto3.Session(), True, **paths)
+
+    assert url == ("https://api-dev.example.com", "fallback")
+    terraform.assert_not_called()
+    discover.assert_not_called()
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import common_utils
+import pytest
+
+
+@pytest.fixture
+def server_tables(function_tables):
+    """Create the devices table on the shared moto server."""
+    return function_tables("device_status")["devices"]
+
+
+def test_async_handler_reuses_loop_across_invocations():
+    """Test that warm invocations run on the same event loop."""
+
+    @common_utils.async_handler
+    async def handler(event, context):
+        return asyncio.get_running_loop()
+
+    assert handler({}, {}) is handler({}, {})
+    assert handler({}, {}) is common_utils.get_event_loop()
+
+
+def test_async_handler_runs_on_concurrent_threads():
+    """Test that threads invoking at the same time each get their own loop."""
+    both_running = threading.Barrier(2, timeout=5)
+
+    @common_utils.async_handler
+    async def handler(event, context):
+        both_running.wait()
+        await asyncio.sleep(0.01)
+        return asyncio.get_running_loop()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        loops = list(pool.map(lambda _: handler({}, {}), range(2)))
+
+    assert loops[0] is not loops[1]
+
+
+def test_async_handler_errors_reach_handle_error():
+    """Test that exceptions in async handlers become 500 responses."""
+
+    @common_utils.handle_error
+    @common_utils.async_handler
+    async def handler(event, context):
+        raise ValueError("boom")
+
+    with patch.object(common_utils, "_invocation_count", 1):
+        response = handler({}, {})
+
+    assert response["statusCode"] == 500
+
+
+def test_run_blocking_overlaps_calls():
+    """Test that independent blocking calls run concurrently."""
+
+    async def fan_out():
+        await asyncio.gather(
+            *(common_utils.run_blocking(time.sleep, 0.2) for _ in range(3))
+        )
+
+    started = time.perf_counter()
+    common_utils.get_event_loop().run_until_complete(fan_out())
+
+    assert time.perf_counter() - started < 0.5
+
+
+def test_async_client_against_moto_server(server_tables):
+    """Test concurrent puts and gets through the async table wrapper."""
+    table = common_utils.AsyncClient(server_tables)
+
+    @common_utils.async_handler
+    async def handler(event, context):
+        device_ids = [f"dev-{i}" for i in range(5)]
+        await asyncio.gather(
+            *(table.put_item(Item={"device_id": d, "status": "on"}) for d in device_ids)
+        )
+        responses = await asyncio.gather(
+            *(table.get_item(Key={"device_id": d}) for d in device_ids)
+        )
+        return [response["Item"]["device_id"] for response in responses]
+
+    assert table.name.endswith("-test-devices")
+    assert handler({}, {}) == [f"dev-{i}" for i in range(5)]
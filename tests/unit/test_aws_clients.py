@@ -5,6 +5,7 @@ import pytest
 from lambda_functions.shared_layer.python.common_utils import (
     get_dynamodb_client,
     get_dynamodb_resource,
+    get_http_method,
     get_iot_client,
     get_iot_data_client,
     get_s3_client,
@@ -86,6 +87,10 @@ def test_get_user_id_from_event():
     event = {"requestContext": {"authorizer": {"claims": {"sub": "test-sub"}}}}
     assert get_user_id_from_event(event) == "test-sub"
 
+    # Test with HTTP API JWT authorizer
+    event = {"requestContext": {"authorizer": {"jwt": {"claims": {"sub": "v2-sub"}}}}}
+    assert get_user_id_from_event(event) == "v2-sub"
+
     # Test with no authorizer
     event = {}
     assert get_user_id_from_event(event) is None
@@ -93,3 +98,10 @@ def test_get_user_id_from_event():
     # Test with no claims
     event = {"requestContext": {"authorizer": {}}}
     assert get_user_id_from_event(event) is None
+
+
+def test_get_http_method():
+    """Test method extraction from payload format 1.0 and 2.0 events."""
+    assert get_http_method({"httpMethod": "POST"}) == "POST"
+    assert get_http_method({"requestContext": {"http": {"method": "get"}}}) == "GET"
+    assert get_http_method({}) is None
@@ -1,6 +1,7 @@
 import json
 import logging
 import os
+import time
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -250,3 +251,206 @@ def test_retry_with_backoff_max_retries():
         )  # Set retries to 1 to make one attempt
 
     assert mock_func.call_count == 1  # Should try once before failing
+
+
+@pytest.mark.parametrize(
+    "event,expected",
+    [
+        ({"warmer": True}, True),
+        ({"source": "serverless-plugin-warmup"}, True),
+        ({"source": "aws.events", "detail-type": "Scheduled Event"}, True),
+        ({"source": "aws.events", "detail-type": "EC2 Instance State"}, False),
+        ({"httpMethod": "GET"}, False),
+        ({}, False),
+        (None, False),
+    ],
+)
+def test_is_warmup_event(event, expected):
+    """Test detection of keep-warm and scheduled keep-alive events."""
+    assert common_utils.is_warmup_event(event) is expected
+
+
+def test_handle_error_warmup_short_circuit():
+    """Test that warm-up pings return without invoking the handler."""
+    handler = MagicMock()
+    decorated_function = common_utils.handle_error(handler)
+
+    with patch("common_utils.setup_logger") as mock_setup_logger:
+        result = decorated_function({"warmer": True}, {})
+
+    assert result == {"warmup": True}
+    handler.assert_not_called()
+    mock_setup_logger.assert_not_called()
+
+
+def test_handle_error_warmup_runs_priming_hooks():
+    """Test that prime_on_warmup runs hooks and tolerates hook failures."""
+    ok_hook = MagicMock(__name__="ok_hook")
+    failing_hook = MagicMock(__name__="failing_hook", side_effect=Exception("boom"))
+    handler = MagicMock()
+
+    with patch.object(common_utils, "_priming_hooks", []):
+        common_utils.register_priming_hook(ok_hook)
+        common_utils.register_priming_hook(failing_hook)
+        decorated_function = common_utils.handle_error(prime_on_warmup=True)(handler)
+
+        result = decorated_function({"warmer": True}, {})
+
+    assert result == {
+        "warmup": True,
+        "primed": {"ok_hook": "ok", "failing_hook": "error"},
+    }
+    ok_hook.assert_called_once()
+    handler.assert_not_called()
+
+
+def test_run_priming_hooks_is_time_bounded():
+    """Test that slow hooks time out and later hooks are skipped past the budget."""
+    release = common_utils.threading.Event()
+
+    def slow_hook():
+        release.wait(5)
+
+    fast_hook = MagicMock(__name__="fast_hook")
+
+    with patch.object(common_utils, "_priming_hooks", []):
+        common_utils.register_priming_hook(timeout=0.05)(slow_hook)
+        common_utils.register_priming_hook(fast_hook)
+
+        started = time.monotonic()
+        results = common_utils.run_priming_hooks(budget=0.05)
+        elapsed = time.monotonic() - started
+
+    release.set()
+    assert results["slow_hook"] == "timeout"
+    assert results["fast_hook"] == "skipped"
+    assert elapsed < 1
+    fast_hook.assert_not_called()
+
+
+def test_prime_on_init_outside_lambda_runtime():
+    """Test that init priming is a no-op outside the Lambda runtime."""
+    hook = MagicMock(__name__="hook")
+
+    with patch.object(common_utils, "_priming_hooks", [(hook, None)]):
+        with patch.dict("os.environ", {"AWS_LAMBDA_FUNCTION_NAME": ""}):
+            assert common_utils.prime_on_init() == {}
+        with patch.dict("os.environ", {"AWS_LAMBDA_FUNCTION_NAME": "test_fn"}):
+            assert common_utils.prime_on_init() == {"hook": "ok"}
+
+    hook.assert_called_once()
+
+
+def test_preload_ssm_parameters_batches_and_caches():
+    """Test that preloaded SSM parameters are fetched in batches and cached."""
+    names = [f"/test/param-{i}" for i in range(12)]
+
+    def get_parameters(Names, WithDecryption):
+        return {"Parameters": [{"Name": n, "Value": n.upper()} for n in Names]}
+
+    with patch.object(common_utils, "_ssm_parameter_cache", {}):
+        with patch("common_utils.get_ssm_client") as mock_client:
+            mock_client.return_value.get_parameters.side_effect = get_parameters
+
+            common_utils.preload_ssm_parameters(names)
+            value = common_utils.get_ssm_parameter("/test/param-11")
+
+        assert mock_client.return_value.get_parameters.call_count == 2
+        mock_client.return_value.get_parameter.assert_not_called()
+        assert value == "/TEST/PARAM-11"
+
+
+def test_init_phase_records_duration():
+    """Test that init phases are recorded in milliseconds."""
+    with patch.object(common_utils, "_init_phases", {}):
+        with common_utils.init_phase("load_config"):
+            pass
+
+        assert common_utils._init_phases["load_config"] >= 0
+
+
+def test_handle_error_emits_cold_start_once():
+    """Test that only the first invocation in a container emits init timings."""
+    lines = []
+    decorated_function = common_utils.handle_error(lambda event, context: "ok")
+
+    with (
+        patch.object(common_utils, "_invocation_count", 0),
+        patch.object(common_utils, "_init_phases", {"imports": 12.5}),
+    ):
+        common_utils.set_structured_log_sink(lines.append)
+        try:
+            decorated_function({}, {})
+            decorated_function({}, {})
+            invocation_count = common_utils.get_invocation_count()
+        finally:
+            common_utils.set_structured_log_sink(None)
+
+    assert invocation_count == 2
+    records = [json.loads(line) for line in lines]
+    cold_starts = [record for record in records if "cold_start" in record]
+    assert len(cold_starts) == 1
+    record = cold_starts[0]
+    assert record["cold_start"] is True
+    assert record["invocation_count"] == 1
+    assert record["init_phases_ms"] == {"imports": 12.5}
+    assert record["time_to_first_invocation_ms"] > 0
+
+
+def test_format_response_serializes_dynamodb_numbers():
+    """Test that Decimal values from DynamoDB items are JSON encoded."""
+    from decimal import Decimal
+
+    response = common_utils.format_response(
+        200, {"battery_level": Decimal("85"), "temperature": Decimal("21.5")}
+    )
+
+    assert json.loads(response["body"]) == {"battery_level": 85, "temperature": 21.5}
+
+
+@patch.dict(os.environ, {"CURSOR_SECRET": "test-secret"})
+@patch.object(common_utils, "_cursor_keys", [])
+def test_cursor_round_trip_and_tampering():
+    """Test that cursors round-trip keys and reject tampering or another scope."""
+    from decimal import Decimal
+
+    key = {"payment_id": "p1", "user_id": "u1", "created_at": "2024", "n": Decimal(3)}
+    cursor = common_utils.encode_cursor(key, scope="u1")
+
+    assert common_utils.decode_cursor(cursor, scope="u1") == key
+    assert common_utils.encode_cursor(None) is None
+    assert common_utils.decode_cursor(None) is None
+    with pytest.raises(common_utils.InvalidCursor):
+        common_utils.decode_cursor(cursor, scope="u2")
+    with pytest.raises(common_utils.InvalidCursor):
+        common_utils.decode_cursor("A" + cursor[1:], scope="u1")
+    with pytest.raises(common_utils.InvalidCursor):
+        common_utils.decode_cursor("not-a-cursor", scope="u1")
+
+
+@patch.object(common_utils, "_cursor_keys", [])
+def test_cursor_key_is_required_and_loaded_at_init():
+    """Test that a missing key fails init in Lambda instead of falling back."""
+    environ = {"CURSOR_SECRET": "", "CURSOR_SECRET_PARAMETER": ""}
+
+    with patch.dict("os.environ", environ):
+        with patch.dict("os.environ", {"AWS_LAMBDA_FUNCTION_NAME": ""}):
+            common_utils.load_cursor_key()
+        with patch.dict("os.environ", {"AWS_LAMBDA_FUNCTION_NAME": "test_fn"}):
+            with pytest.raises(RuntimeError, match="CURSOR_SECRET"):
+                common_utils.load_cursor_key()
+        with pytest.raises(RuntimeError):
+            common_utils.encode_cursor({"payment_id": "p1"})
+
+    environ["CURSOR_SECRET_PARAMETER"] = "/test/cursor_secret"
+    with patch.dict("os.environ", environ):
+        with patch.object(
+            common_utils, "get_ssm_parameter", return_value="from-ssm"
+        ) as get_parameter:
+            common_utils.load_cursor_key()
+            with patch.dict("os.environ", {"AWS_LAMBDA_FUNCTION_NAME": "test_fn"}):
+                common_utils.load_cursor_key()
+            common_utils.encode_cursor({"payment_id": "p1"})
+
+    get_parameter.assert_called_once_with("/test/cursor_secret")
+    assert common_utils._cursor_keys == [b"from-ssm"]
@@ -0,0 +1,155 @@
+import json
+import threading
+from unittest.mock import MagicMock
+
+import boto3
+import common_utils
+import pytest
+import urllib3
+from botocore.config import Config
+from botocore.exceptions import ReadTimeoutError
+
+
+class FakeContext:
+    """Minimal Lambda context exposing the remaining-time timer."""
+
+    def __init__(self, remaining_ms):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+@pytest.fixture
+def devices_table(mock_aws_services):
+    """Create the test devices table in moto."""
+    boto3.client("dynamodb").create_table(
+        TableName="test-devices",
+        KeySchema=[{"AttributeName": "device_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "device_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return common_utils.get_dynamodb_table("devices")
+
+
+def test_deadline_from_context():
+    """Test deadline construction from a Lambda context."""
+    deadline = common_utils.Deadline.from_context(FakeContext(1000), 200)
+
+    assert 700 < deadline.remaining_ms() <= 800
+    assert common_utils.Deadline.from_context({}) is None
+
+
+def test_deadline_check_raises_when_too_little_time():
+    """Test that check refuses work that cannot finish in time."""
+    deadline = common_utils.Deadline(50, safety_margin_ms=0)
+
+    with pytest.raises(common_utils.DeadlineExceeded, match="GetItem"):
+        deadline.check(min_ms=100, operation="GetItem")
+
+
+def test_aws_call_refused_past_deadline(devices_table):
+    """Test that clients refuse calls once the deadline is nearly spent."""
+    with common_utils._invocation_deadline(common_utils.Deadline(0, 0)):
+        with pytest.raises(common_utils.DeadlineExceeded):
+            devices_table.get_item(Key={"device_id": "dev-123"})
+
+
+def test_aws_call_read_timeout_follows_deadline(monkeypatch):
+    """Test that each attempt's socket read timeout is capped by the time left."""
+    seen = []
+
+    def urlopen(self, method, url, **kwargs):
+        seen.append(kwargs.get("timeout"))
+        raise urllib3.exceptions.ReadTimeoutError(self, url, "read timed out")
+
+    monkeypatch.setattr(urllib3.connectionpool.HTTPConnectionPool, "urlopen", urlopen)
+    client = common_utils._instrument(
+        boto3.client(
+            "dynamodb",
+            region_name="us-east-1",
+            endpoint_url="http://127.0.0.1:9",
+            aws_access_key_id="testing",
+            aws_secret_access_key="testing",
+            config=Config(read_timeout=30, retries={"max_attempts": 0}),
+        )
+    )
+
+    with common_utils._invocation_deadline(common_utils.Deadline(2000, 0)):
+        with pytest.raises(ReadTimeoutError):
+            client.get_item(
+                TableName="test-devices", Key={"device_id": {"S": "dev-123"}}
+            )
+
+    assert len(seen) == 1
+    assert 1.5 < seen[0].read_timeout <= 2.0
+
+
+def test_handle_error_returns_503_on_deadline():
+    """Test that DeadlineExceeded becomes a fast 503 with Retry-After."""
+    handler = MagicMock(
+        __name__="handler", side_effect=common_utils.DeadlineExceeded("too late")
+    )
+    decorated_function = common_utils.handle_error(handler)
+
+    response = decorated_function({}, FakeContext(5000))
+
+    assert response["statusCode"] == 503
+    assert response["headers"]["Retry-After"] == "1"
+    assert "error" in json.loads(response["body"])
+    assert common_utils.get_current_deadline() is None
+
+
+def test_handle_error_sets_deadline_during_invocation():
+    """Test that the handler sees the invocation deadline."""
+    seen = {}
+
+    def handler(event, context):
+        seen["deadline"] = common_utils.get_current_deadline()
+
+    common_utils.handle_error(handler)({}, FakeContext(5000))
+
+    assert seen["deadline"].remaining_ms() > 4000
+
+
+def test_deadlines_are_per_thread():
+    """Test that concurrent invocations keep their own deadlines."""
+    started = threading.Barrier(2)
+    finished = threading.Event()
+    seen = {}
+
+    def short(event, context):
+        started.wait()
+        return common_utils.get_current_deadline().remaining_ms()
+
+    def long(event, context):
+        started.wait()
+        # The short invocation ends first; its reset must not clear this one
+        finished.wait()
+        seen["long"] = common_utils.get_current_deadline()
+
+    thread = threading.Thread(
+        target=common_utils.handle_error(long), args=({}, FakeContext(60_000))
+    )
+    thread.start()
+    remaining = common_utils.handle_error(short)({}, FakeContext(5000))
+    finished.set()
+    thread.join()
+
+    assert remaining < 5000
+    assert seen["long"].remaining_ms() > 50_000
+
+
+def test_pool_calls_inherit_the_deadline():
+    """Test that fan-out calls on pool threads are bounded by the caller's."""
+    deadline = common_utils.Deadline(5000, 0)
+
+    with common_utils._invocation_deadline(deadline):
+        seen = common_utils.fan_out_map(
+            lambda _: common_utils.get_current_deadline(), [0, 1]
+        )
+
+    assert seen == [deadline, deadline]
+    assert common_utils.fan_out_map(
+        lambda _: common_utils.get_current_deadline(), [0]
+    ) == [None]
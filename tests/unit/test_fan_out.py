@@ -0,0 +1,97 @@
+import time
+from functools import partial
+from unittest.mock import patch
+
+import boto3
+import common_utils
+import pytest
+
+
+@pytest.fixture
+def devices_table(mock_aws_services):
+    """Create the test devices table in moto with a few devices."""
+    boto3.client("dynamodb").create_table(
+        TableName="test-devices",
+        KeySchema=[{"AttributeName": "device_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "device_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    table = common_utils.get_dynamodb_table("devices")
+    for i in range(3):
+        table.put_item(Item={"device_id": f"dev-{i}", "status": "on"})
+    return table
+
+
+def test_fan_out_map_preserves_order_and_overlaps():
+    """Test that results keep item order while calls run concurrently."""
+
+    def slow_double(value):
+        time.sleep(0.2 - value * 0.05)
+        return value * 2
+
+    started = time.perf_counter()
+    results = common_utils.fan_out_map(slow_double, [0, 1, 2])
+
+    assert results == [0, 2, 4]
+    assert time.perf_counter() - started < 0.4
+
+
+def test_fan_out_map_collects_exceptions_per_item():
+    """Test that one failure does not hide the other results."""
+
+    def check(value):
+        if value == 1:
+            raise ValueError("bad item")
+        return value
+
+    results = common_utils.fan_out_map(check, [0, 1, 2])
+
+    assert results[0] == 0 and results[2] == 2
+    assert isinstance(results[1], ValueError)
+    with pytest.raises(ValueError, match="bad item"):
+        common_utils.fan_out_map(check, [0, 1, 2], return_exceptions=False)
+
+
+def test_fan_out_map_stops_waiting_at_deadline():
+    """Test that calls still running at the deadline report DeadlineExceeded."""
+    deadline = common_utils.Deadline(100, safety_margin_ms=0)
+
+    with common_utils._invocation_deadline(deadline):
+        started = time.perf_counter()
+        results = common_utils.fan_out_map(time.sleep, [0, 1])
+
+    assert time.perf_counter() - started < 0.5
+    assert results[0] is None
+    assert isinstance(results[1], common_utils.DeadlineExceeded)
+
+
+def test_fan_out_map_runs_inline_on_pool_threads():
+    """Test that nested fan-out from a pool thread cannot deadlock the pool."""
+    with (
+        patch.object(common_utils, "AWS_IO_WORKERS", 1),
+        patch.object(common_utils, "_executor", None),
+    ):
+        results = common_utils.fan_out_map(
+            lambda value: common_utils.fan_out_map(abs, [value, -value]), [1, 2]
+        )
+        common_utils.get_executor().shutdown()
+
+    assert results == [[1, 1], [2, 2]]
+
+
+def test_fan_out_gather_runs_dynamodb_calls(devices_table):
+    """Test gathering independent DynamoDB reads against moto."""
+    responses = common_utils.fan_out_gather(
+        *(
+            partial(devices_table.get_item, Key={"device_id": f"dev-{i}"})
+            for i in range(3)
+        ),
+        partial(devices_table.get_item, Key={"device_id": "missing"}),
+    )
+
+    assert [r.get("Item", {}).get("device_id") for r in responses] == [
+        "dev-0",
+        "dev-1",
+        "dev-2",
+        None,
+    ]
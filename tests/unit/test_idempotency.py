@@ -0,0 +1,192 @@
+import json
+import time
+from unittest.mock import MagicMock
+
+import boto3
+import common_utils
+import pytest
+
+
+@pytest.fixture
+def idempotency_table(mock_aws_services):
+    """Create the test idempotency table in moto."""
+    boto3.client("dynamodb").create_table(
+        TableName="test-idempotency",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return boto3.resource("dynamodb").Table("test-idempotency")
+
+
+def make_event(body, headers=None, key="key-1"):
+    """Build a minimal API Gateway POST event with an Idempotency-Key."""
+    if headers is None:
+        headers = {"Idempotency-Key": key} if key else {}
+    return {
+        "httpMethod": "POST",
+        "path": "/device_status",
+        "headers": headers,
+        "body": json.dumps(body),
+    }
+
+
+def make_handler(status_code=200):
+    """Build a mock write handler that reports how often it ran."""
+    calls = []
+
+    def handler(event):
+        calls.append(event)
+        return common_utils.format_response(status_code, {"count": len(calls)})
+
+    return MagicMock(__name__="handler", side_effect=handler)
+
+
+def test_get_idempotency_key_prefers_header():
+    """Test that the header wins over the payload and keys are scoped."""
+    header_event = make_event({"a": 1}, {"idempotency-key": "abc"})
+    other_body = make_event({"a": 2}, {"Idempotency-Key": "abc"})
+
+    assert common_utils.get_idempotency_key(
+        header_event
+    ) == common_utils.get_idempotency_key(other_body)
+    assert common_utils.get_idempotency_key(
+        make_event({"a": 1}, key="abc")
+    ) != common_utils.get_idempotency_key(make_event({"a": 1}, key="abd"))
+
+
+def test_get_idempotency_key_from_payload_is_opt_in():
+    """Test that without the header only key_from_payload hashes the body."""
+
+    def key(body):
+        return common_utils.get_idempotency_key(
+            make_event(body, key=None), key_from_payload=True
+        )
+
+    assert common_utils.get_idempotency_key(make_event({"a": 1}, key=None)) is None
+    assert key({"a": 1, "b": 2}) == key({"b": 2, "a": 1})
+    assert key({"a": 1}) != key({"a": 2})
+
+
+def test_repeated_request_returns_stored_response(idempotency_table):
+    """Test that a duplicate returns the stored response without rerunning."""
+    handler = make_handler()
+    decorated = common_utils.idempotent(table_name="idempotency")(handler)
+
+    first = decorated(make_event({"device_id": "dev-123"}))
+    second = decorated(make_event({"device_id": "dev-123"}))
+
+    assert handler.call_count == 1
+    assert first == second
+    items = idempotency_table.scan()["Items"]
+    assert len(items) == 1
+    assert items[0]["status"] == "COMPLETED"
+
+
+def test_stored_response_survives_container_restart(idempotency_table):
+    """Test that a new container replays the response from DynamoDB."""
+    handler = make_handler()
+    event = make_event({"device_id": "dev-123"})
+
+    first = common_utils.idempotent(table_name="idempotency")(handler)(event)
+    second = common_utils.idempotent(table_name="idempotency")(handler)(event)
+
+    assert handler.call_count == 1
+    assert json.loads(second["body"]) == json.loads(first["body"])
+
+
+def test_concurrent_duplicate_gets_409(idempotency_table):
+    """Test that a request holding the in-progress lock blocks duplicates."""
+    event = make_event({"device_id": "dev-123"})
+    now = int(time.time())
+    idempotency_table.put_item(
+        Item={
+            "id": common_utils.get_idempotency_key(event),
+            "status": "INPROGRESS",
+            "expiration": now + 3600,
+            "lock_expiration": now + 60,
+        }
+    )
+    handler = make_handler()
+
+    response = common_utils.idempotent(table_name="idempotency")(handler)(event)
+
+    assert response["statusCode"] == 409
+    assert response["headers"]["Retry-After"] == "1"
+    handler.assert_not_called()
+
+
+def test_failed_request_releases_lock(idempotency_table):
+    """Test that exceptions and server errors do not store a response."""
+    failing = MagicMock(__name__="handler", side_effect=ValueError("boom"))
+    decorated = common_utils.idempotent(table_name="idempotency")(failing)
+
+    with pytest.raises(ValueError):
+        decorated(make_event({"device_id": "dev-123"}))
+    assert idempotency_table.scan()["Items"] == []
+
+    server_error = make_handler(status_code=500)
+    decorated = common_utils.idempotent(table_name="idempotency")(server_error)
+    decorated(make_event({"device_id": "dev-123"}))
+    decorated(make_event({"device_id": "dev-123"}))
+    assert server_error.call_count == 2
+    assert idempotency_table.scan()["Items"] == []
+
+
+def test_retry_after_deadline_runs_again(idempotency_table):
+    """Test that a 503 from DeadlineExceeded leaves no lock behind."""
+    calls = []
+
+    def handler(event, context):
+        calls.append(event)
+        if len(calls) == 1:
+            # Spend the whole budget, then attempt one more AWS call
+            common_utils.get_current_deadline().expires_at = time.monotonic()
+            common_utils.get_dynamodb_table("idempotency").get_item(Key={"id": "x"})
+        return common_utils.format_response(200, {"attempt": len(calls)})
+
+    decorated = common_utils.handle_error(
+        common_utils.idempotent(table_name="idempotency")(handler)
+    )
+    context = MagicMock(**{"get_remaining_time_in_millis.return_value": 10_000})
+    event = make_event({"device_id": "dev-123"})
+
+    first = decorated(event, context)
+    retry = decorated(event, context)
+
+    assert (first["statusCode"], first["headers"]["Retry-After"]) == (503, "1")
+    assert retry["statusCode"] == 200
+    assert json.loads(retry["body"]) == {"attempt": 2}
+
+
+def test_requests_without_key_run_every_time(idempotency_table):
+    """Test that identical requests without a header are not deduplicated."""
+    handler = make_handler()
+    decorated = common_utils.idempotent(table_name="idempotency")(handler)
+
+    decorated(make_event({"device_id": "dev-123"}, key=None))
+    decorated(make_event({"device_id": "dev-123"}, key=None))
+
+    assert handler.call_count == 2
+    assert idempotency_table.scan()["Items"] == []
+
+    by_payload = make_handler()
+    decorated = common_utils.idempotent(
+        table_name="idempotency", key_from_payload=True
+    )(by_payload)
+    decorated(make_event({"a": 1}, key=None))
+    decorated(make_event({"a": 1}, key=None))
+
+    assert by_payload.call_count == 1
+
+
+def test_idempotency_disabled_without_table(monkeypatch):
+    """Test that the decorator is a pass-through when no table is configured."""
+    monkeypatch.delenv("IDEMPOTENCY_TABLE", raising=False)
+    handler = make_handler()
+    decorated = common_utils.idempotent(handler)
+
+    decorated(make_event({"device_id": "dev-123"}))
+    decorated(make_event({"device_id": "dev-123"}))
+
+    assert handler.call_count == 2
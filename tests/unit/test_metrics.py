@@ -0,0 +1,134 @@
+import json
+import threading
+from unittest.mock import patch
+
+import common_utils
+import pytest
+
+
+@pytest.fixture
+def emitted():
+    """Collect EMF documents written by a MetricsLogger."""
+    return []
+
+
+@pytest.fixture
+def metrics_logger(emitted):
+    """MetricsLogger with a local sink and fixed default dimensions."""
+    return common_utils.MetricsLogger(
+        namespace="Test",
+        default_dimensions={"Environment": "test"},
+        sink=emitted.append,
+    )
+
+
+def test_flush_writes_single_emf_document(metrics_logger, emitted):
+    """Test that counters, timers and histograms share one EMF document."""
+    metrics_logger.counter("Requests")
+    metrics_logger.counter("Requests", 2)
+    metrics_logger.histogram("PayloadSize", 120, "Bytes")
+    metrics_logger.histogram("PayloadSize", 80, "Bytes")
+    with metrics_logger.timer("PutItemLatency"):
+        pass
+
+    metrics_logger.flush()
+
+    assert len(emitted) == 1
+    document = emitted[0]
+    directive = document["_aws"]["CloudWatchMetrics"][0]
+    assert directive["Namespace"] == "Test"
+    assert directive["Dimensions"] == [["Environment"]]
+    assert {m["Name"]: m["Unit"] for m in directive["Metrics"]} == {
+        "Requests": "Count",
+        "PayloadSize": "Bytes",
+        "PutItemLatency": "Milliseconds",
+    }
+    assert document["Environment"] == "test"
+    assert document["Requests"] == 3
+    assert document["PayloadSize"] == [120, 80]
+    assert document["PutItemLatency"] >= 0
+    assert isinstance(document["_aws"]["Timestamp"], int)
+
+
+def test_flush_groups_by_dimension_values(metrics_logger, emitted):
+    """Test that different dimension values produce separate documents."""
+    metrics_logger.counter("Calls", Operation="GetItem")
+    metrics_logger.counter("Calls", Operation="PutItem")
+
+    metrics_logger.flush()
+
+    assert sorted(doc["Operation"] for doc in emitted) == ["GetItem", "PutItem"]
+    for document in emitted:
+        directive = document["_aws"]["CloudWatchMetrics"][0]
+        assert directive["Dimensions"] == [["Environment", "Operation"]]
+
+
+def test_flush_splits_values_past_emf_limit(metrics_logger, emitted):
+    """Test that more than 100 values for one metric span several documents."""
+    for i in range(150):
+        metrics_logger.histogram("Latency", i, "Milliseconds")
+
+    metrics_logger.flush()
+
+    assert len(emitted) == 2
+    assert len(emitted[0]["Latency"]) == 100
+    assert len(emitted[1]["Latency"]) == 50
+
+
+def test_flush_resets_and_skips_empty(metrics_logger, emitted):
+    """Test that flushing clears metrics and an empty flush writes nothing."""
+    metrics_logger.counter("Requests")
+    metrics_logger.flush()
+    metrics_logger.flush()
+
+    assert len(emitted) == 1
+
+
+def test_concurrent_record_and_flush(metrics_logger, emitted):
+    """Test that flushes racing with recording threads lose no counts."""
+
+    def record():
+        for _ in range(2000):
+            metrics_logger.counter("Requests")
+            metrics_logger.histogram("Latency", 1.0, Device=str(len(emitted) % 7))
+
+    threads = [threading.Thread(target=record) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        metrics_logger.flush()
+    for thread in threads:
+        thread.join()
+    metrics_logger.flush()
+
+    assert sum(doc.get("Requests", 0) for doc in emitted) == 8000
+
+
+def test_handle_error_flushes_metrics_once_per_invocation():
+    """Test that handle_error flushes metrics and counts handler errors."""
+    lines = []
+
+    def failing_handler(event, context):
+        common_utils.metrics.counter("Attempts")
+        raise ValueError("boom")
+
+    decorated_function = common_utils.handle_error(failing_handler)
+
+    with (
+        patch.object(common_utils, "_invocation_count", 1),
+        patch.object(
+            common_utils, "metrics", common_utils.MetricsLogger(namespace="Test")
+        ),
+        patch.object(common_utils, "tracer", common_utils.AwsCallTracer()),
+    ):
+        common_utils.set_structured_log_sink(lines.append)
+        try:
+            response = decorated_function({}, {})
+        finally:
+            common_utils.set_structured_log_sink(None)
+
+    assert response["statusCode"] == 500
+    assert len(lines) == 1
+    document = json.loads(lines[0])
+    assert document["Attempts"] == 1
+    assert document["HandlerErrors"] == 1
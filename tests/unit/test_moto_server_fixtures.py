@@ -0,0 +1,41 @@
+import os
+
+import boto3
+import common_utils
+
+
+def test_function_tables_follow_function_json(function_tables, moto_endpoint):
+    """Test that tables, keys and indexes come from the function.json schema."""
+    tables = function_tables("payment_status")
+
+    assert set(tables) == {"payments", "payment_ledger"}
+    payments = tables["payments"]
+    assert payments.name == f"{moto_endpoint}-payments"
+    assert [index["IndexName"] for index in payments.global_secondary_indexes] == [
+        "user_id-created_at-index"
+    ]
+    assert [key["AttributeName"] for key in tables["payment_ledger"].key_schema] == [
+        "payment_id",
+        "status",
+    ]
+
+
+def test_handlers_resolve_namespaced_tables(function_tables):
+    """Test that get_dynamodb_table finds the tables created for this test."""
+    function_tables("device_status")
+    common_utils.get_dynamodb_table("devices").put_item(Item={"device_id": "d-1"})
+
+    item = common_utils.get_dynamodb_table("devices").get_item(Key={"device_id": "d-1"})
+    assert item["Item"] == {"device_id": "d-1"}
+
+
+def test_namespaces_keep_tests_apart(moto_server, moto_endpoint, aws_namespace):
+    """Test that calls go to the shared server under a per-test namespace."""
+    assert os.environ["AWS_ENDPOINT_URL"] == moto_server
+    assert moto_endpoint.startswith(aws_namespace)
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "main")
+    assert aws_namespace.startswith(f"{worker}-")
+
+    # Tables of earlier tests were deleted at their teardown
+    tables = boto3.client("dynamodb").list_tables()["TableNames"]
+    assert not [name for name in tables if name.startswith(moto_endpoint)]
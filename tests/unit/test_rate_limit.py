@@ -0,0 +1,90 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import boto3
+import common_utils
+import pytest
+
+
+@pytest.fixture
+def rate_limit_table(mock_aws_services):
+    """Create the test rate limit table in moto."""
+    boto3.client("dynamodb").create_table(
+        TableName="test-rate-limits",
+        KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def post_event(device_id):
+    """Build a device status POST event."""
+    return {"httpMethod": "POST", "body": json.dumps({"device_id": device_id})}
+
+
+def test_token_bucket_refills_over_time():
+    """Test that the bucket allows a burst, then refills at the rate."""
+    with patch("common_utils.time.monotonic", return_value=100.0):
+        bucket = common_utils.TokenBucket(rate=2, burst=2)
+        assert bucket.take() == 0
+        assert bucket.take() == 0
+        assert bucket.take() == pytest.approx(0.5)
+
+    with patch("common_utils.time.monotonic", return_value=100.5):
+        assert bucket.take() == 0
+
+
+@pytest.mark.parametrize(
+    "event,expected_key",
+    [
+        ({"pathParameters": {"device_id": "dev-1"}}, "device:dev-1"),
+        ({"body": '{"device_id": "dev-2"}'}, "device:dev-2"),
+        (
+            {"requestContext": {"authorizer": {"claims": {"sub": "user-1"}}}},
+            "user:user-1",
+        ),
+        ({"requestContext": {"http": {"sourceIp": "10.0.0.1"}}}, "ip:10.0.0.1"),
+        ({"body": "{invalid json"}, None),
+    ],
+)
+def test_get_device_or_caller_id(event, expected_key):
+    """Test rate-limit key selection from device, caller and source IP."""
+    assert common_utils.get_device_or_caller_id(event) == expected_key
+
+
+def test_rate_limit_returns_429_before_handler():
+    """Test that excess requests are rejected without calling the handler."""
+    handler = MagicMock(__name__="handler", return_value={"statusCode": 200})
+    decorated = common_utils.rate_limit(rate=1, burst=2)(handler)
+
+    responses = [decorated(post_event("dev-1")) for _ in range(3)]
+    other_device = decorated(post_event("dev-2"))
+
+    assert [r["statusCode"] for r in responses] == [200, 200, 429]
+    assert responses[2]["headers"]["Retry-After"] == "1"
+    assert other_device["statusCode"] == 200
+    assert handler.call_count == 3
+
+
+def test_rate_limit_enforced_across_containers(rate_limit_table):
+    """Test that the DynamoDB counter limits requests across containers."""
+    first = common_utils.RateLimiter(rate=100, burst=3, table_name="rate-limits")
+    second = common_utils.RateLimiter(rate=100, burst=3, table_name="rate-limits")
+
+    # Keep every check in the same counting window
+    with patch("common_utils.time.time", return_value=1_800_000_000.25):
+        results = [first.check("device:dev-1"), second.check("device:dev-1")]
+        results += [first.check("device:dev-1"), second.check("device:dev-1")]
+
+    assert results[:3] == [0, 0, 0]
+    assert results[3] == pytest.approx(0.75)
+
+
+def test_rate_limit_disabled_without_rate(monkeypatch):
+    """Test that the decorator is a pass-through when no rate is configured."""
+    monkeypatch.delenv("RATE_LIMIT_PER_SECOND", raising=False)
+    handler = MagicMock(__name__="handler", return_value={"statusCode": 200})
+    decorated = common_utils.rate_limit(handler)
+
+    for _ in range(5):
+        assert decorated(post_event("dev-1"))["statusCode"] == 200
@@ -0,0 +1,136 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import common_utils
+import pytest
+from moto import mock_aws
+
+
+@pytest.fixture
+def devices_table(mock_aws_services):
+    """Create the test devices table in moto."""
+    boto3.client("dynamodb").create_table(
+        TableName="test-devices",
+        KeySchema=[{"AttributeName": "device_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[{"AttributeName": "device_id", "AttributeType": "S"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+@pytest.fixture
+def tracer(monkeypatch):
+    """Install a fresh tracer that captures consumed capacity."""
+    fresh = common_utils.AwsCallTracer(capture_consumed_capacity=True)
+    monkeypatch.setattr(common_utils, "tracer", fresh)
+    return fresh
+
+
+@pytest.fixture
+def lines():
+    """Capture structured log lines."""
+    captured = []
+    common_utils.set_structured_log_sink(captured.append)
+    yield captured
+    common_utils.set_structured_log_sink(None)
+
+
+def test_tracer_records_dynamodb_spans(devices_table, tracer, lines):
+    """Test that calls through the client factory are traced against moto."""
+    table = common_utils.get_dynamodb_table("devices")
+
+    table.put_item(Item={"device_id": "dev-123", "status": "active"})
+    table.get_item(Key={"device_id": "dev-123"})
+    tracer.flush()
+
+    assert len(lines) == 1
+    summary = json.loads(lines[0])
+    assert summary["message"] == "aws_call_summary"
+    assert summary["call_count"] == 2
+    assert [call["op"] for call in summary["calls"]] == [
+        "dynamodb.PutItem",
+        "dynamodb.GetItem",
+    ]
+    for call in summary["calls"]:
+        assert call["table"] == "test-devices"
+        assert call["status"] == 200
+        assert call["attempts"] == 1
+        assert call["ms"] >= 0
+        assert "capacity" in call
+
+
+def test_tracer_records_failed_calls(devices_table, tracer):
+    """Test that error responses are recorded with their error code."""
+    table = common_utils.get_dynamodb_table("missing")
+
+    with pytest.raises(Exception):
+        table.get_item(Key={"device_id": "dev-123"})
+
+    span = tracer.summary()["calls"][0]
+    assert span["status"] == 400
+    assert span["error"] == "ResourceNotFoundException"
+
+
+def test_tracer_caps_spans_per_invocation(devices_table, monkeypatch, lines):
+    """Test that spans beyond max_spans are counted but not kept."""
+    tracer = common_utils.AwsCallTracer(max_spans=1)
+    monkeypatch.setattr(common_utils, "tracer", tracer)
+    table = common_utils.get_dynamodb_table("devices")
+
+    for _ in range(3):
+        table.get_item(Key={"device_id": "dev-123"})
+    tracer.flush()
+
+    summary = json.loads(lines[0])
+    assert summary["call_count"] == 3
+    assert summary["dropped"] == 2
+    assert len(summary["calls"]) == 1
+
+
+def test_tracer_disabled_when_sample_rate_zero(monkeypatch, lines):
+    """Test that a zero sample rate attaches no hooks and emits nothing."""
+    tracer = common_utils.AwsCallTracer(sample_rate=0)
+    monkeypatch.setattr(common_utils, "tracer", tracer)
+
+    with mock_aws():
+        client = common_utils.get_s3_client()
+        client.list_buckets()
+    tracer.flush()
+
+    assert lines == []
+
+
+def test_tracer_keeps_concurrent_invocations_apart(devices_table, tracer):
+    """Test that invocations on different threads each see only their calls."""
+    table = common_utils.get_dynamodb_table("devices")
+    both_called = threading.Barrier(2, timeout=5)
+
+    def invocation(calls):
+        for _ in range(calls):
+            table.get_item(Key={"device_id": "dev-123"})
+        both_called.wait()
+        count = tracer.summary()["call_count"]
+        tracer.flush()
+        return count
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        counts = list(pool.map(invocation, [1, 3]))
+
+    assert counts == [1, 3]
+
+
+def test_tracer_caps_fan_out_spans(devices_table, monkeypatch):
+    """Test that fan-out calls count toward the caller's cap exactly."""
+    tracer = common_utils.AwsCallTracer(max_spans=5)
+    monkeypatch.setattr(common_utils, "tracer", tracer)
+    table = common_utils.get_dynamodb_table("devices")
+
+    common_utils.fan_out_map(
+        lambda _: table.get_item(Key={"device_id": "dev-123"}), range(20)
+    )
+    summary = tracer.summary()
+
+    assert summary["call_count"] == 20
+    assert summary["dropped"] == 15
+    assert len(summary["calls"]) == 5
@@ -0,0 +1,129 @@
+from decimal import Decimal
+from unittest.mock import patch
+
+import boto3
+import common_utils
+import pytest
+
+
+@pytest.fixture
+def tables(mock_aws_services):
+    """Create an accounts and an audit table in moto."""
+    client = boto3.client("dynamodb")
+    for name in ("test-accounts", "test-audit"):
+        client.create_table(
+            TableName=name,
+            KeySchema=[{"AttributeName": "id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "id", "AttributeType": "S"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+    accounts = common_utils.get_dynamodb_table("accounts")
+    accounts.put_item(Item={"id": "a1", "balance": Decimal("10")})
+    return accounts, common_utils.get_dynamodb_table("audit")
+
+
+def debit(accounts, audit, amount):
+    """Build a transaction debiting a1 and recording it in the audit table."""
+    return (
+        common_utils.Transaction()
+        .update(
+            accounts,
+            {"id": "a1"},
+            "SET balance = balance - :amount",
+            condition="balance >= :amount",
+            values={":amount": Decimal(amount)},
+            name="account",
+            return_on_failure=True,
+        )
+        .put(
+            audit,
+            {"id": f"debit-{amount}", "amount": Decimal(amount)},
+            condition="attribute_not_exists(id)",
+            name="audit",
+        )
+    )
+
+
+def cancelled(client, *codes):
+    """Build a TransactionCanceledException with one reason per operation."""
+    return client.exceptions.TransactionCanceledException(
+        {
+            "Error": {"Code": "TransactionCanceledException", "Message": "cancelled"},
+            "CancellationReasons": [{"Code": code} for code in codes],
+        },
+        "TransactWriteItems",
+    )
+
+
+def test_transaction_writes_all_operations(tables):
+    """Test that every operation is applied by one TransactWriteItems call."""
+    accounts, audit = tables
+    client = accounts.meta.client
+    transaction = debit(accounts, audit, "4")
+
+    with patch.object(
+        client, "transact_write_items", wraps=client.transact_write_items
+    ) as transact:
+        transaction.write()
+
+    transact.assert_called_once()
+    assert accounts.get_item(Key={"id": "a1"})["Item"]["balance"] == 6
+    assert audit.get_item(Key={"id": "debit-4"})["Item"]["amount"] == 4
+
+
+def test_transaction_cancellation_names_failing_operation(tables):
+    """Test that reasons and current items are mapped to operation names."""
+    accounts, audit = tables
+
+    with pytest.raises(common_utils.TransactionCancelled) as excinfo:
+        debit(accounts, audit, "40").write()
+
+    assert excinfo.value.reasons == {"account": "ConditionalCheckFailed"}
+    assert excinfo.value.items == {"account": {"id": "a1", "balance": 10}}
+    assert "Item" not in audit.get_item(Key={"id": "debit-40"})
+
+
+def test_transaction_retries_conflicts_only(tables):
+    """Test that conflicts are retried and other cancellations are not."""
+    accounts, audit = tables
+    client = accounts.meta.client
+
+    with (
+        patch.object(
+            client,
+            "transact_write_items",
+            side_effect=[cancelled(client, "TransactionConflict", "None"), {}],
+        ) as transact,
+        patch("common_utils.time.sleep"),
+    ):
+        debit(accounts, audit, "1").write()
+    assert transact.call_count == 2
+
+    with patch.object(
+        client,
+        "transact_write_items",
+        side_effect=cancelled(client, "TransactionConflict", "ConditionalCheckFailed"),
+    ) as transact:
+        with pytest.raises(common_utils.TransactionCancelled):
+            debit(accounts, audit, "1").write()
+    assert transact.call_count == 1
+
+
+def test_transaction_gives_up_after_retries(tables):
+    """Test that a persistent conflict is raised once retries run out."""
+    accounts, audit = tables
+    client = accounts.meta.client
+
+    with (
+        patch.object(
+            client,
+            "transact_write_items",
+            side_effect=cancelled(client, "TransactionConflict", "None"),
+        ) as transact,
+        patch("common_utils.time.sleep"),
+    ):
+        with pytest.raises(common_utils.TransactionCancelled) as excinfo:
+            debit(accounts, audit, "1").write(retries=2)
+
+    assert transact.call_count == 3
+    assert excinfo.value.reasons == {"account": "TransactionConflict"}
@@ -1,74 +1,196 @@
 #!/usr/bin/env python3
+"""
+Upgrade the packages listed in requirements files.
+Every package is resolved and installed by a single pip run, so the result
+is one consistent environment. Installed versions are then read in bulk and
+each requirement's minimum version is rewritten in place, keeping extras,
+markers and comments. --dry-run asks pip's resolver for the upgrades
+without installing or writing anything.
+"""
+
+import argparse
+import importlib.metadata
+import json
+import os
 import re
 import subprocess
 import sys
+import tempfile
 from pathlib import Path
 
-def update_packages(requirements_file='requirements-dev.txt'):
-    # Read requirements file
-    req_path = Path(requirements_file)
-    if not req_path.exists():
-        print(f"Error: {requirements_file} not found")
-        return False
-    
-    with open(req_path, 'r') as f:
-        content = f.read()
-    
-    # Extract package names (ignoring comments and version numbers)
-    packages = []
-    for line in content.splitlines():
-        line = line.strip()
-        if not line or line.startswith('#'):
+# name, optional [extras], version specifiers, then markers and/or comment
+REQUIREMENT_PATTERN = re.compile(
+    r"^(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)"
+    r"(?P<extras>\[[^\]]*\])?"
+    r"(?P<spec>[^;#]*)"
+    r"(?P<rest>.*)$"
+)
+
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(
+        description="Upgrade the packages of requirements files in one pip run"
+    )
+    parser.add_argument(
+        "requirements",
+        nargs="*",
+        default=["requirements-dev.txt"],
+        help="Requirements files to update (default: requirements-dev.txt)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show the upgrades pip would make without installing or writing",
+    )
+    return parser.parse_args()
+
+
+def canonical_name(name):
+    """Normalise a project name as pip compares them (PEP 503)."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_requirement(line):
+    """Return the regex match of a package line, or None for anything else.
+
+    Comments, blank lines, pip options (-r, -e, --index-url) and direct
+    URL references are left alone.
+    """
+    stripped = line.strip()
+    if not stripped or stripped.startswith(("#", "-")) or "://" in stripped:
+        return None
+    return REQUIREMENT_PATTERN.match(stripped)
+
+
+def read_requirements(paths):
+    """Return {path: file content} and the package specs they list."""
+    contents = {}
+    packages = {}
+    for path in paths:
+        content = Path(path).read_text()
+        contents[path] = content
+        for line in content.splitlines():
+            match = parse_requirement(line)
+            if match:
+                name = canonical_name(match["name"])
+                packages[name] = match["name"] + (match["extras"] or "")
+    return contents, packages
+
+
+def installed_versions():
+    """Return {canonical name: version} for every installed distribution."""
+    return {
+        canonical_name(dist.metadata["Name"]): dist.version
+        for dist in importlib.metadata.distributions()
+        if dist.metadata["Name"]
+    }
+
+
+def resolve(specs, dry_run=False):
+    """Upgrade all specs in one pip run and return the versions it chose.
+
+    Returns {canonical name: version} for every distribution pip installed,
+    or would install with dry_run.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        report_path = os.path.join(tmp_dir, "report.json")
+        command = [
+            sys.executable,
+            "-m",
+            "pip",
+            "install",
+            "--upgrade",
+            "--quiet",
+            "--report",
+            report_path,
+        ]
+        if dry_run:
+            command.append("--dry-run")
+        subprocess.run(command + sorted(specs), check=True)
+        with open(report_path) as f:
+            report = json.load(f)
+    return {
+        canonical_name(item["metadata"]["name"]): item["metadata"]["version"]
+        for item in report.get("install", [])
+    }
+
+
+def update_content(content, versions):
+    """Set each requirement's minimum version to the one in versions."""
+    lines = []
+    for line in content.splitlines(keepends=True):
+        match = parse_requirement(line)
+        version = match and versions.get(canonical_name(match["name"]))
+        if not version:
+            lines.append(line)
             continue
-        # Extract package name (part before any version specifier)
-        match = re.match(r'^([a-zA-Z0-9_.-]+)', line)
-        if match:
-            packages.append(match.group(1))
-    
+        spec = match["spec"]
+        spacing = spec.removeprefix(spec.rstrip())
+        newline = line.removeprefix(line.rstrip("\r\n"))
+        indent = line[: len(line) - len(line.lstrip())]
+        lines.append(
+            f"{indent}{match['name']}{match['extras'] or ''}>={version}"
+            f"{spacing}{match['rest']}{newline}"
+        )
+    return "".join(lines)
+
+
+def write_atomically(path, content):
+    """Replace path with content so readers never see a partial file."""
+    path = Path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.chmod(tmp_path, path.stat().st_mode & 0o777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def update_packages(paths, dry_run=False):
+    """Upgrade the packages of paths and return {name: (old, new)} changes."""
+    contents, packages = read_requirements(paths)
     if not packages:
-        print(f"No packages found in {requirements_file}")
-        return False
-    
-    print(f"Found {len(packages)} packages to update")
-    
-    # Update packages one by one
-    updated_packages = {}
-    for package in packages:
-        print(f"Updating {package}...")
-        try:
-            subprocess.check_call([sys.executable, '-m', 'pip', 'install', '--upgrade', package])
-            
-            # Get installed version
-            result = subprocess.check_output([sys.executable, '-m', 'pip', 'show', package])
-            version_line = [line for line in result.decode('utf-8').splitlines() 
-                           if line.startswith('Version:')][0]
-            version = version_line.split(':', 1)[1].strip()
-            updated_packages[package] = version
-            print(f"  Updated {package} to version {version}")
-        except Exception as e:
-            print(f"  Failed to update {package}: {e}")
-    
-    # Update requirements file
-    new_content = []
-    for line in content.splitlines():
-        stripped = line.strip()
-        if not stripped or stripped.startswith('#'):
-            new_content.append(line)
-            continue
-        
-        match = re.match(r'^([a-zA-Z0-9_.-]+)', stripped)
-        if match and match.group(1) in updated_packages:
-            package = match.group(1)
-            new_content.append(f"{package}>={updated_packages[package]}")
-        else:
-            new_content.append(line)
-    
-    with open(req_path, 'w') as f:
-        f.write('\n'.join(new_content))
-    
-    print(f"\nUpdated {len(updated_packages)} packages in {requirements_file}")
-    return True
-
-if __name__ == '__main__':
-    req_file = sys.argv[1] if len(sys.argv) > 1 else 'requirements-dev.txt'
-    update_packages(req_file) 
\ No newline at end of file
+        return {}
+
+    before = installed_versions()
+    resolved = resolve(packages.values(), dry_run=dry_run)
+    # After a real install the environment is the source of truth
+    after = {**before, **resolved} if dry_run else installed_versions()
+
+    changes = {
+        name: (before.get(name), after[name])
+        for name in packages
+        if name in after and before.get(name) != after[name]
+    }
+    if not dry_run:
+        versions = {name: after[name] for name in packages if name in after}
+        for path, content in contents.items():
+            updated = update_content(content, versions)
+            if updated != content:
+                write_atomically(path, updated)
+    return changes
+
+
+def main():
+    """Main function"""
+    args = parse_args()
+
+    missing = [path for path in args.requirements if not Path(path).exists()]
+    if missing:
+        print(f"Error: {', '.join(missing)} not found")
+        return 1
+
+    changes = update_packages(args.requirements, dry_run=args.dry_run)
+    for name, (old, new) in sorted(changes.items()):
+        print(f"{name:<30} {old or '-':>14} -> {new}")
+    verb = "Would upgrade" if args.dry_run else "Upgraded"
+    print(f"{verb} {len(changes)} package(s) from {', '.join(args.requirements)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())